@@ -54,6 +54,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "flights.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -153,8 +154,77 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # orjson renders the same JSON as DRF's JSONRenderer, faster; clients
+    # sending Accept: application/msgpack get MessagePack.
+    "DEFAULT_RENDERER_CLASSES": (
+        "flights.renderers.ORJSONRenderer",
+        "flights.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "flights.parsers.ORJSONParser",
+        "flights.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
+# Versioned response cache of the flight list and detail endpoints.
+# Entries are fresh for FLIGHTS_CACHE_TIMEOUT seconds or until a write
+# bumps their version, and then served stale for up to
+# FLIGHTS_CACHE_STALE_TIMEOUT seconds while one request refreshes them.
+# A timeout of 0 disables the cache.
+FLIGHTS_CACHE_ALIAS = "default"
+FLIGHTS_CACHE_TIMEOUT = 300
+FLIGHTS_CACHE_STALE_TIMEOUT = 30
+
+# Seat holds keep seats out of sale for SEAT_HOLD_MINUTES unless the
+# client asks for another duration of up to SEAT_HOLD_MAX_MINUTES.
+SEAT_HOLD_MINUTES = 10
+SEAT_HOLD_MAX_MINUTES = 30
+
+# Bookings check seats optimistically against the row version of their
+# flights and are retried up to BOOKING_RETRIES times before a 409.
+BOOKING_RETRIES = 3
+
+# Responses of order creation requests sent with an Idempotency-Key
+# header are replayed for repeats of the key within this many hours.
+IDEMPOTENCY_KEY_HOURS = 24
+
+# Queue every order request for the process_bookings workers instead of
+# only those sent with "Prefer: respond-async".
+BOOKING_QUEUE = False
+
+# Queued bookings that lose to concurrent bookings this many times in a
+# row fail with a 409 error instead of staying queued.
+BOOKING_QUEUE_ATTEMPTS = 5
+
+# Order history exports stream rows read this many at a time from a
+# server-side cursor.
+ORDER_EXPORT_CHUNK_SIZE = 2000
+
+# Airport and route renames rebuild the order summaries of up to this many
+# orders in the saving request; more are marked stale and rebuilt by
+# "summarize_orders --stale".
+ORDER_SUMMARY_SYNC_LIMIT = 500
+
+# Serve the flight, route and airplane lists from values() rows instead
+# of model instances; the responses are the same.
+FAST_LIST_SERIALIZATION = False
+
+# Flights of recurring schedules are created SCHEDULE_HORIZON_DAYS ahead
+# by python manage.py materialize_schedules, and on demand for the days a
+# search asks about, up to SCHEDULE_SEARCH_DAYS of them per search.
+SCHEDULE_HORIZON_DAYS = 14
+SCHEDULE_SEARCH_DAYS = 31
+
+# Record wall, database and serializer time, query counts and response
+# sizes per view and action, served in the Prometheus text format at
+# /metrics (behind METRICS_TOKEN as a bearer token when it is set).
+# Staff users get the timings of their requests in a Server-Timing header.
+REQUEST_METRICS = os.getenv("REQUEST_METRICS", "") == "1"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Airport Service API",
     "DESCRIPTION": "Api for tracking tickets",
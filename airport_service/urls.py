@@ -22,8 +22,11 @@ from drf_spectacular.views import (
     SpectacularRedocView,
 )
 
+from flights.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
     path("__debug__/", include("debug_toolbar.urls")),
     path("api/flights/", include("flights.urls", namespace="flights")),
     path("api/users/", include("users.urls", namespace="users")),
@@ -12,7 +12,11 @@ done
 # Perform Django database migrations
 python manage.py makemigrations
 python manage.py migrate
-python manage.py loaddata airport_service_db_data.json
+python manage.py bootstrap_fixture airport_service_db_data.json
+
+
+# Rebuild order summaries left stale by large airport and route renames
+(while true; do python manage.py summarize_orders --stale; sleep 300; done) &
 
 
 # Start Django development server
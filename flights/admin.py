@@ -8,7 +8,10 @@ from flights.models import (
     Route,
     Airplane,
     Flight,
+    FlightSchedule,
     Ticket,
+    SeatHold,
+    HeldSeat,
 )
 
 
@@ -44,11 +47,36 @@ class FlightAdmin(admin.ModelAdmin):
     list_filter = ("departure_time",)
 
 
+@admin.register(FlightSchedule)
+class FlightScheduleAdmin(admin.ModelAdmin):
+    list_display = (
+        "route",
+        "airplane",
+        "departure_time",
+        "time_zone",
+        "valid_from",
+        "valid_until",
+    )
+    list_filter = ("valid_from",)
+
+
 @admin.register(Ticket)
 class TicketAdmin(admin.ModelAdmin):
     list_display = ("flight", "row", "seat", "order")
     list_filter = ("flight", "order")
 
 
+class HeldSeatInline(admin.TabularInline):
+    model = HeldSeat
+    extra = 0
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ("flight", "user", "created_at", "expires_at")
+    list_filter = ("expires_at",)
+    inlines = (HeldSeatInline,)
+
+
 admin.site.register(Crew)
 admin.site.register(AirplaneType)
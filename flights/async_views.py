@@ -0,0 +1,187 @@
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage, Paginator
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from flights.models import Airport, Flight, HeldSeat, Route
+from flights.paginators import OrderFlightPagination
+from flights.schedules import materialize_searched
+from flights.search import aairport_ids_for_city, filter_departure, normalize_city
+from flights.serializers import (
+    AirportSerializer,
+    FlightListSerializer,
+    FlightRetrieveSerializer,
+    RouteListSerializer,
+)
+
+
+class AsyncReadView(View):
+    """
+    Read-only JSON endpoint served on the event loop under ASGI.
+
+    JWT authentication and the default DRF throttles run in a worker
+    thread; queries use the async ORM and responses are rendered like
+    the DRF viewsets, so clients see the same payloads and errors.
+    """
+
+    http_method_names = ["get"]
+    authentication = JWTAuthentication()
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            await sync_to_async(self.initial)(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            data = exc.detail
+            if not isinstance(data, (list, dict)):
+                data = {"detail": data}
+            response = self.render(data, exc.status_code)
+            if isinstance(
+                exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+            ):
+                response["WWW-Authenticate"] = self.authentication.authenticate_header(
+                    request
+                )
+            if getattr(exc, "wait", None):
+                response["Retry-After"] = str(int(exc.wait))
+            return response
+
+    def initial(self, request):
+        user_auth = self.authentication.authenticate(request)
+        if user_auth is None:
+            raise exceptions.NotAuthenticated()
+        request.user = user_auth[0]
+
+        for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, self):
+                raise exceptions.Throttled(throttle.wait())
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        return HttpResponse(
+            api_settings.DEFAULT_RENDERER_CLASSES[0]().render(data),
+            status=status_code,
+            content_type="application/json",
+        )
+
+    def get_page_size(self, pagination_class):
+        """
+        The page size ``pagination_class`` would use for the request: its
+        ``page_size_query_param`` up to ``max_page_size``, or the default.
+        """
+        try:
+            page_size = int(self.request.GET[pagination_class.page_size_query_param])
+        except (KeyError, ValueError):
+            return pagination_class.page_size
+        if page_size <= 0:
+            return pagination_class.page_size
+        return min(page_size, pagination_class.max_page_size)
+
+    async def paginated(self, queryset, serializer_class, pagination_class):
+        """Render a page like ``pagination_class`` of the sync views."""
+        request = self.request
+        paginator = Paginator(queryset, self.get_page_size(pagination_class))
+        count = await queryset.acount()
+        paginator.count = count
+        try:
+            page = paginator.page(request.GET.get("page", 1))
+        except InvalidPage:
+            raise exceptions.NotFound("Invalid page.")
+
+        url = request.build_absolute_uri()
+        next_url = previous_url = None
+        if page.has_next():
+            next_url = replace_query_param(url, "page", page.next_page_number())
+        if page.has_previous():
+            previous_url = (
+                remove_query_param(url, "page")
+                if page.previous_page_number() == 1
+                else replace_query_param(url, "page", page.previous_page_number())
+            )
+        results = [obj async for obj in page.object_list]
+        return self.render(
+            {
+                "count": count,
+                "next": next_url,
+                "previous": previous_url,
+                "results": serializer_class(results, many=True).data,
+            }
+        )
+
+
+class AsyncFlightListView(AsyncReadView):
+    async def get(self, request):
+        queryset = Flight.objects.prefetch_related("crew").select_related(
+            "route", "airplane", "route__source", "route__destination"
+        )
+        source = request.GET.get("source")
+        destination = request.GET.get("destination")
+        source_ids = destination_ids = None
+
+        if source:
+            source_ids = await aairport_ids_for_city(source)
+            queryset = queryset.filter(route__source_id__in=source_ids)
+
+        if destination:
+            destination_ids = await aairport_ids_for_city(destination)
+            queryset = queryset.filter(route__destination_id__in=destination_ids)
+
+        queryset = filter_departure(queryset, request.GET)
+        await sync_to_async(materialize_searched)(
+            request.GET, source_ids, destination_ids
+        )
+        queryset = queryset.annotate(seats_held=HeldSeat.count_for_flight())
+        return await self.paginated(
+            queryset, FlightListSerializer, OrderFlightPagination
+        )
+
+
+class AsyncFlightDetailView(AsyncReadView):
+    async def get(self, request, pk):
+        queryset = Flight.objects.prefetch_related("crew", "tickets").select_related(
+            "route",
+            "airplane",
+            "airplane__airplane_type",
+            "route__source",
+            "route__destination",
+        )
+        flights = [flight async for flight in queryset.filter(pk=pk)]
+        if not flights:
+            raise exceptions.NotFound()
+        return self.render(FlightRetrieveSerializer(flights[0]).data)
+
+
+class AsyncRouteListView(AsyncReadView):
+    async def get(self, request):
+        queryset = Route.objects.select_related("source", "destination")
+        source = request.GET.get("source")
+        destination = request.GET.get("destination")
+
+        if source:
+            queryset = queryset.filter(
+                source_id__in=await aairport_ids_for_city(source)
+            )
+
+        if destination:
+            queryset = queryset.filter(
+                destination_id__in=await aairport_ids_for_city(destination)
+            )
+
+        routes = [route async for route in queryset]
+        return self.render(RouteListSerializer(routes, many=True).data)
+
+
+class AsyncAirportListView(AsyncReadView):
+    async def get(self, request):
+        queryset = Airport.objects.all()
+        city = request.GET.get("city")
+
+        if city:
+            queryset = queryset.filter(city_key__startswith=normalize_city(city))
+
+        airports = [airport async for airport in queryset]
+        return self.render(AirportSerializer(airports, many=True).data)
@@ -0,0 +1,221 @@
+from collections import Counter, defaultdict
+from functools import reduce, wraps
+from operator import or_
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ErrorDetail, ValidationError
+from rest_framework.validators import UniqueTogetherValidator
+
+from flights import cache
+from flights.exceptions import BookingConflict, SeatConflict, StaleFlight
+from flights.models import Flight, HeldSeat, Order, SeatHold, Ticket
+from flights.summaries import write_summaries
+
+
+SEAT_TAKEN = UniqueTogetherValidator.message.format(field_names="flight, row, seat")
+
+
+def ticket_errors(tickets_data, errors):
+    """
+    Errors of the tickets at some indexes of an order, in the shape of
+    the nested ticket serializer: one entry per ticket, empty if valid.
+    """
+    return [errors.get(index, {}) for index in range(len(tickets_data))]
+
+
+def _seats_taken_error(tickets_data, indexes):
+    error = {"non_field_errors": [ErrorDetail(SEAT_TAKEN, code="unique")]}
+    return ValidationError(
+        {"tickets": ticket_errors(tickets_data, dict.fromkeys(indexes, error))}
+    )
+
+
+def _seats_filter(seats):
+    return reduce(
+        or_,
+        (Q(flight_id=flight_id, row=row, seat=seat) for flight_id, row, seat in seats),
+    )
+
+
+def _claim_flights(flights, taken):
+    """
+    Move the row version of every flight in ``flights`` (ids mapped to
+    their loaded instances) and add the ``taken`` seats per flight id.
+
+    Raises ``StaleFlight`` after reloading the versions of the instances
+    when any flight was changed since it was loaded. Flights are updated
+    in id order so that concurrent bookings lock their rows alike.
+    """
+    claimed = []
+    for flight_id in sorted(flights):
+        version = flights[flight_id][0].version
+        if Flight.adjust_seats(flight_id, taken[flight_id], version=version):
+            claimed.append((flight_id, version + 1))
+            continue
+
+        versions = dict(
+            Flight.objects.filter(pk__in=flights).values_list("pk", "version")
+        )
+        # The versions moved here are rolled back with the transaction.
+        for claimed_id, _ in claimed:
+            versions[claimed_id] -= 1
+        for instances in flights.values():
+            for instance in instances:
+                instance.version = versions.get(instance.pk, instance.version)
+        raise StaleFlight()
+
+    for flight_id, version in claimed:
+        for instance in flights[flight_id]:
+            instance.version = version
+
+
+def optimistic(func):
+    """
+    Run ``func`` in a transaction, rerunning it when it raises
+    ``StaleFlight`` at most BOOKING_RETRIES times before answering with
+    a 409 ``BookingConflict``.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for _ in range(settings.BOOKING_RETRIES + 1):
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except StaleFlight:
+                continue
+        raise BookingConflict()
+
+    return wrapper
+
+
+def check_booking_open(flight):
+    if flight.departure_time < timezone.now() + timezone.timedelta(hours=3):
+        raise ValidationError(
+            "Booking tickets is available no later " "than three hours before departure"
+        )
+
+
+def book_tickets(order, tickets_data):
+    """
+    Insert the tickets of an order in one statement.
+
+    Seats are checked against the already loaded airplanes of their
+    flights and against sold tickets with a single query, raising the
+    errors of ``Ticket.validate_ticket`` and of the unique together check
+    under the tickets they belong to. Seats held by other users raise
+    ``SeatConflict``, seats held by the order's user are released, and
+    the summary of the order is written.
+
+    The checks hold as long as the row versions of the flights did not
+    move, which every booking of a flight does before writing tickets.
+    Must run inside ``optimistic`` to retry when they did.
+    """
+    seats = {}
+    flights = defaultdict(list)
+    errors = {}
+    duplicates = []
+    for index, ticket_data in enumerate(tickets_data):
+        flight = ticket_data["flight"]
+        try:
+            Ticket.validate_ticket(
+                ticket_data["row"],
+                ticket_data["seat"],
+                flight.airplane,
+                ValidationError,
+            )
+        except ValidationError as exc:
+            errors[index] = exc.detail
+        seat = (flight.pk, ticket_data["row"], ticket_data["seat"])
+        if seat in seats:
+            duplicates.append(index)
+        seats.setdefault(seat, index)
+        flights[flight.pk].append(flight)
+    if errors:
+        raise ValidationError({"tickets": ticket_errors(tickets_data, errors)})
+    if duplicates:
+        raise _seats_taken_error(tickets_data, duplicates)
+
+    conflicts = _seats_filter(seats)
+    taken = Ticket.objects.filter(conflicts).values_list("flight_id", "row", "seat")
+    if taken:
+        raise _seats_taken_error(tickets_data, [seats[seat] for seat in taken])
+    if HeldSeat.active().filter(conflicts).exclude(hold__user=order.user_id).exists():
+        raise SeatConflict()
+
+    _claim_flights(flights, Counter(flight_id for flight_id, _, _ in seats))
+    try:
+        tickets = Ticket.objects.bulk_create(
+            Ticket(order=order, **ticket_data) for ticket_data in tickets_data
+        )
+    except IntegrityError:
+        # Lost an insert race, the transaction cannot tell to which seats.
+        raise _seats_taken_error(tickets_data, range(len(tickets_data)))
+    HeldSeat.objects.filter(conflicts, hold__user=order.user_id).delete()
+    write_summaries(Order.objects.filter(pk=order.pk))
+
+    cache.invalidate_flights(flights)
+    return tickets
+
+
+@optimistic
+def place_order(tickets_data, **order_data):
+    """Create an order and book its tickets, see ``book_tickets``."""
+    order = Order.objects.create(**order_data)
+    book_tickets(order, tickets_data)
+    return order
+
+
+def hold_seats(user, flight, places, duration):
+    """
+    Hold free (row, seat) places of a flight for a user.
+
+    Expired holds of the flight are released first. Places that are sold
+    or held by another unexpired hold raise ``SeatConflict`` before
+    anything is written, and the unique constraint of ``HeldSeat`` turns
+    a lost race into the same error. Like ``book_tickets`` it moves the
+    row version of the flight and must run inside ``optimistic``.
+    """
+    SeatHold.release_expired(flight.pk)
+
+    conflicts = _seats_filter((flight.pk, row, seat) for row, seat in places)
+    if (
+        Ticket.objects.filter(conflicts).exists()
+        or HeldSeat.objects.filter(conflicts).exists()
+    ):
+        raise SeatConflict()
+
+    _claim_flights({flight.pk: [flight]}, Counter())
+    hold = SeatHold.objects.create(
+        user=user, flight=flight, expires_at=timezone.now() + duration
+    )
+    try:
+        HeldSeat.objects.bulk_create(
+            HeldSeat(hold=hold, flight=flight, row=row, seat=seat)
+            for row, seat in places
+        )
+    except IntegrityError:
+        raise SeatConflict()
+    return hold
+
+
+@optimistic
+def confirm_hold(hold):
+    """Buy the seats of an unexpired hold in a new order of its user."""
+    if hold.is_expired:
+        raise SeatConflict("The seat hold has expired.")
+    check_booking_open(hold.flight)
+
+    order = Order.objects.create(user=hold.user)
+    book_tickets(
+        order,
+        [
+            {"flight": hold.flight, "row": seat.row, "seat": seat.seat}
+            for seat in hold.seats.all()
+        ],
+    )
+    hold.delete()
+    return order
@@ -0,0 +1,130 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import APIException, ValidationError
+
+from flights.booking import check_booking_open, place_order
+from flights.exceptions import BookingConflict
+from flights.models import BookingRequest, Flight
+
+logger = logging.getLogger(__name__)
+
+
+def pending_flights():
+    """
+    Ids of every flight with pending booking requests, read from the
+    (status, flight, created_at) index, so that each pass of the workers
+    gives every flight a batch however long the queue of others is.
+    """
+    return list(
+        BookingRequest.objects.filter(status=BookingRequest.Status.PENDING)
+        .order_by("flight_id")
+        .values_list("flight_id", flat=True)
+        .distinct()
+    )
+
+
+def process_flight(flight_id, batch_size):
+    """
+    Book up to ``batch_size`` pending requests of a flight, oldest first.
+
+    The flight row and the requests are locked with SKIP LOCKED for the
+    whole batch, so concurrent workers take different flights instead of
+    queueing behind each other, and the batch shares one loaded flight
+    whose row version it keeps moving itself. Each request runs in its
+    own savepoint: one that raises an unexpected error fails alone and the
+    rest of the batch goes on. Returns how many requests were booked or
+    failed, requests left queued for another attempt are not counted.
+    """
+    with transaction.atomic():
+        flight = (
+            Flight.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("airplane")
+            .filter(pk=flight_id)
+            .first()
+        )
+        if flight is None:
+            return 0
+
+        booking_requests = list(
+            BookingRequest.objects.select_for_update(skip_locked=True)
+            .filter(status=BookingRequest.Status.PENDING, flight=flight)
+            .order_by("created_at")[:batch_size]
+        )
+        flights = {flight.pk: flight}
+        other_flight_ids = {
+            ticket["flight"]
+            for booking_request in booking_requests
+            for ticket in booking_request.tickets
+            # Malformed tickets fail their request in _book_request.
+            if isinstance(ticket, dict) and isinstance(ticket.get("flight"), int)
+        } - flights.keys()
+        flights.update(
+            Flight.objects.select_related("airplane").in_bulk(other_flight_ids)
+        )
+
+        handled = 0
+        for booking_request in booking_requests:
+            try:
+                with transaction.atomic():
+                    handled += _book_request(booking_request, flights)
+            except Exception as exc:
+                logger.exception("Booking request %s failed", booking_request.pk)
+                _fail_request(booking_request, exc)
+                handled += 1
+        return handled
+
+
+def process_queue(batch_size):
+    """Run one batch for every flight with pending requests."""
+    return sum(process_flight(flight_id, batch_size) for flight_id in pending_flights())
+
+
+def _book_request(booking_request, flights):
+    """Book or fail a request, returning False when it stays queued."""
+    try:
+        tickets_data = []
+        for ticket in booking_request.tickets:
+            flight = flights.get(ticket["flight"])
+            if flight is None:
+                raise ValidationError(
+                    {
+                        "flight": [
+                            f'Invalid pk "{ticket["flight"]}" - object does not exist.'
+                        ]
+                    }
+                )
+            check_booking_open(flight)
+            tickets_data.append(
+                {"flight": flight, "row": ticket["row"], "seat": ticket["seat"]}
+            )
+        order = place_order(tickets_data, user_id=booking_request.user_id)
+    except BookingConflict as exc:
+        # Lost to concurrent bookings on every retry, stays queued until
+        # it did so BOOKING_QUEUE_ATTEMPTS times.
+        booking_request.attempts += 1
+        if booking_request.attempts < settings.BOOKING_QUEUE_ATTEMPTS:
+            booking_request.save(update_fields=["attempts", "updated_at"])
+            return False
+        booking_request.status = BookingRequest.Status.FAILED
+        booking_request.errors = exc.detail
+    except APIException as exc:
+        booking_request.status = BookingRequest.Status.FAILED
+        booking_request.errors = exc.detail
+    else:
+        booking_request.status = BookingRequest.Status.BOOKED
+        booking_request.order = order
+    booking_request.save(
+        update_fields=["status", "order", "errors", "attempts", "updated_at"]
+    )
+    return True
+
+
+def _fail_request(booking_request, exc):
+    BookingRequest.objects.filter(pk=booking_request.pk).update(
+        status=BookingRequest.Status.FAILED,
+        errors={"detail": f"{type(exc).__name__}: {exc}"},
+        updated_at=timezone.now(),
+    )
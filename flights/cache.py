@@ -0,0 +1,113 @@
+"""
+Versioned read-through cache for flight responses.
+
+Cached entries are stored with the versions of everything they were
+built from, so writes never delete entries: they bump a version and the
+next read rebuilds the entry, while concurrent readers keep getting the
+previous one. Versions live in the same cache as the entries and start
+from the current time, which keeps them increasing after eviction.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+FLIGHT_LIST_VERSION = "flights"
+REFERENCE_VERSION = "reference"
+
+
+def get_cache():
+    return caches[settings.FLIGHTS_CACHE_ALIAS]
+
+
+def flight_version(flight_id):
+    return f"flight:{flight_id}"
+
+
+def _version_key(name):
+    return f"flights:version:{name}"
+
+
+def get_versions(*names):
+    cache = get_cache()
+    keys = [_version_key(name) for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*names):
+    cache = get_cache()
+    for name in names:
+        try:
+            cache.incr(_version_key(name))
+        except ValueError:
+            cache.add(_version_key(name), time.time_ns(), None)
+
+
+def invalidate(*names):
+    """
+    Bump versions now and again once the surrounding transaction commits,
+    so a read racing the transaction cannot cache pre-commit data under
+    the new version.
+    """
+    bump_versions(*names)
+    transaction.on_commit(lambda: bump_versions(*names))
+
+
+def invalidate_flights(flight_ids):
+    invalidate(
+        FLIGHT_LIST_VERSION, *(flight_version(flight_id) for flight_id in flight_ids)
+    )
+
+
+def make_key(prefix, *parts):
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f"flights:{prefix}:{digest}"
+
+
+def get_or_set(key, compute, cacheable=None, timeout=None, version=None):
+    """
+    Return the value cached for ``key`` at ``version`` or compute and store
+    it, unless ``cacheable`` rejects the computed value. ``timeout`` is
+    called before computing for the seconds the value stays fresh,
+    FLIGHTS_CACHE_TIMEOUT when it is None.
+
+    An entry goes stale when its version moves or its time is up, and
+    stays servable for FLIGHTS_CACHE_STALE_TIMEOUT seconds after that: the
+    first reader to see a stale entry takes a lock and recomputes it while
+    the others keep getting the stale value, so neither an expiring hot
+    key nor a write bumping its version sends every request to the
+    database.
+    """
+    cache = get_cache()
+    lock_key = f"{key}:lock"
+    locked = False
+    entry = cache.get(key)
+    if entry is not None:
+        entry_version, fresh_until, value = entry
+        if entry_version == version and fresh_until > time.time():
+            return value
+        locked = cache.add(lock_key, 1, settings.FLIGHTS_CACHE_STALE_TIMEOUT)
+        if not locked:
+            return value
+
+    try:
+        fresh_for = settings.FLIGHTS_CACHE_TIMEOUT if timeout is None else timeout()
+        value = compute()
+        if cacheable is None or cacheable(value):
+            cache.set(
+                key,
+                (version, time.time() + fresh_for, value),
+                fresh_for + settings.FLIGHTS_CACHE_STALE_TIMEOUT,
+            )
+    finally:
+        # Plain misses take no lock and must not release another reader's.
+        if locked:
+            cache.delete(lock_key)
+    return value
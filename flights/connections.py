@@ -0,0 +1,165 @@
+"""
+Multi-leg itinerary search over the route graph.
+
+The graph is an in-memory adjacency list of routes weighted by distance,
+rebuilt when the reference-data cache version moves (routes or airports
+changed). A search enumerates the shortest simple route paths between
+the two cities, then matches them against the flights of those routes
+read in one query over a bounded departure window.
+"""
+import heapq
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from flights import cache
+from flights.models import Flight, Route
+
+MAX_CONNECTION_TIME = timedelta(hours=24)
+MAX_PATHS = 50
+MAX_ITINERARIES = 20
+
+
+class RouteGraph:
+    def __init__(self, routes):
+        self.adjacency = defaultdict(list)
+        self.labels = {}
+        for (
+            route_id,
+            source_id,
+            destination_id,
+            distance,
+            source,
+            destination,
+        ) in routes:
+            self.adjacency[source_id].append((destination_id, route_id, distance))
+            self.labels[route_id] = f"{source}-{destination}"
+
+    def paths(self, source_ids, destination_ids, max_stops, limit=MAX_PATHS):
+        """
+        Up to ``limit`` simple paths from any source to any destination
+        airport with at most ``max_stops`` intermediate airports, shortest
+        total distance first. Returns (distance, [route ids]) pairs.
+        """
+        destination_ids = set(destination_ids)
+        queue = [(0, [source_id], []) for source_id in set(source_ids)]
+        heapq.heapify(queue)
+        paths = []
+        while queue and len(paths) < limit:
+            distance, airports, routes = heapq.heappop(queue)
+            if routes and airports[-1] in destination_ids:
+                paths.append((distance, routes))
+                continue
+            if len(routes) > max_stops:
+                continue
+            for destination_id, route_id, leg_distance in self.adjacency[airports[-1]]:
+                if destination_id not in airports:
+                    heapq.heappush(
+                        queue,
+                        (
+                            distance + leg_distance,
+                            airports + [destination_id],
+                            routes + [route_id],
+                        ),
+                    )
+        return paths
+
+
+_graph = (None, None)
+
+
+def get_route_graph():
+    global _graph
+    (version,) = cache.get_versions(cache.REFERENCE_VERSION)
+    if _graph[0] != version:
+        routes = Route.objects.order_by().values_list(
+            "id",
+            "source_id",
+            "destination_id",
+            "distance",
+            "source__name",
+            "destination__name",
+        )
+        _graph = (version, RouteGraph(routes))
+    return _graph[1]
+
+
+def find_connections(source_ids, destination_ids, date, max_stops, min_connection):
+    """
+    Itineraries leaving a source airport on ``date`` and reaching a
+    destination airport with at most ``max_stops`` connections, each
+    connection between ``min_connection`` and MAX_CONNECTION_TIME long.
+    Sorted by total duration.
+    """
+    graph = get_route_graph()
+    paths = graph.paths(source_ids, destination_ids, max_stops)
+    if not paths:
+        return []
+
+    start = timezone.make_aware(datetime.combine(date, time.min))
+    first_departure_end = start + timedelta(days=1)
+    window_end = first_departure_end + max_stops * MAX_CONNECTION_TIME
+
+    flights = defaultdict(list)
+    for flight in (
+        Flight.objects.filter(
+            route_id__in={route_id for _, routes in paths for route_id in routes},
+            departure_time__gte=start,
+            departure_time__lt=window_end,
+        )
+        .order_by("departure_time")
+        .values_list("id", "route_id", "departure_time", "arrival_time")
+    ):
+        flights[flight[1]].append(flight)
+    departures = {
+        route_id: [flight[2] for flight in route_flights]
+        for route_id, route_flights in flights.items()
+    }
+
+    itineraries = []
+
+    def extend(distance, routes, legs):
+        if len(legs) == len(routes):
+            itineraries.append(_itinerary(graph, distance, legs))
+            return
+        route_id = routes[len(legs)]
+        earliest = legs[-1][3] + min_connection
+        latest = legs[-1][3] + MAX_CONNECTION_TIME
+        index = bisect_left(departures.get(route_id, []), earliest)
+        for flight in flights[route_id][index:]:
+            if flight[2] > latest:
+                break
+            extend(distance, routes, legs + [flight])
+
+    for distance, routes in paths:
+        for flight in flights[routes[0]]:
+            if flight[2] >= first_departure_end:
+                break
+            extend(distance, routes, [flight])
+
+    itineraries.sort(
+        key=lambda itinerary: (itinerary["duration"], itinerary["departure_time"])
+    )
+    return itineraries[:MAX_ITINERARIES]
+
+
+def _itinerary(graph, distance, legs):
+    departure_time, arrival_time = legs[0][2], legs[-1][3]
+    return {
+        "departure_time": departure_time,
+        "arrival_time": arrival_time,
+        "duration": arrival_time - departure_time,
+        "stops": len(legs) - 1,
+        "distance": distance,
+        "legs": [
+            {
+                "flight": flight_id,
+                "route": graph.labels[route_id],
+                "departure_time": leg_departure,
+                "arrival_time": leg_arrival,
+            }
+            for flight_id, route_id, leg_departure, leg_arrival in legs
+        ],
+    }
@@ -0,0 +1,24 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class SeatConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the seats are already held or booked."
+    default_code = "seat_conflict"
+
+
+class BookingConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The flight was changed by a concurrent booking, try again."
+    default_code = "booking_conflict"
+
+
+class StaleFlight(Exception):
+    """A flight row version moved since the flight was loaded."""
+
+
+class IdempotencyKeyMismatch(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "The Idempotency-Key was already used with another request."
+    default_code = "idempotency_key_mismatch"
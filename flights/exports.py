@@ -0,0 +1,68 @@
+"""
+Order history export of a user, read with a server-side cursor.
+
+Orders and their tickets come from a single query on the order summaries
+in the order of the order list, fetched ORDER_EXPORT_CHUNK_SIZE rows at a
+time, so an export holds one chunk in memory however long the history is.
+"""
+from django.conf import settings
+from rest_framework import serializers
+
+from flights.models import OrderSummary
+from flights.summaries import TICKET_FIELDS
+
+CSV_FIELDS = (
+    "order",
+    "created_at",
+    "ticket",
+    "flight",
+    "route",
+    "departure_time",
+    "row",
+    "seat",
+)
+
+datetime_field = serializers.DateTimeField()
+
+
+def _datetime(value):
+    return None if value is None else datetime_field.to_representation(value)
+
+
+def order_history(user):
+    """
+    The user's orders newest first as dicts, each with its tickets and
+    the route and departure time of their flights.
+    """
+    rows = (
+        OrderSummary.objects.filter(user=user)
+        .order_by("-created_at", "pk")
+        .values_list("pk", "created_at", "tickets")
+        .iterator(chunk_size=settings.ORDER_EXPORT_CHUNK_SIZE)
+    )
+    for order_id, created_at, tickets in rows:
+        yield {
+            "id": order_id,
+            "created_at": _datetime(created_at),
+            "tickets": [
+                {field: ticket[field] for field in TICKET_FIELDS} for ticket in tickets
+            ],
+        }
+
+
+def ticket_rows(orders):
+    """One CSV_FIELDS row per ticket, with empty ticket fields for orders without."""
+    for order in orders:
+        prefix = {"order": order["id"], "created_at": order["created_at"]}
+        if not order["tickets"]:
+            yield prefix
+        for ticket in order["tickets"]:
+            yield {
+                **prefix,
+                "ticket": ticket["id"],
+                "flight": ticket["flight"],
+                "route": ticket["route"],
+                "departure_time": ticket["departure_time"],
+                "row": ticket["row"],
+                "seat": ticket["seat"],
+            }
@@ -0,0 +1,101 @@
+"""Helpers shared by the benchmark management commands."""
+import json
+import math
+import queue
+import threading
+import time
+
+from django.db import connections
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of ``values``, 0 when there are none."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def run_threads(tasks, worker, threads):
+    """
+    Call ``worker(task)`` for every task from ``threads`` threads.
+
+    Returns ``(elapsed seconds, [(latency seconds, result), ...])``. Each
+    thread closes its database connections when the tasks run out.
+    """
+    pending = queue.SimpleQueue()
+    for task in tasks:
+        pending.put(task)
+    results = []
+    lock = threading.Lock()
+
+    def run():
+        try:
+            while True:
+                try:
+                    task = pending.get_nowait()
+                except queue.Empty:
+                    return
+                started = time.perf_counter()
+                result = worker(task)
+                latency = time.perf_counter() - started
+                with lock:
+                    results.append((latency, result))
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=run) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - started, results
+
+
+def summarize(name, elapsed, latencies, **counts):
+    """Throughput and latency percentiles (in ms) of one benchmark run."""
+    return {
+        "name": name,
+        "requests": len(latencies),
+        **counts,
+        "seconds": round(elapsed, 3),
+        "per_second": round(len(latencies) / elapsed, 1) if elapsed else 0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0) * 1000, 2),
+    }
+
+
+def best_of(run, repeat):
+    """The result and the best time in seconds of ``repeat`` calls of ``run``."""
+    best = None
+    for _ in range(max(repeat, 1)):
+        started = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def write_report(stdout, rows, as_json=False):
+    """Write benchmark summaries as an aligned table or as JSON."""
+    if as_json:
+        stdout.write(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        return
+    columns = list(rows[0])
+    widths = {
+        column: max(len(column), *(len(str(row.get(column, ""))) for row in rows))
+        for column in columns
+    }
+    stdout.write("  ".join(column.rjust(widths[column]) for column in columns))
+    for row in rows:
+        stdout.write(
+            "  ".join(
+                str(row.get(column, "")).rjust(widths[column]) for column in columns
+            )
+        )
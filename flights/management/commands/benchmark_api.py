@@ -0,0 +1,283 @@
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from flights.management.commands._benchmark import percentile, write_report
+from flights.models import Airplane, Airport, Flight, Order, Route
+
+BENCHMARK_ADMIN_EMAIL = "benchmark-admin@dataset.local"
+SAMPLES = 50
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Exercise every API endpoint in-process against the current database "
+        "and report latency percentiles, query counts and response sizes. "
+        "Writes are rolled back. Throttling is disabled while it runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--with-cache",
+            action="store_true",
+            help="Keep the flight response cache enabled",
+        )
+        parser.add_argument("--only", action="append", help="Run matching scenarios")
+        parser.add_argument("--output", help="Save the results as JSON")
+        parser.add_argument("--baseline", help="Compare with a saved JSON run")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        if not Flight.objects.exists():
+            raise CommandError("No flights, run generate_dataset first")
+
+        self.rng = random.Random(options["seed"])
+        order = self.sample(Order)
+        self.customer = order.user if order else get_user_model().objects.first()
+        self.admin, admin_created = get_user_model().objects.get_or_create(
+            email=BENCHMARK_ADMIN_EMAIL, defaults={"is_staff": True}
+        )
+
+        settings_overrides = {"ALLOWED_HOSTS": ["testserver"]}
+        if not options["with_cache"]:
+            settings_overrides["FLIGHTS_CACHE_TIMEOUT"] = 0
+        try:
+            with override_settings(**settings_overrides), mock.patch.object(
+                APIView, "throttle_classes", ()
+            ):
+                results = [
+                    self.run_scenario(name, method, url, data, user, options)
+                    for name, method, url, data, user in self.scenarios()
+                    if not options["only"]
+                    or any(pattern in name for pattern in options["only"])
+                ]
+        finally:
+            if admin_created:
+                self.admin.delete()
+
+        if options["baseline"]:
+            self.compare(results, options["baseline"])
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                json.dump(
+                    {
+                        "created_at": datetime.now(dt_timezone.utc).isoformat(),
+                        "vendor": connection.vendor,
+                        "counts": {
+                            model.__name__: model.objects.count()
+                            for model in (Airport, Route, Flight, Order)
+                        },
+                        "results": results,
+                    },
+                    output,
+                    indent=2,
+                )
+        write_report(self.stdout, results, as_json=options["json"])
+
+    def sample(self, model):
+        """A random row of a model, found through its primary key range."""
+        bounds = model.objects.order_by("pk").values_list("pk", flat=True)
+        first, last = bounds.first(), bounds.last()
+        if first is None:
+            return None
+        return model.objects.filter(pk__gte=self.rng.randint(first, last)).first()
+
+    def scenarios(self):
+        """(name, method, url, data, user) for every viewset action."""
+        flight = self.sample(Flight)
+        route = self.sample(Route)
+        airport = self.sample(Airport)
+        city = airport.closest_big_city[:3]
+        date = flight.departure_time.date().isoformat()
+        customer, admin = self.customer, self.admin
+        free_seat = self.free_seat(flight)
+        ticket = {"flight": flight.pk, **free_seat}
+
+        return [
+            ("airports.list", "get", reverse("flights:airport-list"), None, customer),
+            (
+                "airports.list?city",
+                "get",
+                reverse("flights:airport-list"),
+                {"city": city},
+                customer,
+            ),
+            (
+                "airports.retrieve",
+                "get",
+                reverse("flights:airport-detail", args=[airport.pk]),
+                None,
+                customer,
+            ),
+            ("routes.list", "get", reverse("flights:route-list"), None, customer),
+            (
+                "routes.list?source",
+                "get",
+                reverse("flights:route-list"),
+                {"source": city},
+                customer,
+            ),
+            (
+                "routes.retrieve",
+                "get",
+                reverse("flights:route-detail", args=[route.pk]),
+                None,
+                customer,
+            ),
+            ("airplanes.list", "get", reverse("flights:airplane-list"), None, customer),
+            (
+                "airplane_types.list",
+                "get",
+                reverse("flights:airplanetype-list"),
+                None,
+                admin,
+            ),
+            ("crews.list", "get", reverse("flights:crew-list"), None, admin),
+            ("flights.list", "get", reverse("flights:flight-list"), None, customer),
+            (
+                "flights.list?cursor",
+                "get",
+                reverse("flights:flight-list"),
+                {"pagination": "cursor"},
+                customer,
+            ),
+            (
+                "flights.list?source&date",
+                "get",
+                reverse("flights:flight-list"),
+                {"source": flight.route.source.closest_big_city, "date": date},
+                customer,
+            ),
+            (
+                "flights.retrieve",
+                "get",
+                reverse("flights:flight-detail", args=[flight.pk]),
+                None,
+                customer,
+            ),
+            (
+                "flights.seatmap",
+                "get",
+                reverse("flights:flight-seatmap", args=[flight.pk]),
+                None,
+                customer,
+            ),
+            (
+                "connections.list",
+                "get",
+                reverse("flights:connection-list"),
+                {
+                    "source": flight.route.source.closest_big_city,
+                    "destination": flight.route.destination.closest_big_city,
+                    "date": date,
+                },
+                customer,
+            ),
+            ("orders.list", "get", reverse("flights:order-list"), None, customer),
+            (
+                "orders.list?cursor",
+                "get",
+                reverse("flights:order-list"),
+                {"pagination": "cursor"},
+                customer,
+            ),
+            (
+                "orders.create",
+                "post",
+                reverse("flights:order-list"),
+                {"tickets": [ticket]},
+                customer,
+            ),
+            (
+                "holds.create",
+                "post",
+                reverse("flights:seathold-list"),
+                {"flight": flight.pk, "seats": [free_seat]},
+                customer,
+            ),
+        ]
+
+    def free_seat(self, flight):
+        taken = set(flight.tickets.values_list("row", "seat"))
+        airplane = Airplane.objects.get(pk=flight.airplane_id)
+        for row in range(1, airplane.rows + 1):
+            for seat in range(1, airplane.seats_in_row + 1):
+                if (row, seat) not in taken:
+                    return {"row": row, "seat": seat}
+        return {"row": 1, "seat": 1}
+
+    def run_scenario(self, name, method, url, data, user, options):
+        client = APIClient()
+        client.force_authenticate(user)
+        latencies, queries, sizes, statuses = [], [], [], set()
+
+        for attempt in range(options["warmup"] + options["repeat"]):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = self.request(client, method, url, data)
+                latency = time.perf_counter() - started
+            if attempt < options["warmup"]:
+                continue
+            latencies.append(latency)
+            queries.append(len(captured))
+            sizes.append(len(response.content))
+            statuses.add(response.status_code)
+
+        return {
+            "name": name,
+            "status": ",".join(str(code) for code in sorted(statuses)),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "queries": max(queries),
+            "bytes": round(statistics.mean(sizes)),
+        }
+
+    def request(self, client, method, url, data):
+        if method == "get":
+            return client.get(url, data)
+        # Writes run in a transaction that is always rolled back.
+        response = None
+        try:
+            with transaction.atomic():
+                response = client.generic(
+                    method.upper(),
+                    url,
+                    json.dumps(data),
+                    content_type="application/json",
+                )
+                raise Rollback
+        except Rollback:
+            return response
+
+    def compare(self, results, baseline_path):
+        with open(baseline_path, encoding="utf-8") as source:
+            baseline = {row["name"]: row for row in json.load(source)["results"]}
+        for row in results:
+            before = baseline.get(row["name"])
+            if before is None:
+                continue
+            row["p50_change"] = (
+                f"{(row['p50_ms'] - before['p50_ms']) / before['p50_ms']:+.0%}"
+                if before["p50_ms"]
+                else ""
+            )
+            row["queries_change"] = f"{row['queries'] - before['queries']:+d}"
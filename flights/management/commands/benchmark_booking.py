@@ -0,0 +1,155 @@
+import random
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from flights.booking import place_order
+from flights.management.commands._benchmark import (
+    run_threads,
+    summarize,
+    write_report,
+)
+from flights.models import Airplane, AirplaneType, Airport, Flight, Order, Route, Ticket
+
+BENCHMARK_EMAIL = "booking-benchmark@airport.local"
+
+
+def book_legacy(user, flight_id, places):
+    """The booking path before row versions: one validated save per ticket."""
+    flight = Flight.objects.select_related("airplane").get(pk=flight_id)
+    with transaction.atomic():
+        order = Order.objects.create(user=user)
+        for row, seat in places:
+            Ticket.objects.create(order=order, flight=flight, row=row, seat=seat)
+
+
+def book_optimistic(user, flight_id, places):
+    flight = Flight.objects.select_related("airplane").get(pk=flight_id)
+
+    place_order(
+        [{"flight": flight, "row": row, "seat": seat} for row, seat in places],
+        user=user,
+    )
+
+
+PATHS = {"legacy": book_legacy, "optimistic": book_optimistic}
+
+
+class Command(BaseCommand):
+    help = (
+        "Book seats on a few hot flights from many threads through the legacy "
+        "and the optimistic booking paths and report throughput and latency. "
+        "Creates its own flights and removes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--orders", type=int, default=400)
+        parser.add_argument("--flights", type=int, default=3)
+        parser.add_argument("--seats", type=int, default=2, help="Seats per order")
+        parser.add_argument("--rows", type=int, default=30)
+        parser.add_argument("--seats-in-row", type=int, default=6)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--path", choices=sorted(PATHS), action="append", dest="paths"
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        # Rows that already existed are reused and kept, only the rows
+        # created here are deleted at the end.
+        created = []
+        user = self.get_or_create(created, get_user_model(), email=BENCHMARK_EMAIL)
+        source = self.get_or_create(
+            created,
+            Airport,
+            name="Benchmark source",
+            defaults={"closest_big_city": "Benchmark"},
+        )
+        destination = self.get_or_create(
+            created,
+            Airport,
+            name="Benchmark destination",
+            defaults={"closest_big_city": "Benchmark"},
+        )
+        airplane_type = self.get_or_create(created, AirplaneType, name="Benchmark")
+        airplane = Airplane.objects.create(
+            name="Benchmark",
+            rows=options["rows"],
+            seats_in_row=options["seats_in_row"],
+            airplane_type=airplane_type,
+        )
+        route = Route.objects.create(
+            source=source, destination=destination, distance=1000
+        )
+
+        report = []
+        try:
+            for name in options["paths"] or sorted(PATHS):
+                report.append(self.run_path(name, user, route, airplane, options))
+        finally:
+            Order.objects.filter(
+                pk__in=Order.objects.filter(tickets__flight__route=route).values("pk")
+            ).delete()
+            route.delete()
+            airplane.delete()
+            for obj in reversed(created):
+                obj.delete()
+
+        write_report(self.stdout, report, as_json=options["json"])
+
+    @staticmethod
+    def get_or_create(created, model, **kwargs):
+        obj, is_new = model.objects.get_or_create(**kwargs)
+        if is_new:
+            created.append(obj)
+        return obj
+
+    def run_path(self, name, user, route, airplane, options):
+        departure_time = timezone.now() + timezone.timedelta(days=30)
+        flight_ids = [
+            Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=departure_time,
+                arrival_time=departure_time + timezone.timedelta(hours=2),
+            ).pk
+            for _ in range(options["flights"])
+        ]
+        rng = random.Random(options["seed"])
+        places = [
+            (row, seat)
+            for row in range(1, airplane.rows + 1)
+            for seat in range(1, airplane.seats_in_row + 1)
+        ]
+        tasks = [
+            (rng.choice(flight_ids), rng.sample(places, options["seats"]))
+            for _ in range(options["orders"])
+        ]
+        book = PATHS[name]
+
+        def worker(task):
+            flight_id, order_places = task
+            try:
+                book(user, flight_id, order_places)
+            except (IntegrityError, ValidationError, APIException):
+                return "conflicts"
+            except DatabaseError:
+                return "errors"
+            return "booked"
+
+        elapsed, results = run_threads(tasks, worker, options["threads"])
+        outcomes = Counter(result for _, result in results)
+        return summarize(
+            name,
+            elapsed,
+            [latency for latency, _ in results],
+            booked=outcomes["booked"],
+            conflicts=outcomes["conflicts"],
+            errors=outcomes["errors"],
+        )
@@ -0,0 +1,85 @@
+from collections import Counter
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from flights.management.commands._benchmark import (
+    run_threads,
+    summarize,
+    write_report,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Send concurrent GET requests to running servers and compare their "
+        "throughput and latency, e.g. the sync flight list under a WSGI server "
+        "against the async one under an ASGI server:\n"
+        "  --target wsgi=http://127.0.0.1:8000/api/flights/flights/\n"
+        "  --target asgi=http://127.0.0.1:8001/api/flights/async/flights/\n"
+        "The servers should run with throttling disabled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            action="append",
+            required=True,
+            metavar="NAME=URL",
+            help="Endpoint to benchmark, may be repeated",
+        )
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--timeout", type=float, default=30)
+        auth = parser.add_mutually_exclusive_group()
+        auth.add_argument("--token", help="JWT access token to send")
+        auth.add_argument("--user", help="Email of a user to mint a token for")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options["target"]:
+            name, separator, url = target.partition("=")
+            if not separator or not url:
+                raise CommandError(f"Expected NAME=URL, got {target!r}")
+            targets.append((name, url))
+
+        headers = {"Accept": "application/json"}
+        token = options["token"]
+        if options["user"]:
+            user = get_user_model().objects.get(email=options["user"])
+            token = str(AccessToken.for_user(user))
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        def fetch(url):
+            try:
+                with urlopen(
+                    Request(url, headers=headers), timeout=options["timeout"]
+                ) as response:
+                    response.read()
+                    return response.status
+            except HTTPError as error:
+                return error.code
+            except (URLError, OSError):
+                return "error"
+
+        report = []
+        for name, url in targets:
+            elapsed, results = run_threads(
+                [url] * options["requests"], fetch, options["concurrency"]
+            )
+            statuses = Counter(result for _, result in results)
+            report.append(
+                summarize(
+                    name,
+                    elapsed,
+                    [latency for latency, _ in results],
+                    ok=statuses[200],
+                    failed=sum(statuses.values()) - statuses[200],
+                )
+            )
+        write_report(self.stdout, report, as_json=options["json"])
@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from flights.management.commands._benchmark import best_of, write_report
+from flights.models import OrderSummary
+from flights.renderers import MessagePackRenderer, ORJSONRenderer
+from flights.serializers import FlightListSerializer, OrderSummarySerializer
+from flights.views import FlightViewSet
+
+
+def flight_page(rows):
+    view = FlightViewSet(
+        action="list",
+        request=Request(APIRequestFactory().get("/")),
+        format_kwarg=None,
+        args=(),
+        kwargs={},
+    )
+    flights = view.get_queryset()[:rows]
+    return FlightListSerializer(flights, many=True).data
+
+
+def order_page(rows):
+    orders = OrderSummary.objects.select_related("user")[:rows]
+    return OrderSummarySerializer(orders, many=True).data
+
+
+PAGES = {
+    "flights": flight_page,
+    "orders": order_page,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the time to render large flight and order pages with DRF's "
+        "JSONRenderer, the orjson renderer and the MessagePack renderer, and "
+        "check that both JSON renderers write the same bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--only", choices=sorted(PAGES), action="append")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        report = []
+        for name in options["only"] or PAGES:
+            results = PAGES[name](options["rows"])
+            if not results:
+                raise CommandError(f"No {name} to render, run generate_dataset")
+            page = {
+                "count": len(results),
+                "next": None,
+                "previous": None,
+                "results": results,
+            }
+
+            rendered = {}
+            timings = {}
+            for renderer_name, renderer in (
+                ("drf_json", JSONRenderer()),
+                ("orjson", ORJSONRenderer()),
+                ("msgpack", MessagePackRenderer()),
+            ):
+                rendered[renderer_name], timings[renderer_name] = best_of(
+                    lambda: renderer.render(page), options["repeat"]
+                )
+            if rendered["orjson"] != rendered["drf_json"]:
+                raise CommandError(f"{name}: orjson output differs")
+
+            report.append(
+                {
+                    "name": name,
+                    "rows": len(results),
+                    "json_bytes": len(rendered["drf_json"]),
+                    "msgpack_bytes": len(rendered["msgpack"]),
+                    **{
+                        f"{renderer_name}_ms": round(seconds * 1000, 2)
+                        for renderer_name, seconds in timings.items()
+                    },
+                    "orjson_speedup": (
+                        f"{timings['drf_json'] / timings['orjson']:.2f}x"
+                    ),
+                    "msgpack_speedup": (
+                        f"{timings['drf_json'] / timings['msgpack']:.2f}x"
+                    ),
+                }
+            )
+        write_report(self.stdout, report, as_json=options["json"])
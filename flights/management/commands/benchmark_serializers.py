@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from flights.management.commands._benchmark import best_of, write_report
+from flights.views import AirplaneViewSet, FlightViewSet, RouteViewSet
+
+VIEWSETS = {
+    "flights": FlightViewSet,
+    "routes": RouteViewSet,
+    "airplanes": AirplaneViewSet,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows per second of the regular list serializers and of "
+        "their values() counterparts over rows of the current database, "
+        "queries included, and check that both render the same JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--only", choices=sorted(VIEWSETS), action="append")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        report = []
+        for name in options["only"] or VIEWSETS:
+            view = VIEWSETS[name](
+                action="list",
+                request=Request(APIRequestFactory().get("/")),
+                format_kwarg=None,
+                args=(),
+                kwargs={},
+            )
+            queryset = view.filter_queryset(view.get_queryset())
+            serializer_class = view.get_serializer_class()
+            values_serializer = view.values_serializer_class()
+            values_queryset = values_serializer.get_queryset(queryset)
+            limit = options["rows"]
+
+            regular, regular_time = best_of(
+                lambda: serializer_class(queryset[:limit], many=True).data,
+                options["repeat"],
+            )
+            fast, fast_time = best_of(
+                lambda: values_serializer.to_representation(values_queryset[:limit]),
+                options["repeat"],
+            )
+            if JSONRenderer().render(regular) != JSONRenderer().render(fast):
+                raise CommandError(f"{name}: values() output differs")
+
+            rows = len(regular)
+            if not rows:
+                raise CommandError(f"No {name} to serialize, run generate_dataset")
+            report.append(
+                {
+                    "name": name,
+                    "rows": rows,
+                    "regular_rows_per_s": round(rows / regular_time),
+                    "values_rows_per_s": round(rows / fast_time),
+                    "speedup": f"{regular_time / fast_time:.2f}x",
+                }
+            )
+        write_report(self.stdout, report, as_json=options["json"])
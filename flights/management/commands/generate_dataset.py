@@ -0,0 +1,337 @@
+import math
+import random
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from flights import cache
+from flights.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+from flights.search import normalize_city
+from flights.summaries import summarize_orders
+
+PROFILES = {
+    "small": {
+        "airports": 1_000,
+        "routes": 5_000,
+        "airplane_types": 20,
+        "airplanes": 500,
+        "crew": 5_000,
+        "users": 5_000,
+        "flights": 50_000,
+        "tickets": 1_000_000,
+    },
+    "large": {
+        "airports": 10_000,
+        "routes": 60_000,
+        "airplane_types": 60,
+        "airplanes": 5_000,
+        "crew": 50_000,
+        "users": 500_000,
+        "flights": 1_000_000,
+        "tickets": 50_000_000,
+    },
+}
+SYLLABLES = (
+    "ba dan el fa gor ha is ka lon ma nor os pa ri sa ta ur va wen yo "
+    "zu ber cas del fen gra hol jo kir lis mon nev por qui ros sel tor"
+).split()
+ACCENTED = {"a": "á", "e": "é", "o": "ö", "u": "ü", "i": "í", "c": "ç"}
+AIRPORT_KINDS = ("International", "Regional", "Field", "Airport", "Skyport")
+AIRPLANE_MAKERS = ("Airbus", "Boeing", "Embraer", "Bombardier", "ATR", "Comac")
+FIRST_NAMES = "Anna Ben Chloe David Emma Felix Grace Hugo Iris Jonas Kira Liam".split()
+LAST_NAMES = "Adler Brown Costa Dubois Evans Fischer Garcia Hansen Ito Jensen".split()
+CRUISE_SPEED = 800
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with seeded synthetic airports, routes, airplanes, "
+        "crew, users, flights, orders and tickets. Rows are added next to the "
+        "existing ones in batches with bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profile", choices=sorted(PROFILES), default="small")
+        for name in PROFILES["small"]:
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=int,
+                help=f"Number of {name.replace('_', ' ')} (default from profile)",
+            )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        counts = {
+            name: options[name] if options[name] is not None else default
+            for name, default in PROFILES[options["profile"]].items()
+        }
+        started = time.perf_counter()
+
+        airports = self.timed("airports", self.generate_airports, counts["airports"])
+        self.timed("routes", self.generate_routes, counts["routes"], airports)
+        self.timed(
+            "airplanes",
+            self.generate_airplanes,
+            counts["airplane_types"],
+            counts["airplanes"],
+        )
+        self.timed("crew", self.generate_crew, counts["crew"])
+        self.timed("users", self.generate_users, counts["users"])
+        with generated_timestamps(Order, "created_at"):
+            self.timed(
+                "flights", self.generate_flights, counts["flights"], counts["tickets"]
+            )
+
+        cache.invalidate(cache.REFERENCE_VERSION, cache.FLIGHT_LIST_VERSION)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated dataset in {time.perf_counter() - started:.1f}s"
+            )
+        )
+
+    def timed(self, name, generate, *args):
+        started = time.perf_counter()
+        result = generate(*args)
+        elapsed = time.perf_counter() - started
+        count = len(result) if isinstance(result, (list, dict)) else result
+        self.stdout.write(
+            f"{name}: {count} rows in {elapsed:.1f}s "
+            f"({count / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+        return result
+
+    def bulk_create(self, model, objs):
+        return model.objects.bulk_create(objs, batch_size=self.batch_size)
+
+    def city_name(self):
+        name = "".join(
+            self.rng.choice(SYLLABLES) for _ in range(self.rng.randint(2, 3))
+        )
+        if self.rng.random() < 0.15:
+            position = self.rng.randrange(len(name))
+            name = (
+                name[:position]
+                + ACCENTED.get(name[position], name[position])
+                + name[position + 1 :]
+            )
+        if self.rng.random() < 0.1:
+            name += " " + self.rng.choice(SYLLABLES)
+        return name.title()
+
+    def generate_airports(self, count):
+        """Airports grouped in cities; returns {airport id: (lat, lon)}."""
+        offset = Airport.objects.count()
+        airports = []
+        coordinates = []
+        while len(airports) < count:
+            city = self.city_name()
+            lat, lon = self.rng.uniform(-60, 70), self.rng.uniform(-180, 180)
+            for _ in range(
+                min(self.rng.choice((1, 1, 1, 2, 3)), count - len(airports))
+            ):
+                number = offset + len(airports) + 1
+                airports.append(
+                    Airport(
+                        name=f"{city} {self.rng.choice(AIRPORT_KINDS)} {number}",
+                        closest_big_city=city,
+                        city_key=normalize_city(city),
+                    )
+                )
+                coordinates.append(
+                    (
+                        lat + self.rng.uniform(-0.5, 0.5),
+                        lon + self.rng.uniform(-0.5, 0.5),
+                    )
+                )
+        airports = self.bulk_create(Airport, airports)
+        return {airport.pk: point for airport, point in zip(airports, coordinates)}
+
+    def generate_routes(self, count, airports):
+        airport_ids = list(airports)
+        pairs = set(Route.objects.values_list("source_id", "destination_id"))
+        routes = []
+        attempts = 0
+        while len(routes) < count and attempts < count * 10:
+            attempts += 1
+            source, destination = self.rng.sample(airport_ids, 2)
+            if (source, destination) in pairs:
+                continue
+            pairs.add((source, destination))
+            routes.append(
+                Route(
+                    source_id=source,
+                    destination_id=destination,
+                    distance=distance(airports[source], airports[destination]),
+                )
+            )
+        return self.bulk_create(Route, routes)
+
+    def generate_airplanes(self, types_count, count):
+        offset = AirplaneType.objects.count()
+        airplane_types = self.bulk_create(
+            AirplaneType,
+            [
+                AirplaneType(
+                    name=f"{self.rng.choice(AIRPLANE_MAKERS)} {100 + offset + number}"
+                )
+                for number in range(types_count)
+            ],
+        )
+        airplanes = []
+        for number in range(count):
+            airplane_type = self.rng.choice(airplane_types)
+            airplanes.append(
+                Airplane(
+                    name=f"{airplane_type.name}-{number + 1:05d}",
+                    rows=self.rng.randint(15, 60),
+                    seats_in_row=self.rng.choice((4, 4, 6, 6, 6, 8, 10)),
+                    airplane_type=airplane_type,
+                )
+            )
+        return self.bulk_create(Airplane, airplanes)
+
+    def generate_crew(self, count):
+        return self.bulk_create(
+            Crew,
+            [
+                Crew(
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                )
+                for _ in range(count)
+            ],
+        )
+
+    def generate_users(self, count):
+        offset = get_user_model().objects.count()
+        password = make_password("dataset-password")
+        return self.bulk_create(
+            get_user_model(),
+            [
+                get_user_model()(
+                    email=f"user{offset + number + 1}@dataset.local",
+                    password=password,
+                )
+                for number in range(count)
+            ],
+        )
+
+    def generate_flights(self, count, tickets_count):
+        """Flights with crew, orders and tickets, one batch of flights at a time."""
+        routes = list(Route.objects.values_list("id", "distance"))
+        airplanes = list(Airplane.objects.values_list("id", "rows", "seats_in_row"))
+        crew_ids = list(Crew.objects.values_list("id", flat=True))
+        user_ids = list(get_user_model().objects.values_list("id", flat=True))
+        tickets_per_flight = tickets_count / count if count else 0
+        now = timezone.now()
+        created = 0
+
+        while created < count:
+            size = min(self.batch_size, count - created)
+            flights, seat_plans = [], []
+            for _ in range(size):
+                route_id, route_distance = self.rng.choice(routes)
+                airplane_id, rows, seats_in_row = self.rng.choice(airplanes)
+                departure_time = now + timezone.timedelta(
+                    minutes=self.rng.randint(-30 * 24 * 60, 180 * 24 * 60)
+                )
+                duration = timezone.timedelta(hours=route_distance / CRUISE_SPEED + 0.5)
+                capacity = rows * seats_in_row
+                taken = min(
+                    capacity, round(self.rng.expovariate(1) * tickets_per_flight)
+                )
+                flights.append(
+                    Flight(
+                        route_id=route_id,
+                        airplane_id=airplane_id,
+                        departure_time=departure_time,
+                        arrival_time=departure_time + duration,
+                        seats_taken=taken,
+                    )
+                )
+                seat_plans.append(
+                    [
+                        divmod(place, seats_in_row)
+                        for place in self.rng.sample(range(capacity), taken)
+                    ]
+                )
+
+            with transaction.atomic():
+                flights = Flight.objects.bulk_create(flights)
+                Flight.crew.through.objects.bulk_create(
+                    (
+                        Flight.crew.through(flight_id=flight.pk, crew_id=crew_id)
+                        for flight in flights
+                        for crew_id in self.rng.sample(
+                            crew_ids, min(len(crew_ids), self.rng.randint(2, 5))
+                        )
+                    ),
+                    batch_size=self.batch_size,
+                )
+                self.generate_tickets(flights, seat_plans, user_ids)
+            created += size
+        return created
+
+    def generate_tickets(self, flights, seat_plans, user_ids):
+        orders, order_seats = [], []
+        for flight, seats in zip(flights, seat_plans):
+            while seats:
+                size = self.rng.randint(1, 4)
+                orders.append(
+                    Order(
+                        user_id=self.rng.choice(user_ids),
+                        created_at=flight.departure_time
+                        - timezone.timedelta(hours=self.rng.randint(4, 24 * 90)),
+                    )
+                )
+                order_seats.append((flight.pk, seats[:size]))
+                seats = seats[size:]
+
+        orders = self.bulk_create(Order, orders)
+        self.bulk_create(
+            Ticket,
+            [
+                Ticket(order=order, flight_id=flight_id, row=row + 1, seat=seat + 1)
+                for order, (flight_id, seats) in zip(orders, order_seats)
+                for row, seat in seats
+            ],
+        )
+        summarize_orders(Order.objects.filter(pk__in=[order.pk for order in orders]))
+
+
+@contextmanager
+def generated_timestamps(model, field_name):
+    """Let bulk_create keep the given values of an auto_now_add field."""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def distance(source, destination):
+    """Great-circle distance in km between two (lat, lon) points."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (*source, *destination))
+    hav = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return max(round(2 * 6371 * math.asin(math.sqrt(hav))), 50)
@@ -0,0 +1,235 @@
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from flights import cache
+from flights.models import Airplane, Airport, Crew, Flight, Route
+
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+SHOWN_REJECTS = 20
+
+
+class RowError(ValueError):
+    pass
+
+
+class Lookups:
+    """In-memory id tables for resolving the references of schedule rows."""
+
+    def __init__(self):
+        self.airports = dict(Airport.objects.values_list("name", "id"))
+        self.route_ids = set()
+        self.routes = {}
+        for route_id, source_id, destination_id in Route.objects.order_by(
+            "id"
+        ).values_list("id", "source_id", "destination_id"):
+            self.route_ids.add(route_id)
+            self.routes.setdefault((source_id, destination_id), route_id)
+        self.airplane_ids = set()
+        self.airplane_names = {}
+        for airplane_id, name in Airplane.objects.values_list("id", "name"):
+            self.airplane_ids.add(airplane_id)
+            # Airplane names are not unique, ambiguous ones resolve to None.
+            self.airplane_names[name] = (
+                None if name in self.airplane_names else airplane_id
+            )
+        self.crew_ids = set()
+        self.crew_names = {}
+        for crew_id, first_name, last_name in Crew.objects.values_list(
+            "id", "first_name", "last_name"
+        ):
+            self.crew_ids.add(crew_id)
+            name = f"{first_name} {last_name}".casefold()
+            self.crew_names[name] = None if name in self.crew_names else crew_id
+
+    def route(self, row):
+        if row.get("route") not in (None, ""):
+            route_id = self._int(row["route"], "route")
+            if route_id not in self.route_ids:
+                raise RowError(f"Unknown route {route_id}")
+            return route_id
+
+        source = self.airports.get(row.get("source"))
+        destination = self.airports.get(row.get("destination"))
+        if source is None or destination is None:
+            raise RowError(
+                f"Unknown airport in {row.get('source')!r} -> "
+                f"{row.get('destination')!r}"
+            )
+        route_id = self.routes.get((source, destination))
+        if route_id is None:
+            raise RowError(
+                f"No route {row.get('source')!r} -> {row.get('destination')!r}"
+            )
+        return route_id
+
+    def airplane(self, value):
+        value = str(value if value is not None else "").strip()
+        if value.isdigit() and int(value) in self.airplane_ids:
+            return int(value)
+        airplane_id = self.airplane_names.get(value)
+        if airplane_id is None:
+            raise RowError(f"Unknown or ambiguous airplane {value!r}")
+        return airplane_id
+
+    def crew(self, value):
+        if isinstance(value, str):
+            value = [member for member in value.split(";") if member.strip()]
+        crew_ids = set()
+        for member in value or []:
+            member = str(member).strip()
+            if member.isdigit() and int(member) in self.crew_ids:
+                crew_ids.add(int(member))
+                continue
+            crew_id = self.crew_names.get(" ".join(member.split()).casefold())
+            if crew_id is None:
+                raise RowError(f"Unknown or ambiguous crew member {member!r}")
+            crew_ids.add(crew_id)
+        return crew_ids
+
+    @staticmethod
+    def _int(value, name):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise RowError(f"Invalid {name} {value!r}")
+
+
+def parse_time(row, name):
+    value = row.get(name)
+    moment = parse_datetime(str(value)) if value else None
+    if moment is None:
+        raise RowError(f"Invalid {name} {value!r}")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def read_rows(path, file_format):
+    """Yield ``(line number, row dict)`` pairs without loading the file."""
+    with open(path, newline="", encoding="utf-8") as source:
+        if file_format == "csv":
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                row = error
+            yield line_number, row
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a flight schedule from a CSV or NDJSON file in chunks. Rows "
+        "name a route (id, or source and destination airport names), an "
+        "airplane (id or name), departure_time, arrival_time and crew "
+        '(ids or "First Last" names, separated by ";" in CSV).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=sorted(set(FORMATS.values())))
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--rejects", help="Write rejected rows as NDJSON to this file"
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Validate without inserting"
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        file_format = options["format"] or FORMATS.get(path.suffix.lower())
+        if file_format is None:
+            raise CommandError("Unknown file format, pass --format")
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+
+        started = time.perf_counter()
+        lookups = Lookups()
+        earliest_departure = timezone.now() + timezone.timedelta(days=1)
+        rows = read_rows(path, file_format)
+        imported = read = 0
+        rejects = []
+
+        while chunk := list(islice(rows, options["chunk_size"])):
+            read += len(chunk)
+            flights, crews = [], []
+            for line_number, row in chunk:
+                try:
+                    flight, crew_ids = self.build_flight(
+                        row, lookups, earliest_departure
+                    )
+                except RowError as error:
+                    rejects.append({"line": line_number, "error": str(error)})
+                    continue
+                flights.append(flight)
+                crews.append(crew_ids)
+
+            if flights and not options["dry_run"]:
+                self.insert_chunk(flights, crews)
+            imported += len(flights)
+
+        if imported and not options["dry_run"]:
+            cache.invalidate(cache.FLIGHT_LIST_VERSION)
+
+        elapsed = time.perf_counter() - started
+        self.report_rejects(rejects, options["rejects"])
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {imported} of {read} rows, rejected {len(rejects)} "
+                f"in {elapsed:.2f}s ({read / elapsed if elapsed else 0:.0f} rows/s)"
+            )
+        )
+
+    def build_flight(self, row, lookups, earliest_departure):
+        if not isinstance(row, dict):
+            raise RowError(f"Invalid row: {row}")
+        departure_time = parse_time(row, "departure_time")
+        arrival_time = parse_time(row, "arrival_time")
+        if departure_time < earliest_departure:
+            raise RowError(
+                "Flights must be created no later than a day before departure"
+            )
+        if arrival_time <= departure_time:
+            raise RowError("Arrival time must be later than departure time.")
+
+        flight = Flight(
+            route_id=lookups.route(row),
+            airplane_id=lookups.airplane(row.get("airplane")),
+            departure_time=departure_time,
+            arrival_time=arrival_time,
+        )
+        return flight, lookups.crew(row.get("crew"))
+
+    @transaction.atomic()
+    def insert_chunk(self, flights, crews):
+        flights = Flight.objects.bulk_create(flights)
+        Flight.crew.through.objects.bulk_create(
+            Flight.crew.through(flight_id=flight.pk, crew_id=crew_id)
+            for flight, crew_ids in zip(flights, crews)
+            for crew_id in crew_ids
+        )
+
+    def report_rejects(self, rejects, rejects_path):
+        if rejects_path:
+            with open(rejects_path, "w", encoding="utf-8") as output:
+                for reject in rejects:
+                    output.write(json.dumps(reject) + "\n")
+        for reject in rejects[:SHOWN_REJECTS]:
+            self.stderr.write(f"line {reject['line']}: {reject['error']}")
+        if len(rejects) > SHOWN_REJECTS:
+            self.stderr.write(f"... {len(rejects) - SHOWN_REJECTS} more rejected rows")
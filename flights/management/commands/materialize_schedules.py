@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from flights.schedules import materialize_flights
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the flights of recurring schedules departing within the "
+        "next days. Run it daily to keep the rolling horizon filled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.SCHEDULE_HORIZON_DAYS,
+            help="Horizon in days (default SCHEDULE_HORIZON_DAYS)",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        created = materialize_flights(now, now + timedelta(days=options["days"]))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {created} scheduled flights for the next "
+                f"{options['days']} days"
+            )
+        )
@@ -0,0 +1,75 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from flights.booking_queue import process_queue
+
+
+def work(batch_size, poll_interval, once, processed=None):
+    """Drain the booking queue until it is empty (``once``) or interrupted."""
+    total = 0
+    try:
+        while True:
+            count = process_queue(batch_size)
+            total += count
+            if processed is not None and count:
+                with processed.get_lock():
+                    processed.value += count
+            if not count:
+                if once:
+                    break
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connections.close_all()
+    return total
+
+
+class Command(BaseCommand):
+    help = (
+        "Book queued order requests in per-flight batches "
+        "from one or more worker processes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when the queue is empty",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Exit when the queue is empty"
+        )
+
+    def handle(self, *args, **options):
+        params = (options["batch_size"], options["poll_interval"], options["once"])
+        if options["workers"] <= 1:
+            processed = work(*params)
+        else:
+            processed = self.run_workers(options["workers"], params)
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} booking requests"))
+
+    def run_workers(self, workers, params):
+        # Forked workers must not share the parent's database connections.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        processed = context.Value("i", 0)
+        processes = [
+            context.Process(target=work, args=(*params, processed))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.join()
+        return processed.value
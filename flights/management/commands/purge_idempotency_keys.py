@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from flights.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete expired order Idempotency-Key records"
+
+    def handle(self, *args, **options):
+        purged = IdempotencyKey.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} expired keys"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from flights.models import SeatHold
+
+
+class Command(BaseCommand):
+    help = "Release expired seat holds and return their seats to sale"
+
+    def handle(self, *args, **options):
+        released = SeatHold.release_expired()
+        self.stdout.write(self.style.SUCCESS(f"Released {released} expired holds"))
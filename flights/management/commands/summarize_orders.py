@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from flights.models import Order
+from flights.summaries import summarize_orders
+
+
+class Command(BaseCommand):
+    help = "Rebuild the summaries the order list and export are served from"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--stale",
+            action="store_true",
+            help="Only rebuild summaries marked stale by airport and route renames",
+        )
+
+    def handle(self, *args, **options):
+        orders = Order.objects.all()
+        if options["stale"]:
+            orders = orders.filter(summary__stale=True)
+        written = summarize_orders(orders, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Summarized {written} orders"))
@@ -0,0 +1,142 @@
+"""
+In-process request metrics rendered in the Prometheus text format.
+
+Each worker process aggregates its own series, so Prometheus has to
+scrape every worker (or every container running one) and sum them.
+"""
+import hmac
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+LABELS = ("view", "action", "method")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_lock = threading.Lock()
+
+
+def _format_labels(names, values):
+    pairs = (
+        '%s="%s"'
+        % (
+            name,
+            str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"),
+        )
+        for name, value in zip(names, values)
+    )
+    return "{%s}" % ",".join(pairs)
+
+
+class Counter:
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.series = {}
+
+    def inc(self, labels):
+        self.series[labels] = self.series.get(labels, 0) + 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self.series.items()):
+            yield f"{self.name}{_format_labels(self.labels, labels)} {value}"
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets, labels=LABELS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.labels = labels
+        # labels -> [count of each bucket and of +Inf, sum of observations]
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        bounds = [*map(str, self.buckets), "+Inf"]
+        for labels, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                bucket_labels = _format_labels((*self.labels, "le"), (*labels, bound))
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            formatted = _format_labels(self.labels, labels)
+            yield f"{self.name}_sum{formatted} {series[-1]:.6f}"
+            yield f"{self.name}_count{formatted} {cumulative}"
+
+
+REQUESTS = Counter(
+    "http_requests_total", "Requests by view, action and status", (*LABELS, "status")
+)
+DURATION = Histogram(
+    "http_request_duration_seconds", "Wall time of requests", TIME_BUCKETS
+)
+DB_DURATION = Histogram(
+    "http_request_db_duration_seconds", "Time spent in database queries", TIME_BUCKETS
+)
+DB_QUERIES = Histogram(
+    "http_request_db_queries", "Database queries per request", QUERY_BUCKETS
+)
+SERIALIZER_DURATION = Histogram(
+    "http_request_serializer_duration_seconds",
+    "Time spent serializing responses, without their queries",
+    TIME_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Size of non-streaming response bodies", SIZE_BUCKETS
+)
+METRICS = (
+    REQUESTS,
+    DURATION,
+    DB_DURATION,
+    DB_QUERIES,
+    SERIALIZER_DURATION,
+    RESPONSE_SIZE,
+)
+
+
+def record(labels, status, duration, stats, size=None):
+    """Add one request to the series of its (view, action, method) labels"""
+    with _lock:
+        REQUESTS.inc((*labels, status))
+        DURATION.observe(labels, duration)
+        DB_DURATION.observe(labels, stats.db_time)
+        DB_QUERIES.observe(labels, stats.queries)
+        SERIALIZER_DURATION.observe(labels, stats.serializer_time)
+        if size is not None:
+            RESPONSE_SIZE.observe(labels, size)
+
+
+def render():
+    with _lock:
+        return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+def metrics_view(request):
+    """
+    Serve the metrics of this process. Unavailable while REQUEST_METRICS
+    is off; when METRICS_TOKEN is set it has to be sent as a bearer token.
+    """
+    if not settings.REQUEST_METRICS:
+        raise Http404
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,102 @@
+import time
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from flights import metrics
+
+
+class RequestStats:
+    """
+    Database and serializer time of one request. It is installed as an
+    execute wrapper on every connection, so each query passes through
+    ``__call__``.
+    """
+
+    __slots__ = ("db_time", "queries", "serializer_time")
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.queries = 0
+        self.serializer_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def timed_serializer(self, to_representation):
+        """
+        Wrap a serializer's to_representation to add its time, less the
+        queries it ran while evaluating lazy querysets.
+        """
+
+        @wraps(to_representation)
+        def timed(*args, **kwargs):
+            started, db_time = time.perf_counter(), self.db_time
+            try:
+                return to_representation(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                self.serializer_time += elapsed - (self.db_time - db_time)
+
+        return timed
+
+
+class RequestMetricsMiddleware:
+    """
+    Record wall time, database time and query count, serializer time and
+    response size of every request under its view name and viewset action.
+    Staff users get them back in a Server-Timing header.
+
+    The middleware removes itself from the chain when REQUEST_METRICS is
+    off, so disabled metrics cost nothing per request.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.stats = stats = RequestStats()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        size = None if response.streaming else len(response.content)
+        metrics.record(
+            self.labels(request, response), response.status_code, duration, stats, size
+        )
+
+        user = getattr(request, "user", None)
+        if user is not None and user.is_staff:
+            response["Server-Timing"] = server_timing(duration, stats)
+        return response
+
+    @staticmethod
+    def labels(request, response):
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        renderer_context = getattr(response, "renderer_context", None) or {}
+        action = getattr(renderer_context.get("view"), "action", None)
+        return view, action or request.method.lower(), request.method
+
+
+def server_timing(duration, stats):
+    return ", ".join(
+        (
+            f"total;dur={duration * 1000:.1f}",
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+            f"serializer;dur={stats.serializer_time * 1000:.1f}",
+        )
+    )
@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-17 20:36
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def count_seats_taken(apps, schema_editor):
+    Flight = apps.get_model("flights", "Flight")
+    Ticket = apps.get_model("flights", "Ticket")
+    tickets = (
+        Ticket.objects.filter(flight=OuterRef("pk"))
+        .order_by()
+        .values("flight")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Flight.objects.filter(pk__in=Ticket.objects.values("flight")).update(
+        seats_taken=Subquery(tickets)
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flights", "0002_alter_crew_options_flight_crew_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="seats_taken",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_seats_taken, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-17 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flights", "0003_flight_seats_taken"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["-departure_time", "id"], name="flight_departure_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "-created_at", "id"], name="order_user_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-17 20:41
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalize_city(value):
+    # A copy of flights.search.normalize_city as of this migration.
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+def fill_city_keys(apps, schema_editor):
+    Airport = apps.get_model("flights", "Airport")
+    airports = list(Airport.objects.only("closest_big_city"))
+    for airport in airports:
+        airport.city_key = normalize_city(airport.closest_big_city)
+    Airport.objects.bulk_update(airports, ["city_key"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flights", "0004_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="airport",
+            name="city_key",
+            field=models.CharField(
+                db_index=True, default="", editable=False, max_length=255
+            ),
+        ),
+        migrations.RunPython(fill_city_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 4.2 on 2026-10-17 20:50
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flights", "0007_updated_at"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="ticket",
+            unique_together={("flight", "row", "seat")},
+        ),
+    ]
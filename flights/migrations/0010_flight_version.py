@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 20:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flights", "0009_seat_holds"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-17 21:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flights", "0012_booking_requests"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DatasetLoad",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("checksum", models.CharField(max_length=64)),
+                ("objects_count", models.PositiveIntegerField(default=0)),
+                ("loaded_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
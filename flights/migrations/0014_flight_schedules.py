@@ -0,0 +1,90 @@
+# Generated by Django 4.2 on 2026-10-17 21:21
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flights", "0013_dataset_load"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FlightSchedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "days_of_week",
+                    models.PositiveSmallIntegerField(
+                        default=127,
+                        validators=[
+                            django.core.validators.MinValueValidator(1),
+                            django.core.validators.MaxValueValidator(127),
+                        ],
+                    ),
+                ),
+                ("departure_time", models.TimeField()),
+                ("duration", models.DurationField()),
+                ("time_zone", models.CharField(default="UTC", max_length=64)),
+                ("valid_from", models.DateField()),
+                ("valid_until", models.DateField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ("route", "departure_time"),
+            },
+        ),
+        migrations.AddField(
+            model_name="flightschedule",
+            name="airplane",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="schedules",
+                to="flights.airplane",
+            ),
+        ),
+        migrations.AddField(
+            model_name="flightschedule",
+            name="crew",
+            field=models.ManyToManyField(
+                blank=True, related_name="schedules", to="flights.crew"
+            ),
+        ),
+        migrations.AddField(
+            model_name="flightschedule",
+            name="route",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="schedules",
+                to="flights.route",
+            ),
+        ),
+        migrations.AddField(
+            model_name="flight",
+            name="schedule",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="flights",
+                to="flights.flightschedule",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="flight",
+            constraint=models.UniqueConstraint(
+                fields=("schedule", "departure_time"),
+                name="flight_schedule_departure_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 4.2 on 2026-10-17 21:48
+
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def datetime_representation(value):
+    # DRF's DateTimeField representation, as flights.summaries writes it.
+    value = timezone.localtime(value).isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def fill_summaries(apps, schema_editor):
+    Order = apps.get_model("flights", "Order")
+    OrderSummary = apps.get_model("flights", "OrderSummary")
+    orders = Order.objects.using(schema_editor.connection.alias)
+    order_ids = list(orders.order_by("pk").values_list("pk", flat=True))
+
+    for start in range(0, len(order_ids), BATCH_SIZE):
+        rows = (
+            orders.filter(pk__in=order_ids[start : start + BATCH_SIZE])
+            .annotate(
+                ticket_route=Concat(
+                    "tickets__flight__route__source__name",
+                    Value("-"),
+                    "tickets__flight__route__destination__name",
+                )
+            )
+            .order_by("pk", "tickets__row", "tickets__seat")
+            .values_list(
+                "pk",
+                "user_id",
+                "created_at",
+                "tickets__id",
+                "tickets__row",
+                "tickets__seat",
+                "tickets__flight_id",
+                "ticket_route",
+                "tickets__flight__departure_time",
+            )
+        )
+        summaries = []
+        for (order_id, user_id, created_at), order_rows in groupby(
+            rows, key=itemgetter(0, 1, 2)
+        ):
+            tickets = [
+                {
+                    "id": ticket_id,
+                    "row": row,
+                    "seat": seat,
+                    "flight": flight_id,
+                    "route": route,
+                    "departure_time": datetime_representation(departure),
+                }
+                for *_, ticket_id, row, seat, flight_id, route, departure in order_rows
+                if ticket_id is not None
+            ]
+            summaries.append(
+                OrderSummary(
+                    order_id=order_id,
+                    user_id=user_id,
+                    created_at=created_at,
+                    tickets=tickets,
+                )
+            )
+        OrderSummary.objects.using(schema_editor.connection.alias).bulk_create(
+            summaries
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("flights", "0014_flight_schedules"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderSummary",
+            fields=[
+                (
+                    "order",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="flights.order",
+                    ),
+                ),
+                ("created_at", models.DateTimeField()),
+                ("tickets", models.JSONField(default=list)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created_at",),
+            },
+        ),
+        migrations.AddIndex(
+            model_name="ordersummary",
+            index=models.Index(
+                fields=["user", "-created_at", "order"], name="summary_user_created_idx"
+            ),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 22:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flights", "0015_order_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookingrequest",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+    ]
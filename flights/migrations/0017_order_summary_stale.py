@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-17 22:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flights", "0016_booking_request_attempts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ordersummary",
+            name="stale",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="ordersummary",
+            index=models.Index(
+                condition=models.Q(("stale", True)),
+                fields=["order"],
+                name="summary_stale_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 22:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flights", "0017_order_summary_stale"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="headers",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,495 @@
+import hashlib
+import json
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import exceptions, status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from flights import cache
+from flights.exceptions import IdempotencyKeyMismatch
+from flights.models import IdempotencyKey
+from flights.paginators import CountedPaginator
+from flights.serializers import prune_fields, related_lookups
+
+
+class QueryBudgetMixin:
+    """
+    Declare the most database queries each action may run, as
+    ``query_budget = {"list": 4, "retrieve": 3}``.
+
+    A budget is a constant: it must hold for one row and for a full page
+    alike, so a related field that is not selected or prefetched shows up
+    as a query count growing with the page. The test suite runs every
+    budgeted action with 1 and 100 items and fails when it goes over.
+    """
+
+    query_budget = {}
+
+    @classmethod
+    def get_query_budget(cls, action):
+        return cls.query_budget.get(action)
+
+
+class SerializerTimingMixin:
+    """
+    Report the time spent serializing responses to the request metrics
+    (see ``RequestMetricsMiddleware``). Serializers are left untouched
+    while the metrics are off.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        stats = getattr(self.request, "stats", None)
+        if stats is not None:
+            serializer.to_representation = stats.timed_serializer(
+                serializer.to_representation
+            )
+        return serializer
+
+
+class SparseFieldsMixin:
+    """
+    Let GET requests pick the fields of the response with
+    ``?fields=id,departure_time`` and nest related objects listed in the
+    serializer's ``expandable_fields`` with ``?expand=route``.
+
+    ``select_sparse_related`` joins and prefetches only the relations read
+    by the fields returned (see ``serializers.related_lookups``), so a
+    smaller response also runs cheaper queries.
+    """
+
+    def get_sparse_fields(self):
+        """The requested field names, None for all, and the fields to expand."""
+        if not hasattr(self, "_sparse_fields"):
+            self._sparse_fields = self._parse_sparse_fields()
+        return self._sparse_fields
+
+    def _parse_sparse_fields(self):
+        params = self.request.query_params
+        if self.request.method not in SAFE_METHODS or not (
+            "fields" in params or "expand" in params
+        ):
+            return None, ()
+
+        serializer_class = self.get_serializer_class()
+        available = [
+            name
+            for name, field in serializer_class().fields.items()
+            if not field.write_only
+        ]
+        fields = self._split_param("fields", available) or None
+        expand = self._split_param(
+            "expand", getattr(serializer_class, "expandable_fields", {})
+        )
+        if fields is not None:
+            expand = [name for name in expand if name in fields]
+        return fields, expand
+
+    def _split_param(self, param, allowed):
+        names = [
+            name.strip()
+            for name in self.request.query_params.get(param, "").split(",")
+            if name.strip()
+        ]
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise exceptions.ValidationError(
+                {param: f"Unknown fields: {', '.join(unknown)}."}
+            )
+        return names
+
+    def is_field_requested(self, name):
+        fields, _ = self.get_sparse_fields()
+        return fields is None or name in fields
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields, expand = self.get_sparse_fields()
+        if fields is not None or expand:
+            prune_fields(getattr(serializer, "child", serializer), fields, expand)
+        return serializer
+
+    def select_sparse_related(self, queryset):
+        serializer = prune_fields(
+            self.get_serializer_class()(), *self.get_sparse_fields()
+        )
+        select, prefetch = related_lookups(serializer)
+        # select_related() without lookups would follow every foreign key.
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        return queryset.prefetch_related(*sorted(prefetch))
+
+
+class ValuesListMixin:
+    """
+    With FAST_LIST_SERIALIZATION on, serve the list action from values()
+    rows through ``values_serializer_class`` (see ``flights.values_serializers``)
+    instead of model instances and the regular serializer. The response
+    body is the same either way. Requests for sparse fields or expanded
+    relations take the regular path, the values() plan covers the default
+    representation only.
+    """
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        if (
+            not settings.FAST_LIST_SERIALIZATION
+            or "fields" in params
+            or "expand" in params
+        ):
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.values_serializer_class()
+        queryset = serializer.get_queryset(self.filter_queryset(self.get_queryset()))
+        to_representation = serializer.to_representation
+        stats = getattr(request, "stats", None)
+        if stats is not None:
+            to_representation = stats.timed_serializer(to_representation)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(to_representation(page))
+        return Response(to_representation(queryset))
+
+
+class ConditionalGetMixin:
+    """
+    Add strong ETag and Last-Modified headers to responses and answer
+    conditional requests with 304 from a version lookup.
+
+    The lookup reads only the keys and the ``updated_at`` columns named
+    in ``version_fields`` of the rows the response holds: one row for a
+    retrieve, the requested page (and the row count of page numbers) for
+    a list. A 304 never runs the full query or the serializer.
+    """
+
+    version_fields = ("updated_at",)
+
+    def conditional_response(
+        self, stamps, extra, get_response, evaluate_last_modified=True
+    ):
+        """
+        Return 304 when the request's validators match the version stamps,
+        otherwise the response from ``get_response`` with validators set.
+        Lists send Last-Modified but do not evaluate If-Modified-Since
+        against it: a deleted row does not move the newest timestamp, so
+        only the ETag (which covers the keys of the page) decides.
+        """
+        last_modified = max(filter(None, stamps), default=None)
+        variant = (tuple(stamps), extra, self.request.accepted_media_type)
+        etag = '"%s"' % hashlib.sha1(repr(variant).encode()).hexdigest()
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(
+            self.request,
+            etag=etag,
+            last_modified=timestamp if evaluate_last_modified else None,
+        )
+        if response is None:
+            response = get_response()
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """
+    ``version_annotations`` name queryset annotations the response
+    depends on that change without moving ``updated_at``, like counts
+    of unexpired seat holds; the ETag covers them when they are present.
+    """
+
+    version_annotations = ()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        keys = [
+            name
+            for name in self.version_annotations
+            if name in queryset.query.annotations
+        ]
+        rows = queryset.values_list("pk", *keys, *self.version_fields)
+        position = None
+        if self.paginator is not None:
+            # A paginator of its own, the view's one paginates the response.
+            paginator = type(self.paginator)()
+            if hasattr(paginator, "django_paginator_class"):
+                # Count the filtered rows alone, the values() rows join the
+                # tables of the version fields.
+                paginator.django_paginator_class = partial(
+                    CountedPaginator, count=queryset.order_by()
+                )
+            page = paginator.paginate_queryset(
+                queryset.values_list("pk", *keys), request, view=self
+            )
+            if page is not None:
+                rows = self._page_versions(queryset, page)
+                position = self._page_position(paginator)
+            if isinstance(position, int):
+                # The response pages with the row count validated here.
+                self.paginator.django_paginator_class = partial(
+                    CountedPaginator, count=position
+                )
+        rows = list(rows)
+
+        get_response = super().list
+        size = len(keys) + 1
+        return self.conditional_response(
+            [stamp for row in rows for stamp in row[size:]],
+            ([row[:size] for row in rows], position, request.get_full_path()),
+            lambda: get_response(request, *args, **kwargs),
+            evaluate_last_modified=False,
+        )
+
+    def _page_versions(self, queryset, page):
+        """The page's rows followed by their version stamps."""
+        stamps = {
+            pk: stamp
+            for pk, *stamp in queryset.model._default_manager.filter(
+                pk__in=[row[0] for row in page]
+            ).values_list("pk", *self.version_fields)
+        }
+        return [(*row, *stamps[row[0]]) for row in page if row[0] in stamps]
+
+    @staticmethod
+    def _page_position(paginator):
+        """What the page's count and links depend on besides its rows."""
+        page = getattr(paginator, "page", None)
+        if hasattr(page, "paginator"):
+            return page.paginator.count
+        return getattr(paginator, "has_next", None), getattr(
+            paginator, "has_previous", None
+        )
+
+
+class ConditionalRetrieveMixin(ConditionalGetMixin):
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_queryset().prefetch_related(None)
+        try:
+            stamps = (
+                queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+                .values_list(*self.version_fields)
+                .first()
+            )
+        except (TypeError, ValueError, ValidationError):
+            stamps = None
+
+        get_response = super().retrieve
+        if stamps is None:
+            return get_response(request, *args, **kwargs)
+        return self.conditional_response(
+            stamps,
+            (request.get_full_path(),),
+            lambda: get_response(request, *args, **kwargs),
+        )
+
+
+class CachedResponseMixin:
+    """
+    Serve list and retrieve responses from the versioned flight cache.
+
+    Views return the names of the versions their responses are built
+    from in ``get_cache_versions``, entries are keyed by the absolute
+    path, the sorted query parameters and the media type and rebuilt
+    when one of those versions moves. Validator headers are
+    cached with the data, so conditional requests that hit the cache are
+    answered with 304 without touching the database.
+
+    Responses that change without a write, like seat holds running out,
+    shorten the time they stay fresh in ``get_cache_timeout``.
+    """
+
+    cached_headers = ("ETag", "Last-Modified")
+
+    def get_cache_versions(self):
+        raise NotImplementedError
+
+    def get_cache_timeout(self):
+        return settings.FLIGHTS_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        get_response = super().list
+        return self.cached_response(lambda: get_response(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        get_response = super().retrieve
+        return self.cached_response(lambda: get_response(request, *args, **kwargs))
+
+    def cached_response(self, get_response):
+        if not settings.FLIGHTS_CACHE_TIMEOUT:
+            return get_response()
+
+        request = self.request
+        key = cache.make_key(
+            self.action,
+            request.build_absolute_uri(request.path),
+            sorted(request.query_params.lists()),
+            request.accepted_media_type,
+        )
+        status_code, data, headers = cache.get_or_set(
+            key,
+            lambda: self._freeze_response(get_response()),
+            cacheable=lambda value: value[0] == status.HTTP_200_OK,
+            timeout=self.get_cache_timeout,
+            version=cache.get_versions(*self.get_cache_versions()),
+        )
+
+        if status_code == status.HTTP_200_OK and "ETag" in headers:
+            response = get_conditional_response(request, etag=headers["ETag"])
+            if response is not None:
+                for header, value in headers.items():
+                    response[header] = value
+                return response
+        return Response(data, status=status_code, headers=headers)
+
+    def _freeze_response(self, response):
+        return (
+            response.status_code,
+            getattr(response, "data", None),
+            {
+                header: response[header]
+                for header in self.cached_headers
+                if response.has_header(header)
+            },
+        )
+
+
+class IdempotentCreateMixin:
+    """
+    Answer repeats of a create request sent with the same Idempotency-Key
+    header with the stored response instead of creating again.
+
+    The key is inserted in the transaction that creates the order, so a
+    concurrent repeat waits on the key's unique index and then replays
+    the committed response. Conflicts (409) and server errors are not
+    stored, the client may retry those with the same key. Headers named in
+    ``replay_headers`` are stored with the response and replayed with it.
+    """
+
+    idempotency_header = "Idempotency-Key"
+    replay_headers = ("Location", "Preference-Applied", "Retry-After")
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(self.idempotency_header)
+        if key is None:
+            return super().create(request, *args, **kwargs)
+
+        max_length = IdempotencyKey._meta.get_field("key").max_length
+        if not 0 < len(key) <= max_length:
+            raise exceptions.ValidationError(
+                {
+                    self.idempotency_header: f"Ensure this header has "
+                    f"1 to {max_length} characters."
+                }
+            )
+        request_hash = hashlib.sha256(
+            json.dumps(request.data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+        create = super().create
+        with transaction.atomic():
+            record = self._claim_idempotency_key(key, request_hash)
+            if record.request_hash != request_hash:
+                raise IdempotencyKeyMismatch()
+            if record.status_code is not None:
+                return Response(
+                    record.response,
+                    status=record.status_code,
+                    headers={**record.headers, "Idempotent-Replayed": "true"},
+                )
+
+            try:
+                response = create(request, *args, **kwargs)
+            except Exception as exc:
+                response = self.handle_exception(exc)
+
+            if response.status_code == status.HTTP_409_CONFLICT or (
+                response.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR
+            ):
+                record.delete()
+            else:
+                if response.status_code == status.HTTP_201_CREATED:
+                    record.order_id = response.data.get("id")
+                record.status_code = response.status_code
+                record.response = response.data
+                record.headers = {
+                    name: response[name]
+                    for name in self.replay_headers
+                    if response.has_header(name)
+                }
+                record.save(
+                    update_fields=["order", "status_code", "response", "headers"]
+                )
+        return response
+
+    def _claim_idempotency_key(self, key, request_hash):
+        user = self.request.user
+        record = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if record is not None and not record.is_expired:
+            return record
+        if record is not None:
+            record.delete()
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    user=user,
+                    key=key,
+                    request_hash=request_hash,
+                    expires_at=timezone.now()
+                    + timezone.timedelta(hours=settings.IDEMPOTENCY_KEY_HOURS),
+                )
+        except IntegrityError:
+            return IdempotencyKey.objects.get(user=user, key=key)
+
+
+class QueuedCreateMixin:
+    """
+    Accept create requests for background processing, answering 202 with
+    the queued request from ``queue_serializer_class``.
+
+    Requests are queued when they send ``Prefer: respond-async`` or when
+    the setting named by ``queue_setting`` is on.
+    """
+
+    queue_serializer_class = None
+    queue_setting = None
+
+    def should_queue(self, request):
+        prefer = request.headers.get("Prefer", "")
+        preferences = {value.strip() for value in prefer.lower().split(",")}
+        return "respond-async" in preferences or getattr(
+            settings, self.queue_setting, False
+        )
+
+    def create(self, request, *args, **kwargs):
+        if not self.should_queue(request):
+            return super().create(request, *args, **kwargs)
+
+        serializer = self.queue_serializer_class(
+            data=request.data, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=request.user)
+        return Response(
+            serializer.data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={
+                "Location": self.get_queued_url(serializer.instance),
+                "Preference-Applied": "respond-async",
+            },
+        )
+
+    def get_queued_url(self, instance):
+        raise NotImplementedError
@@ -1,11 +1,25 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils import timezone
+
+ALL_WEEKDAYS = 0b1111111
 
 
 class Airport(models.Model):
     name = models.CharField(max_length=255, unique=True)
     closest_big_city = models.CharField(max_length=255)
+    city_key = models.CharField(
+        max_length=255, db_index=True, editable=False, default=""
+    )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ("name",)
@@ -27,6 +41,7 @@ class Crew(models.Model):
 
 class AirplaneType(models.Model):
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ("name",)
@@ -43,6 +58,11 @@ class Order(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "id"], name="order_user_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return str(self.created_at)
@@ -56,6 +76,7 @@ class Route(models.Model):
         Airport, on_delete=models.CASCADE, related_name="destination_routes"
     )
     distance = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ("source",)
@@ -71,6 +92,7 @@ class Airplane(models.Model):
     airplane_type = models.ForeignKey(
         AirplaneType, on_delete=models.CASCADE, related_name="airplanes"
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ("name",)
@@ -83,21 +105,138 @@ class Airplane(models.Model):
         return self.rows * self.seats_in_row
 
 
+class FlightSchedule(models.Model):
+    """
+    A route operated at the same local time on some days of the week.
+    Its flights are created from it for the dates that get searched and
+    in rolling batches (see ``flights.schedules``); once created they are
+    ordinary flights and later schedule changes do not touch them.
+    """
+
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="schedules")
+    airplane = models.ForeignKey(
+        Airplane, on_delete=models.CASCADE, related_name="schedules"
+    )
+    crew = models.ManyToManyField(Crew, related_name="schedules", blank=True)
+    # Bit 0 is Monday, bit 6 is Sunday.
+    days_of_week = models.PositiveSmallIntegerField(
+        default=ALL_WEEKDAYS,
+        validators=[MinValueValidator(1), MaxValueValidator(ALL_WEEKDAYS)],
+    )
+    departure_time = models.TimeField()
+    duration = models.DurationField()
+    time_zone = models.CharField(max_length=64, default="UTC")
+    valid_from = models.DateField()
+    valid_until = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("route", "departure_time")
+
+    def __str__(self):
+        return f"{self.route} {self.departure_time} {self.weekdays}"
+
+    @property
+    def weekdays(self):
+        """ISO weekdays (1 is Monday) the schedule operates on."""
+        return [day + 1 for day in range(7) if self.days_of_week & (1 << day)]
+
+    def operates_on(self, day):
+        return (
+            self.valid_from <= day
+            and (self.valid_until is None or day <= self.valid_until)
+            and bool(self.days_of_week & (1 << day.weekday()))
+        )
+
+    def departures(self, start, end):
+        """Aware departure datetimes of the schedule in [start, end)."""
+        zone = ZoneInfo(self.time_zone)
+        day = start.astimezone(zone).date()
+        last_day = end.astimezone(zone).date()
+        while day <= last_day:
+            if self.operates_on(day):
+                departure = datetime.combine(day, self.departure_time, tzinfo=zone)
+                if start <= departure < end:
+                    yield departure
+            day += timedelta(days=1)
+
+
 class Flight(models.Model):
     route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="flights")
     airplane = models.ForeignKey(
         Airplane, on_delete=models.CASCADE, related_name="flights"
     )
+    schedule = models.ForeignKey(
+        FlightSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="flights",
+    )
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crew = models.ManyToManyField(Crew, related_name="flights", blank=True)
+    seats_taken = models.PositiveIntegerField(default=0, editable=False)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ("-departure_time",)
+        indexes = [
+            models.Index(fields=["-departure_time", "id"], name="flight_departure_idx"),
+            models.Index(
+                fields=["route", "departure_time"], name="flight_route_departure_idx"
+            ),
+        ]
+        constraints = [
+            # Lets concurrent materializations of a schedule insert with
+            # ignore_conflicts instead of locking.
+            models.UniqueConstraint(
+                fields=["schedule", "departure_time"],
+                name="flight_schedule_departure_unique",
+            ),
+        ]
 
     def __str__(self):
         return str(self.route) + " " + str(self.departure_time)
 
+    def save(self, *args, **kwargs):
+        """
+        Updates leave out the counters ``adjust_seats`` moves in place: an
+        instance loaded before a booking would write its stale counts back.
+        """
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in ("seats_taken", "version")
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def seats_available(self) -> int:
+        seats_held = getattr(self, "seats_held", 0)
+        return self.airplane.capacity - self.seats_taken - seats_held
+
+    @staticmethod
+    def adjust_seats(flight_id, taken=0, version=None):
+        """
+        Shift the denormalized seat counters of a flight in place and move
+        its row version. With ``version`` the update only applies while the
+        flight is still at that version. Returns whether a row was updated.
+        """
+        flights = Flight.objects.filter(pk=flight_id)
+        if version is not None:
+            flights = flights.filter(version=version)
+        return bool(
+            flights.update(
+                seats_taken=F("seats_taken") + taken,
+                version=F("version") + 1,
+                updated_at=timezone.now(),
+            )
+        )
+
 
 class Ticket(models.Model):
     row = models.IntegerField()
@@ -106,7 +245,7 @@ class Ticket(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="tickets")
 
     class Meta:
-        unique_together = ("row", "seat")
+        unique_together = ("flight", "row", "seat")
         ordering = ("row", "seat")
 
     def __str__(self):
@@ -149,3 +288,187 @@ class Ticket(models.Model):
         return super(Ticket, self).save(
             force_insert, force_update, using, update_fields
         )
+
+
+class OrderSummary(models.Model):
+    """
+    Read model of an order for the order list and export: its tickets
+    with the route label and departure time of their flights, kept in
+    sync by ``flights.summaries``.
+    """
+
+    order = models.OneToOneField(
+        Order, on_delete=models.CASCADE, primary_key=True, related_name="summary"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    created_at = models.DateTimeField()
+    tickets = models.JSONField(default=list)
+    # Set when a rename left the tickets' route labels to be rebuilt.
+    stale = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "order"],
+                name="summary_user_created_idx",
+            ),
+            models.Index(
+                fields=["order"], condition=Q(stale=True), name="summary_stale_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return str(self.order_id)
+
+
+class SeatHold(models.Model):
+    flight = models.ForeignKey(Flight, on_delete=models.CASCADE, related_name="holds")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="seat_holds"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.flight} held until {self.expires_at}"
+
+    @property
+    def is_expired(self) -> bool:
+        return self.expires_at <= timezone.now()
+
+    @staticmethod
+    def release_expired(flight_id=None):
+        """Delete expired holds, optionally only those of one flight."""
+        holds = SeatHold.objects.filter(expires_at__lte=timezone.now())
+        if flight_id is not None:
+            holds = holds.filter(flight_id=flight_id)
+        return holds.delete()[1].get(SeatHold._meta.label, 0)
+
+
+class HeldSeat(models.Model):
+    hold = models.ForeignKey(SeatHold, on_delete=models.CASCADE, related_name="seats")
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, related_name="held_seats"
+    )
+    row = models.IntegerField()
+    seat = models.IntegerField()
+
+    class Meta:
+        unique_together = ("flight", "row", "seat")
+        ordering = ("row", "seat")
+
+    def __str__(self):
+        return f"{self.flight} row: {self.row}, seat: {self.seat}"
+
+    @staticmethod
+    def active():
+        return HeldSeat.objects.filter(hold__expires_at__gt=timezone.now())
+
+    @staticmethod
+    def count_for_flight():
+        """Unexpired held seats of the outer flight, for Flight annotations."""
+        held_seats = (
+            HeldSeat.active()
+            .filter(flight=OuterRef("pk"))
+            .order_by()
+            .values("flight")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return Coalesce(Subquery(held_seats), 0)
+
+
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    order = models.ForeignKey(
+        Order, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    headers = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ("user", "key")
+
+    def __str__(self):
+        return f"{self.user} {self.key}"
+
+    @property
+    def is_expired(self) -> bool:
+        return self.expires_at <= timezone.now()
+
+    @staticmethod
+    def purge_expired():
+        """Delete expired keys and return how many were deleted."""
+        keys = IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+        return keys.delete()[1].get(IdempotencyKey._meta.label, 0)
+
+
+class BookingRequest(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        BOOKED = "booked"
+        FAILED = "failed"
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="booking_requests",
+    )
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, related_name="booking_requests"
+    )
+    tickets = models.JSONField()
+    status = models.CharField(
+        max_length=7, choices=Status.choices, default=Status.PENDING
+    )
+    order = models.OneToOneField(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="booking_request",
+    )
+    errors = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    attempts = models.PositiveSmallIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["status", "created_at"], name="booking_request_queue_idx"
+            ),
+            models.Index(
+                fields=["status", "flight", "created_at"],
+                name="booking_request_flight_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.status} {self.created_at}"
+
+
+class DatasetLoad(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    checksum = models.CharField(max_length=64)
+    objects_count = models.PositiveIntegerField(default=0)
+    loaded_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} {self.checksum[:12]}"
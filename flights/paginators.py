@@ -1,6 +1,188 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+)
+from rest_framework.utils.urls import replace_query_param
+
+
+class CountedPaginator(Paginator):
+    """
+    A Django paginator taking its row count from ``count``: the number
+    when it is already known, or a queryset to count in place of the
+    paged one, like the same rows without joins and annotations.
+    """
+
+    def __init__(self, *args, count, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        if isinstance(self._count, int):
+            return self._count
+        return self._count.count()
 
 
 class OrderFlightPagination(PageNumberPagination):
     page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination positioned on every field of the ordering, so ties
+    in the leading field are resolved by the following ones instead of
+    an offset. Pages never count or skip rows and stay stable while new
+    rows are inserted.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
     max_page_size = 100
+    ordering = ("-id",)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        ordering = list(self.ordering)
+        if reverse:
+            ordering = [self._invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self._after_position(queryset.model, ordering, self.cursor.position)
+            )
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        return self.page
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self._position(self.page[-1]))
+        )
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.page):
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self._position(self.page[0]))
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            tokens = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            position = [str(value) for value in tokens["p"]]
+            reverse = bool(tokens.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+    def encode_cursor(self, cursor):
+        tokens = {"p": cursor.position}
+        if cursor.reverse:
+            tokens["r"] = 1
+        encoded = urlsafe_b64encode(json.dumps(tokens).encode("ascii"))
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded.decode("ascii")
+        )
+
+    def _position(self, instance):
+        return [
+            self._get_position_from_instance(instance, (field,))
+            for field in self.ordering
+        ]
+
+    def _after_position(self, model, ordering, position):
+        """
+        Build the lexicographic "comes after" condition for the position,
+        bounded on the leading field so an index range scan applies.
+        """
+        condition = Q()
+        equal = {}
+        try:
+            for field, value in zip(ordering, position):
+                name = field.lstrip("-")
+                value = self._get_field(model, name).to_python(value)
+                lookup = "lt" if field.startswith("-") else "gt"
+                condition |= Q(**equal, **{f"{name}__{lookup}": value})
+                equal[name] = value
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+        leading = ordering[0]
+        bound = "lte" if leading.startswith("-") else "gte"
+        name = leading.lstrip("-")
+        return Q(**{f"{name}__{bound}": equal[name]}) & condition
+
+    @staticmethod
+    def _get_field(model, name):
+        if name == "pk":
+            return model._meta.pk
+        return model._meta.get_field(name)
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+
+class FlightCursorPagination(KeysetPagination):
+    ordering = ("-departure_time", "id")
+
+
+class OrderCursorPagination(KeysetPagination):
+    # pk is the order id for orders and for their summaries alike.
+    ordering = ("-created_at", "pk")
+
+
+class CursorPaginationMixin:
+    """
+    Let clients of a view opt into its keyset pagination with
+    ?pagination=cursor instead of the default page numbers.
+    """
+
+    cursor_pagination_class = None
+
+    @property
+    def paginator(self):
+        request = getattr(self, "request", None)
+        if not hasattr(self, "_paginator") and request is not None:
+            params = request.query_params
+            if self.cursor_pagination_class is not None and (
+                params.get("pagination") == "cursor" or "cursor" in params
+            ):
+                self._paginator = self.cursor_pagination_class()
+        return super().paginator
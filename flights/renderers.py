@@ -0,0 +1,142 @@
+"""
+Faster renderers for the API, configured in REST_FRAMEWORK.
+
+``ORJSONRenderer`` writes the same bytes as DRF's ``JSONRenderer`` with
+the default settings (compact, UTF-8, DRF's encoding of datetimes,
+decimals, durations and UUIDs) through orjson. ``MessagePackRenderer``
+answers ``Accept: application/msgpack`` with the same data, values that
+are not native MessagePack types encoded like in JSON.
+
+``NDJSONRenderer`` and ``CSVRenderer`` write lists of flat records and
+can render them as a stream of chunks for ``StreamingHttpResponse``.
+"""
+import csv
+import io
+
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Values orjson and msgpack cannot encode natively, datetimes included so
+# that they keep DRF's millisecond precision and "Z" suffix.
+encode_default = JSONEncoder().default
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Indented output, asked for with ``Accept: application/json; indent=2``
+    or by the browsable API, falls back to the stdlib renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        content = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+        # Like JSONRenderer, escape the separators that are invalid in
+        # JavaScript string literals.
+        if b"\xe2\x80" in content:
+            content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return content
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    Renders an item or a list of items, or any iterable of items in
+    chunks of ``batch_size`` with ``render_stream``.
+    """
+
+    batch_size = 500
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        items = data if isinstance(data, (list, tuple)) else [data]
+        return b"".join(self.render_stream(items))
+
+    def render_stream(self, items):
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                yield self.render_batch(batch)
+                batch = []
+        if batch:
+            yield self.render_batch(batch)
+
+    def render_batch(self, items):
+        raise NotImplementedError
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """One JSON document per line."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render_batch(self, items):
+        return b"".join(
+            orjson.dumps(item, default=encode_default, option=ORJSON_OPTIONS) + b"\n"
+            for item in items
+        )
+
+
+class CSVRenderer(StreamingRenderer):
+    """
+    Rows of ``fields``, the keys of the first item by default, after a
+    header row. Nested values are written as JSON.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def __init__(self, fields=None):
+        self.fields = fields
+
+    def render_stream(self, items):
+        chunks = super().render_stream(items)
+        first = next(chunks, b"")
+        if self.fields is not None:
+            yield self.render_rows([self.fields]) + first
+        yield from chunks
+
+    def render_batch(self, items):
+        if self.fields is None:
+            self.fields = list(items[0])
+        return self.render_rows(
+            [self.to_cell(item.get(field)) for field in self.fields] for item in items
+        )
+
+    @staticmethod
+    def to_cell(value):
+        if isinstance(value, (dict, list)):
+            return orjson.dumps(value, default=encode_default).decode()
+        return value
+
+    @staticmethod
+    def render_rows(rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
@@ -0,0 +1,186 @@
+"""
+Materialization of recurring flight schedules into flights.
+
+Flights of a schedule are created one UTC day at a time: ahead of time
+for the rolling horizon by ``python manage.py materialize_schedules`` and
+on demand for the days and cities a search asks about. A day is marked in
+the cache once materialized for the searched airports, under a version
+that moves whenever a schedule changes, so repeated searches of the same
+day cost one cache lookup.
+Inserts skip conflicts on (schedule, departure_time), so concurrent
+materializations of a day never duplicate flights.
+
+Deleting a materialized flight does not cancel it for good: the next
+schedule change brings it back. Change the schedule's days or validity
+window instead.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from flights import cache
+from flights.models import Flight, FlightSchedule
+from flights.search import parse_departure_bound
+
+SCHEDULE_VERSION = "schedules"
+
+
+def _day_key(version, day, source_ids=None, destination_ids=None):
+    scope = [
+        None if airport_ids is None else sorted(airport_ids)
+        for airport_ids in (source_ids, destination_ids)
+    ]
+    return cache.make_key(f"schedules:{version}", day.isoformat(), scope)
+
+
+def materialize_flights(start, end, source_ids=None, destination_ids=None):
+    """
+    Create the missing flights of every schedule departing in [start, end)
+    and return how many were created. Departures before now are skipped.
+    ``source_ids`` and ``destination_ids`` limit the schedules to routes
+    between those airports.
+    """
+    start = max(start, timezone.now())
+    if start >= end:
+        return 0
+
+    # Validity dates are local to each schedule, one day of margin on
+    # both sides covers every time zone; departures() checks exactly.
+    schedules = FlightSchedule.objects.filter(
+        Q(valid_until__isnull=True)
+        | Q(valid_until__gte=(start - timedelta(days=1)).date()),
+        valid_from__lte=(end + timedelta(days=1)).date(),
+    ).prefetch_related("crew")
+    if source_ids is not None:
+        schedules = schedules.filter(route__source_id__in=source_ids)
+    if destination_ids is not None:
+        schedules = schedules.filter(route__destination_id__in=destination_ids)
+    planned = {
+        (schedule.pk, departure): schedule
+        for schedule in schedules
+        for departure in schedule.departures(start, end)
+    }
+    if not planned:
+        return 0
+
+    schedule_ids = {schedule_id for schedule_id, _ in planned}
+    in_window = Flight.objects.filter(
+        schedule_id__in=schedule_ids, departure_time__gte=start, departure_time__lt=end
+    )
+    existing = set(in_window.values_list("schedule_id", "departure_time"))
+    missing = [key for key in planned if key not in existing]
+    if not missing:
+        return 0
+
+    Flight.objects.bulk_create(
+        [
+            Flight(
+                route_id=planned[key].route_id,
+                airplane_id=planned[key].airplane_id,
+                schedule_id=key[0],
+                departure_time=key[1],
+                arrival_time=key[1] + planned[key].duration,
+            )
+            for key in missing
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+    # ignore_conflicts returns no primary keys, read them back for crew.
+    missing = set(missing)
+    created = [
+        (flight_id, planned[(schedule_id, departure)])
+        for flight_id, schedule_id, departure in in_window.values_list(
+            "pk", "schedule_id", "departure_time"
+        )
+        if (schedule_id, departure) in missing
+    ]
+    Flight.crew.through.objects.bulk_create(
+        [
+            Flight.crew.through(flight_id=flight_id, crew_id=member.pk)
+            for flight_id, schedule in created
+            for member in schedule.crew.all()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    cache.invalidate(cache.FLIGHT_LIST_VERSION)
+    return len(created)
+
+
+def materialize_days(first_day, last_day, source_ids=None, destination_ids=None):
+    """
+    Materialize the UTC days from first_day to last_day inclusive unless
+    all of them are marked as materialized already, in one pass from the
+    first unmarked day to the last. Returns the flights created. Airport
+    ids limit the schedules as in ``materialize_flights``.
+    """
+    days = [
+        first_day + timedelta(days=offset)
+        for offset in range((last_day - first_day).days + 1)
+    ]
+    if not days:
+        return 0
+
+    store = cache.get_cache()
+    (version,) = cache.get_versions(SCHEDULE_VERSION)
+    keys = {day: _day_key(version, day, source_ids, destination_ids) for day in days}
+    marked = store.get_many(list(keys.values()))
+    unmarked = [day for day in days if keys[day] not in marked]
+    if not unmarked:
+        return 0
+
+    start = datetime.combine(unmarked[0], time.min, tzinfo=dt_timezone.utc)
+    end = datetime.combine(unmarked[-1], time.min, tzinfo=dt_timezone.utc)
+    created = materialize_flights(
+        start, end + timedelta(days=1), source_ids, destination_ids
+    )
+    store.set_many({keys[day]: 1 for day in unmarked}, None)
+    return created
+
+
+def materialize_searched(params, source_ids=None, destination_ids=None):
+    """
+    Materialize the days a flight search filters on with its date,
+    departure_from and departure_to params, at most SCHEDULE_SEARCH_DAYS
+    of them from the start of the range, for the schedules between the
+    searched source and destination airports. Searches without a date
+    range or without a city only see flights already materialized, the
+    rolling horizon is left to ``materialize_schedules``.
+    """
+    if source_ids is None and destination_ids is None:
+        return 0
+    date = params.get("date")
+    departure_from = params.get("departure_from")
+    departure_to = params.get("departure_to")
+
+    if date:
+        start = parse_departure_bound("date", date, date_only=True)
+        end = parse_departure_bound("date", date, end=True, date_only=True)
+    elif departure_from or departure_to:
+        start = (
+            parse_departure_bound("departure_from", departure_from)
+            if departure_from
+            else timezone.now()
+        )
+        end = (
+            parse_departure_bound("departure_to", departure_to, end=True)
+            if departure_to
+            else start + timedelta(days=settings.SCHEDULE_SEARCH_DAYS)
+        )
+    else:
+        return 0
+
+    start = max(start, timezone.now())
+    end = min(end, start + timedelta(days=settings.SCHEDULE_SEARCH_DAYS))
+    if start >= end:
+        return 0
+    return materialize_days(
+        start.astimezone(dt_timezone.utc).date(),
+        (end - timedelta(microseconds=1)).astimezone(dt_timezone.utc).date(),
+        source_ids,
+        destination_ids,
+    )
@@ -0,0 +1,95 @@
+import unicodedata
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from flights.models import Airport
+
+
+def normalize_city(value):
+    """Case-fold a city name, drop accents and collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+def airports_for_city(query):
+    """Airports whose city key starts with the normalized query."""
+    return Airport.objects.filter(city_key__startswith=normalize_city(query))
+
+
+def airport_ids_for_city(query):
+    """
+    Resolve a city search to airport ids with one indexed prefix lookup,
+    so flights and routes can be filtered on their airport foreign keys
+    without joining the airport table.
+    """
+    return list(airports_for_city(query).order_by().values_list("id", flat=True))
+
+
+async def aairport_ids_for_city(query):
+    """Async version of ``airport_ids_for_city``."""
+    airport_ids = airports_for_city(query).order_by().values_list("id", flat=True)
+    return [airport_id async for airport_id in airport_ids]
+
+
+def parse_departure_bound(name, value, end=False, date_only=False):
+    """
+    Parse a date or datetime query parameter into an aware datetime.
+
+    A bare date is the start of that day, or the start of the next day
+    when it closes a half-open range (``end=True``), so the column can be
+    compared directly instead of being cast to a date. Parameters taking
+    both bounds from one value are ``date_only``: a datetime would make
+    them an empty range.
+    """
+    try:
+        day = parse_date(value)
+        if day is None:
+            moment = None if date_only else parse_datetime(value)
+            if moment is None:
+                raise ValueError
+        else:
+            if end:
+                day += timedelta(days=1)
+            moment = datetime.combine(day, time.min)
+    except ValueError:
+        message = (
+            "Enter a valid date." if date_only else "Enter a valid date or datetime."
+        )
+        raise ValidationError({name: message})
+
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filter_departure(queryset, params):
+    """Filter flights by the date / departure_from / departure_to params."""
+    date = params.get("date")
+    departure_from = params.get("departure_from")
+    departure_to = params.get("departure_to")
+
+    if date:
+        queryset = queryset.filter(
+            departure_time__gte=parse_departure_bound("date", date, date_only=True),
+            departure_time__lt=parse_departure_bound(
+                "date", date, end=True, date_only=True
+            ),
+        )
+
+    if departure_from:
+        queryset = queryset.filter(
+            departure_time__gte=parse_departure_bound("departure_from", departure_from)
+        )
+
+    if departure_to:
+        queryset = queryset.filter(
+            departure_time__lt=parse_departure_bound(
+                "departure_to", departure_to, end=True
+            )
+        )
+
+    return queryset
@@ -0,0 +1,16 @@
+import base64
+
+
+def pack_seatmap(rows, seats_in_row, taken_places):
+    """
+    Pack taken (row, seat) pairs into a row-major occupancy bitmap.
+
+    Seat (1, 1) is the most significant bit of the first byte and a set
+    bit means the seat is taken. The bitmap is returned base64 encoded.
+    """
+    bitmap = bytearray((rows * seats_in_row + 7) // 8)
+    for row, seat in taken_places:
+        if 1 <= row <= rows and 1 <= seat <= seats_in_row:
+            index = (row - 1) * seats_in_row + seat - 1
+            bitmap[index >> 3] |= 0x80 >> (index & 7)
+    return base64.b64encode(bitmap).decode("ascii")
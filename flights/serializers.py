@@ -1,7 +1,10 @@
-from django.db import transaction
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
 from django.utils import timezone
 from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import ErrorDetail, ValidationError
 
 from flights.models import (
     Airport,
@@ -10,11 +13,103 @@ from flights.models import (
     Route,
     Airplane,
     Flight,
+    FlightSchedule,
     Ticket,
     Order,
+    OrderSummary,
+    SeatHold,
+    HeldSeat,
+    BookingRequest,
+)
+from flights.booking import (
+    check_booking_open,
+    hold_seats,
+    optimistic,
+    place_order,
+    ticket_errors,
 )
 
 
+def prune_fields(serializer, fields=None, expand=()):
+    """
+    Keep only the named fields of a serializer instance, all of them when
+    ``fields`` is None, and replace the ``expand`` ones with the nested
+    serializer of the class's ``expandable_fields``.
+    """
+    serializer_fields = serializer.fields
+    if fields is not None:
+        for name in list(serializer_fields):
+            if name not in fields:
+                serializer_fields.pop(name)
+    for name in expand:
+        many = isinstance(
+            serializer_fields[name],
+            (serializers.ManyRelatedField, serializers.ListSerializer),
+        )
+        serializer_fields[name] = serializer.expandable_fields[name](
+            many=many, read_only=True
+        )
+    return serializer
+
+
+def _is_relation(serializer, name):
+    model = getattr(getattr(serializer, "Meta", None), "model", None)
+    if model is None:
+        return True
+    try:
+        return model._meta.get_field(name).is_relation
+    except FieldDoesNotExist:
+        return False
+
+
+def related_lookups(serializer, prefix="", many=False):
+    """
+    The select_related and prefetch_related lookups read by the fields of
+    a serializer instance: relations of dotted sources, related and nested
+    serializer fields, plus the ``related_fields`` a serializer declares
+    for fields reading further, such as a __str__ or a method field.
+    Everything below a to-many relation is prefetched.
+    """
+    select, prefetch = set(), set()
+
+    def add(lookup, to_many=many):
+        (prefetch if to_many else select).add(prefix + lookup)
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        for lookup in getattr(serializer, "related_fields", {}).get(name, ()):
+            add(lookup)
+        if not field.source_attrs or not _is_relation(
+            serializer, field.source_attrs[0]
+        ):
+            continue
+
+        source = "__".join(field.source_attrs)
+        if isinstance(
+            field, (serializers.ManyRelatedField, serializers.ListSerializer)
+        ):
+            add(source, to_many=True)
+            child = getattr(field, "child", None)
+            if isinstance(child, serializers.BaseSerializer):
+                prefetch.update(
+                    *related_lookups(child, f"{prefix}{source}__", many=True)
+                )
+        elif isinstance(field, serializers.BaseSerializer):
+            add(source)
+            nested_select, nested_prefetch = related_lookups(
+                field, f"{prefix}{source}__", many
+            )
+            select |= nested_select
+            prefetch |= nested_prefetch
+        elif isinstance(field, serializers.RelatedField):
+            if not field.use_pk_only_optimization():
+                add(source)
+        elif len(field.source_attrs) > 1:
+            add("__".join(field.source_attrs[:-1]))
+    return select, prefetch
+
+
 class AirportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Airport
@@ -44,6 +139,10 @@ class RouteListSerializer(RouteSerializer):
     destination = serializers.CharField(
         source="destination.closest_big_city", read_only=True
     )
+    expandable_fields = {
+        "source": AirportSerializer,
+        "destination": AirportSerializer,
+    }
 
     class Meta:
         model = Route
@@ -75,6 +174,14 @@ class FlightTakenPlacesSerializer(serializers.ModelSerializer):
         fields = ("row", "seat")
 
 
+class FlightSeatMapSerializer(serializers.Serializer):
+    rows = serializers.IntegerField()
+    seats_in_row = serializers.IntegerField()
+    encoding = serializers.CharField()
+    bitmap = serializers.CharField()
+    held = serializers.CharField()
+
+
 class FlightSerializer(serializers.ModelSerializer):
     class Meta:
         model = Flight
@@ -108,9 +215,18 @@ class FlightListSerializer(FlightSerializer):
     airplane = serializers.CharField(source="airplane.name", read_only=True)
     crew = serializers.StringRelatedField(many=True)
     available_places = serializers.SerializerMethodField()
+    expandable_fields = {
+        "route": RouteListSerializer,
+        "airplane": AirplaneListSerializer,
+        "crew": CrewSerializer,
+    }
+    related_fields = {
+        "route": ("route__source", "route__destination"),
+        "available_places": ("airplane",),
+    }
 
     def get_available_places(self, obj):
-        return obj.airplane.capacity - obj.tickets.count()
+        return obj.seats_available
 
     class Meta:
         model = Flight
@@ -146,30 +262,96 @@ class FlightRetrieveSerializer(FlightSerializer):
         )
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class WeekdaysField(serializers.ListField):
+    """ISO weekdays (1 is Monday) stored as a FlightSchedule bitmask"""
+
+    child = serializers.IntegerField(min_value=1, max_value=7)
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("allow_empty", False)
+        super().__init__(**kwargs)
+
+    def to_representation(self, days_of_week):
+        return [day + 1 for day in range(7) if days_of_week & (1 << day)]
+
+    def to_internal_value(self, data):
+        return sum({1 << (day - 1) for day in super().to_internal_value(data)})
+
+
+class FlightScheduleSerializer(serializers.ModelSerializer):
+    days_of_week = WeekdaysField()
+
+    class Meta:
+        model = FlightSchedule
+        fields = (
+            "id",
+            "route",
+            "airplane",
+            "crew",
+            "days_of_week",
+            "departure_time",
+            "duration",
+            "time_zone",
+            "valid_from",
+            "valid_until",
+        )
+
+    def validate_time_zone(self, value):
+        try:
+            ZoneInfo(value)
+        except (ValueError, ZoneInfoNotFoundError):
+            raise ValidationError("Unknown time zone.")
+        return value
+
     def validate(self, attrs):
-        data = super(TicketSerializer, self).validate(attrs=attrs)
-        Ticket.validate_ticket(
-            attrs["row"],
-            attrs["seat"],
-            attrs["flight"].airplane,
-            ValidationError,
+        data = super().validate(attrs)
+        valid_from = data.get("valid_from", getattr(self.instance, "valid_from", None))
+        valid_until = data.get(
+            "valid_until", getattr(self.instance, "valid_until", None)
         )
-        flight = data.get("flight")
-        if flight.departure_time < timezone.now() + timezone.timedelta(hours=3):
-            raise ValidationError(
-                "Booking tickets is available no later "
-                "than three hours before departure"
-            )
+        if valid_until is not None and valid_until < valid_from:
+            raise ValidationError("valid_until must not be before valid_from.")
+        duration = data.get("duration")
+        if duration is not None and duration.total_seconds() <= 0:
+            raise ValidationError({"duration": "Duration must be positive."})
         return data
 
+
+class ConnectionSearchSerializer(serializers.Serializer):
+    source = serializers.CharField()
+    destination = serializers.CharField()
+    date = serializers.DateField()
+    max_stops = serializers.IntegerField(min_value=0, max_value=2, default=1)
+    min_connection = serializers.IntegerField(min_value=0, default=45)
+
+
+class ConnectionLegSerializer(serializers.Serializer):
+    flight = serializers.IntegerField()
+    route = serializers.CharField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+
+
+class ConnectionSerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    duration = serializers.DurationField()
+    stops = serializers.IntegerField()
+    distance = serializers.IntegerField()
+    legs = ConnectionLegSerializer(many=True)
+
+
+class TicketSerializer(serializers.ModelSerializer):
+    # The flights of an order are loaded together in
+    # OrderSerializer.validate_tickets.
+    flight = serializers.IntegerField(source="flight_id")
+
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "flight")
-
-
-class TicketListSerializer(TicketSerializer):
-    flight = FlightListSerializer
+        # Seat conflicts of a whole order are checked in one query by
+        # book_tickets instead of one unique-together query per ticket.
+        validators = []
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -179,19 +361,142 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = ("id", "tickets", "created_at")
 
-    @transaction.atomic()
+    def validate_tickets(self, tickets):
+        """
+        Load the flights of all tickets with their airplanes in one query
+        and check that they are open for booking. Seat ranges and sold
+        seats are checked by ``book_tickets``.
+        """
+        flights = Flight.objects.select_related("airplane").in_bulk(
+            {ticket["flight_id"] for ticket in tickets}
+        )
+        errors = {}
+        for index, ticket in enumerate(tickets):
+            flight_id = ticket.pop("flight_id")
+            ticket["flight"] = flights.get(flight_id)
+            if ticket["flight"] is None:
+                errors[index] = {
+                    "flight": [
+                        ErrorDetail(
+                            f'Invalid pk "{flight_id}" - object does not exist.',
+                            code="does_not_exist",
+                        )
+                    ]
+                }
+                continue
+            try:
+                check_booking_open(ticket["flight"])
+            except ValidationError as exc:
+                errors[index] = {"non_field_errors": exc.detail}
+        if errors:
+            raise ValidationError(ticket_errors(tickets, errors))
+        return tickets
+
     def create(self, validated_data):
         tickets_data = validated_data.pop("tickets")
-        order = Order.objects.create(**validated_data)
-        for ticket_data in tickets_data:
-            Ticket.objects.create(order=order, **ticket_data)
-        return order
+        return place_order(tickets_data, **validated_data)
 
 
-class OrderListSerializer(OrderSerializer):
-    tickets = TicketListSerializer(many=True, read_only=True)
+class OrderSummaryTicketSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+    flight = serializers.IntegerField()
+    route = serializers.CharField()
+    departure_time = serializers.CharField()
+
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """Orders of the order list, read from their ``OrderSummary``."""
+
+    id = serializers.IntegerField(source="pk", read_only=True)
+    tickets = OrderSummaryTicketSerializer(many=True, read_only=True)
     user = serializers.CharField(source="user.username", read_only=True)
 
     class Meta:
-        model = Order
+        model = OrderSummary
         fields = ("id", "tickets", "user", "created_at")
+
+
+class HeldSeatSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = HeldSeat
+        fields = ("row", "seat")
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    flight = serializers.PrimaryKeyRelatedField(
+        queryset=Flight.objects.select_related("airplane")
+    )
+    seats = HeldSeatSerializer(many=True, allow_empty=False)
+    minutes = serializers.IntegerField(
+        write_only=True,
+        min_value=1,
+        max_value=settings.SEAT_HOLD_MAX_MINUTES,
+        default=settings.SEAT_HOLD_MINUTES,
+    )
+
+    class Meta:
+        model = SeatHold
+        fields = ("id", "flight", "seats", "minutes", "created_at", "expires_at")
+        read_only_fields = ("created_at", "expires_at")
+
+    def validate(self, attrs):
+        data = super(SeatHoldSerializer, self).validate(attrs=attrs)
+        flight = data["flight"]
+        check_booking_open(flight)
+
+        places = set()
+        for seat in data["seats"]:
+            Ticket.validate_ticket(
+                seat["row"], seat["seat"], flight.airplane, ValidationError
+            )
+            place = (seat["row"], seat["seat"])
+            if place in places:
+                raise ValidationError({"seats": "Each seat can be held only once."})
+            places.add(place)
+        return data
+
+    @optimistic
+    def create(self, validated_data):
+        return hold_seats(
+            validated_data["user"],
+            validated_data["flight"],
+            [(seat["row"], seat["seat"]) for seat in validated_data["seats"]],
+            timezone.timedelta(minutes=validated_data["minutes"]),
+        )
+
+
+class QueuedTicketSerializer(serializers.Serializer):
+    flight = serializers.IntegerField(min_value=1)
+    row = serializers.IntegerField(min_value=1)
+    seat = serializers.IntegerField(min_value=1)
+
+
+class BookingRequestSerializer(serializers.ModelSerializer):
+    tickets = QueuedTicketSerializer(many=True, allow_empty=False)
+
+    class Meta:
+        model = BookingRequest
+        fields = ("id", "tickets", "status", "order", "errors", "created_at")
+        read_only_fields = ("status", "order", "errors", "created_at")
+
+    def validate_tickets(self, tickets):
+        flight_ids = {ticket["flight"] for ticket in tickets}
+        missing = flight_ids - set(
+            Flight.objects.filter(pk__in=flight_ids).values_list("pk", flat=True)
+        )
+        if missing:
+            raise ValidationError(
+                [
+                    f'Invalid pk "{pk}" - object does not exist.'
+                    for pk in sorted(missing)
+                ]
+            )
+        return tickets
+
+    def create(self, validated_data):
+        tickets = validated_data["tickets"]
+        return BookingRequest.objects.create(
+            flight_id=min(ticket["flight"] for ticket in tickets), **validated_data
+        )
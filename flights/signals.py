@@ -0,0 +1,173 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Q, QuerySet
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from flights import cache
+from flights.models import (
+    Airport,
+    Crew,
+    AirplaneType,
+    Route,
+    Airplane,
+    Flight,
+    FlightSchedule,
+    Order,
+    Ticket,
+    SeatHold,
+)
+from flights.schedules import SCHEDULE_VERSION
+from flights.search import normalize_city
+from flights.summaries import refresh_summaries, summarize_orders
+
+
+@receiver(pre_save, sender=Airport)
+def set_city_key(sender, instance, **kwargs):
+    instance.city_key = normalize_city(instance.closest_big_city)
+
+
+@receiver(post_save, sender=Ticket)
+def count_created_ticket(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Flight.adjust_seats(instance.flight_id, taken=1)
+
+
+@receiver(post_delete, sender=Ticket)
+def count_deleted_ticket(sender, instance, **kwargs):
+    Flight.adjust_seats(instance.flight_id, taken=-1)
+
+
+@receiver(post_save, sender=Flight)
+@receiver(post_delete, sender=Flight)
+def invalidate_flight(sender, instance, **kwargs):
+    cache.invalidate_flights([instance.pk])
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def invalidate_ticket_flight(sender, instance, **kwargs):
+    cache.invalidate_flights([instance.flight_id])
+
+
+@receiver(post_save, sender=Order)
+def summarize_saved_order(sender, instance, created, raw=False, **kwargs):
+    # New orders are summarized by book_tickets once they have tickets.
+    if raw or not created:
+        summarize_orders(Order.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def summarize_ticket_order(sender, instance, origin=None, **kwargs):
+    # Tickets deleted with their order or user would bring back the summary
+    # the deletion just removed.
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model not in (Order, get_user_model()):
+        summarize_orders(Order.objects.filter(pk=instance.order_id))
+
+
+# Fields order summaries copy from flights, routes and airports.
+SUMMARY_FIELDS = {
+    Airport: ("name",),
+    Route: ("source_id", "destination_id"),
+    Flight: ("route_id", "departure_time"),
+}
+
+
+@receiver(pre_save, sender=Airport)
+@receiver(pre_save, sender=Route)
+@receiver(pre_save, sender=Flight)
+def check_summary_fields(sender, instance, **kwargs):
+    fields = SUMMARY_FIELDS[sender]
+    saved = (
+        sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+        if instance.pk is not None
+        else None
+    )
+    # New rows have no tickets to summarize again.
+    instance._summary_changed = saved is not None and saved != tuple(
+        getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=Flight)
+def summarize_flight_orders(sender, instance, **kwargs):
+    if instance._summary_changed:
+        refresh_summaries(Order.objects.filter(tickets__flight=instance).distinct())
+
+
+@receiver(post_save, sender=Route)
+def summarize_route_orders(sender, instance, **kwargs):
+    if instance._summary_changed:
+        refresh_summaries(
+            Order.objects.filter(tickets__flight__route=instance).distinct()
+        )
+
+
+@receiver(post_save, sender=Airport)
+def summarize_airport_orders(sender, instance, **kwargs):
+    if instance._summary_changed:
+        refresh_summaries(
+            Order.objects.filter(
+                Q(tickets__flight__route__source=instance)
+                | Q(tickets__flight__route__destination=instance)
+            ).distinct()
+        )
+
+
+def touch_flights(flights):
+    """Move updated_at of flights whose nested data changed."""
+    flight_ids = list(flights.values_list("pk", flat=True))
+    Flight.objects.filter(pk__in=flight_ids).update(updated_at=timezone.now())
+    cache.invalidate_flights(flight_ids)
+
+
+@receiver(m2m_changed, sender=Flight.crew.through)
+def touch_flight_crew(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse and action in ("post_add", "post_remove", "post_clear"):
+        touch_flights(Flight.objects.filter(pk=instance.pk))
+    elif reverse and action in ("post_add", "post_remove"):
+        touch_flights(Flight.objects.filter(pk__in=pk_set))
+    elif reverse and action == "pre_clear":
+        touch_flights(Flight.objects.filter(crew=instance))
+
+
+@receiver(post_save, sender=SeatHold)
+@receiver(post_delete, sender=SeatHold)
+def touch_held_flight(sender, instance, **kwargs):
+    touch_flights(Flight.objects.filter(pk=instance.flight_id))
+
+
+@receiver(post_save, sender=Crew)
+@receiver(pre_delete, sender=Crew)
+def touch_crew_flights(sender, instance, **kwargs):
+    touch_flights(Flight.objects.filter(crew=instance))
+
+
+@receiver(post_save, sender=Airport)
+@receiver(post_delete, sender=Airport)
+@receiver(post_save, sender=Crew)
+@receiver(post_delete, sender=Crew)
+@receiver(post_save, sender=AirplaneType)
+@receiver(post_delete, sender=AirplaneType)
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+@receiver(post_save, sender=Airplane)
+@receiver(post_delete, sender=Airplane)
+def invalidate_reference_data(sender, **kwargs):
+    cache.invalidate(cache.REFERENCE_VERSION)
+
+
+@receiver(post_save, sender=FlightSchedule)
+@receiver(post_delete, sender=FlightSchedule)
+@receiver(m2m_changed, sender=FlightSchedule.crew.through)
+def invalidate_schedules(sender, **kwargs):
+    # Cached searches ran before the change, so they have to materialize again.
+    cache.invalidate(SCHEDULE_VERSION, cache.FLIGHT_LIST_VERSION)
@@ -0,0 +1,119 @@
+"""
+Order summaries, the read model the order list and export are served from.
+
+A summary holds the tickets of one order with the route label and
+departure time of their flights, so a page of orders is one query on the
+summary table. Bookings write the summary of their order in their own
+transaction (see ``booking.book_tickets``) and signals rebuild the
+summaries of orders whose tickets, flights, routes or airports change
+through the ORM. Flight, route and airport changes touching more than
+ORDER_SUMMARY_SYNC_LIMIT orders only mark their summaries stale for
+``python manage.py summarize_orders --stale``. Bulk inserts and queryset updates skip signals
+and have to call ``summarize_orders`` themselves; ``python manage.py
+summarize_orders`` rebuilds every summary.
+"""
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db.models import Value
+from django.db.models.functions import Concat
+from rest_framework import serializers
+
+from flights.models import OrderSummary
+
+# Key order of summary tickets, which JSON columns do not keep everywhere.
+TICKET_FIELDS = ("id", "row", "seat", "flight", "route", "departure_time")
+TICKET_LOOKUPS = (
+    "tickets__id",
+    "tickets__row",
+    "tickets__seat",
+    "tickets__flight_id",
+    "ticket_route",
+    "tickets__flight__departure_time",
+)
+
+datetime_field = serializers.DateTimeField()
+
+
+def write_summaries(orders):
+    """
+    Write the summaries of a few orders, with one query reading them with
+    their tickets and one upsert.
+    """
+    rows = (
+        orders.annotate(
+            ticket_route=Concat(
+                "tickets__flight__route__source__name",
+                Value("-"),
+                "tickets__flight__route__destination__name",
+            )
+        )
+        .order_by("pk", "tickets__row", "tickets__seat")
+        .values_list("pk", "user_id", "created_at", *TICKET_LOOKUPS)
+    )
+    summaries = []
+    for (order_id, user_id, created_at), order_rows in groupby(
+        rows, key=itemgetter(0, 1, 2)
+    ):
+        tickets = []
+        for *_, ticket_id, row, seat, flight_id, route, departure in order_rows:
+            if ticket_id is None:
+                continue
+            tickets.append(
+                {
+                    "id": ticket_id,
+                    "row": row,
+                    "seat": seat,
+                    "flight": flight_id,
+                    "route": route,
+                    "departure_time": datetime_field.to_representation(departure),
+                }
+            )
+        summaries.append(
+            OrderSummary(
+                order_id=order_id,
+                user_id=user_id,
+                created_at=created_at,
+                tickets=tickets,
+            )
+        )
+
+    OrderSummary.objects.using(orders.db).bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=["order"],
+        update_fields=["user", "created_at", "tickets", "stale"],
+    )
+    return len(summaries)
+
+
+def summarize_orders(orders, batch_size=1000):
+    """
+    Write the summaries of every order of a queryset, batch_size orders
+    at a time. Returns the number of summaries written.
+    """
+    order_ids = list(orders.order_by().values_list("pk", flat=True))
+    model = orders.model._default_manager.using(orders.db)
+    return sum(
+        write_summaries(model.filter(pk__in=order_ids[start : start + batch_size]))
+        for start in range(0, len(order_ids), batch_size)
+    )
+
+
+def refresh_summaries(orders):
+    """
+    Rebuild the summaries of ``orders`` when there are at most
+    ORDER_SUMMARY_SYNC_LIMIT of them, otherwise mark them stale with one
+    update and leave them to ``summarize_orders --stale``.
+    """
+    limit = settings.ORDER_SUMMARY_SYNC_LIMIT
+    order_ids = list(orders.order_by().values_list("pk", flat=True)[: limit + 1])
+    if len(order_ids) <= limit:
+        return summarize_orders(
+            orders.model._default_manager.using(orders.db).filter(pk__in=order_ids)
+        )
+    OrderSummary.objects.using(orders.db).filter(order__in=orders.values("pk")).update(
+        stale=True
+    )
+    return 0
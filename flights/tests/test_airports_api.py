@@ -61,6 +61,39 @@ class AuthenticatedAirportApiTest(TestCase):
         self.assertIn(serializer1.data, response.data)
         self.assertNotIn(serializer2.data, response.data)
 
+    def test_filter_airports_by_city_prefix_ignores_accents(self):
+        airport1 = sample_airport(name="airport1", closest_big_city="São Paulo")
+        airport2 = sample_airport(name="airport2", closest_big_city="Salvador")
+
+        response = self.client.get(AIRPORT_URL, {"city": "SAO  pa"})
+
+        self.assertIn(AirportSerializer(airport1).data, response.data)
+        self.assertNotIn(AirportSerializer(airport2).data, response.data)
+
+    def test_list_airports_not_modified(self):
+        sample_airport(name="airport1")
+        etag = self.client.get(AIRPORT_URL)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(AIRPORT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_retrieve_airport_etag_changes_on_update(self):
+        airport = sample_airport(name="airport1")
+        first = self.client.get(detail_url(airport.id))
+        airport.name = "airport renamed"
+        airport.save()
+
+        response = self.client.get(
+            detail_url(airport.id), HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+        self.assertIn("Last-Modified", response)
+
     def test_create_airport_forbidden(self):
         payload = {
             "name": "test airport create",
@@ -0,0 +1,169 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from flights.models import (
+    Airport,
+    Route,
+    Flight,
+    AirplaneType,
+    Airplane,
+    Crew,
+    Order,
+    Ticket,
+)
+
+ASYNC_FLIGHTS_URL = reverse("flights:async-flight-list")
+ASYNC_ROUTES_URL = reverse("flights:async-route-list")
+ASYNC_AIRPORTS_URL = reverse("flights:async-airport-list")
+
+
+def async_flight_url(flight_id):
+    return reverse("flights:async-flight-detail", args=[flight_id])
+
+
+class UnauthenticatedAsyncApiTests(TestCase):
+    async def test_auth_required(self):
+        response = await self.async_client.get(ASYNC_FLIGHTS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("WWW-Authenticate", response)
+
+    async def test_invalid_token(self):
+        response = await self.async_client.get(
+            ASYNC_AIRPORTS_URL, AUTHORIZATION="Bearer invalid"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedAsyncApiTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@user.com", "testpassword"
+        )
+        self.headers = {"AUTHORIZATION": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        paris = Airport.objects.create(name="Orly", closest_big_city="Paris")
+        berlin = Airport.objects.create(name="Tegel", closest_big_city="Berlin")
+        self.route = Route.objects.create(
+            source=paris, destination=berlin, distance=1000
+        )
+        Route.objects.create(source=berlin, destination=paris, distance=1000)
+        airplane_type = AirplaneType.objects.create(name="type")
+        airplane = Airplane.objects.create(
+            name="plane", rows=10, seats_in_row=4, airplane_type=airplane_type
+        )
+        crew = Crew.objects.create(first_name="Jane", last_name="Doe")
+        departure_time = timezone.now() + timezone.timedelta(days=2)
+        for hours in range(12):
+            flight = Flight.objects.create(
+                route=self.route,
+                airplane=airplane,
+                departure_time=departure_time + timezone.timedelta(hours=hours),
+                arrival_time=departure_time + timezone.timedelta(hours=hours + 2),
+            )
+            flight.crew.add(crew)
+        self.flight = flight
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=flight, row=1, seat=1, order=order)
+
+    async def test_flight_list_matches_sync_view(self):
+        response = await self.async_client.get(
+            ASYNC_FLIGHTS_URL, {"page": 2}, **self.headers
+        )
+        expected = await self.sync_get(reverse("flights:flight-list"), {"page": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], expected["count"])
+        self.assertEqual(response.json()["results"], expected["results"])
+        self.assertIsNone(response.json()["next"])
+        self.assertTrue(response.json()["previous"].endswith(ASYNC_FLIGHTS_URL))
+
+    async def test_flight_list_page_size_matches_sync_view(self):
+        for params in (
+            {"page_size": 5, "page": 2},
+            {"page_size": 1000},
+            {"page_size": 0},
+            {"page_size": "many"},
+        ):
+            with self.subTest(params):
+                response = await self.async_client.get(
+                    ASYNC_FLIGHTS_URL, params, **self.headers
+                )
+                expected = await self.sync_get(reverse("flights:flight-list"), params)
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json()["results"], expected["results"])
+                self.assertEqual(
+                    response.json()["next"] is None, expected["next"] is None
+                )
+
+    async def test_flight_list_filters(self):
+        response = await self.async_client.get(
+            ASYNC_FLIGHTS_URL, {"source": "berlin"}, **self.headers
+        )
+
+        self.assertEqual(response.json()["count"], 0)
+
+    async def test_flight_list_invalid_date(self):
+        response = await self.async_client.get(
+            ASYNC_FLIGHTS_URL, {"departure_from": "tomorrow"}, **self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("departure_from", response.json())
+
+    async def test_flight_list_invalid_page(self):
+        response = await self.async_client.get(
+            ASYNC_FLIGHTS_URL, {"page": 5}, **self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_flight_detail_matches_sync_view(self):
+        response = await self.async_client.get(
+            async_flight_url(self.flight.id), **self.headers
+        )
+        expected = await self.sync_get(
+            reverse("flights:flight-detail", args=[self.flight.id])
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), expected)
+
+    async def test_flight_detail_not_found(self):
+        response = await self.async_client.get(async_flight_url(0), **self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_route_list_matches_sync_view(self):
+        response = await self.async_client.get(
+            ASYNC_ROUTES_URL, {"source": "paris"}, **self.headers
+        )
+        expected = await self.sync_get(
+            reverse("flights:route-list"), {"source": "paris"}
+        )
+
+        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(response.json(), expected)
+
+    async def test_airport_list_matches_sync_view(self):
+        response = await self.async_client.get(
+            ASYNC_AIRPORTS_URL, {"city": "ber"}, **self.headers
+        )
+        expected = await self.sync_get(reverse("flights:airport-list"), {"city": "ber"})
+
+        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(response.json(), expected)
+
+    async def sync_get(self, url, params=None):
+        response = await sync_to_async(self.client.get)(url, params)
+        return response.json()
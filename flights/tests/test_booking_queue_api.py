@@ -0,0 +1,210 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from flights.booking_queue import pending_flights, process_queue
+from flights.exceptions import BookingConflict
+from flights.models import (
+    Airport,
+    Route,
+    Flight,
+    AirplaneType,
+    Airplane,
+    Order,
+    Ticket,
+    BookingRequest,
+)
+
+ORDER_URL = reverse("flights:order-list")
+
+
+def detail_url(booking_request_id):
+    return reverse("flights:bookingrequest-detail", args=[booking_request_id])
+
+
+class BookingQueueApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@user.com", "testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        airport1 = Airport.objects.create(name="airport1", closest_big_city="Paris")
+        airport2 = Airport.objects.create(name="airport2", closest_big_city="Berlin")
+        self.route = Route.objects.create(
+            source=airport1, destination=airport2, distance=5000
+        )
+        airplane_type = AirplaneType.objects.create(name="type")
+        self.airplane = Airplane.objects.create(
+            name="test", rows=10, seats_in_row=4, airplane_type=airplane_type
+        )
+        self.flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=1),
+            arrival_time=timezone.now() + timezone.timedelta(days=1, hours=2),
+        )
+
+    def queue(self, tickets):
+        return self.client.post(
+            ORDER_URL,
+            {"tickets": tickets},
+            format="json",
+            HTTP_PREFER="respond-async",
+        )
+
+    def process(self):
+        call_command("process_bookings", "--once", stdout=StringIO())
+
+    def test_prefer_async_queues_booking(self):
+        response = self.queue([{"flight": self.flight.id, "row": 1, "seat": 1}])
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], "pending")
+        self.assertTrue(response["Location"].endswith(detail_url(response.data["id"])))
+        self.assertEqual(response["Preference-Applied"], "respond-async")
+        self.assertFalse(Order.objects.exists())
+
+    @override_settings(BOOKING_QUEUE=True)
+    def test_queue_setting_queues_booking(self):
+        response = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 1}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(BookingRequest.objects.count(), 1)
+
+    def test_queue_validates_flights(self):
+        response = self.queue([{"flight": self.flight.id + 100, "row": 1, "seat": 1}])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(BookingRequest.objects.exists())
+
+    def test_worker_books_queued_request(self):
+        response = self.queue(
+            [
+                {"flight": self.flight.id, "row": 1, "seat": 1},
+                {"flight": self.flight.id, "row": 1, "seat": 2},
+            ]
+        )
+
+        self.process()
+        response = self.client.get(detail_url(response.data["id"]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "booked")
+        order = Order.objects.get(pk=response.data["order"])
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(order.tickets.count(), 2)
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_taken, 2)
+
+    def test_worker_fails_conflicting_request(self):
+        first = self.queue([{"flight": self.flight.id, "row": 1, "seat": 1}])
+        second = self.queue([{"flight": self.flight.id, "row": 1, "seat": 1}])
+
+        self.process()
+
+        first = BookingRequest.objects.get(pk=first.data["id"])
+        second = BookingRequest.objects.get(pk=second.data["id"])
+        self.assertEqual(first.status, BookingRequest.Status.BOOKED)
+        self.assertEqual(second.status, BookingRequest.Status.FAILED)
+        self.assertIn("tickets", second.errors)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_worker_books_multiple_flights(self):
+        other_flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=2),
+            arrival_time=timezone.now() + timezone.timedelta(days=2, hours=2),
+        )
+        self.queue(
+            [
+                {"flight": self.flight.id, "row": 1, "seat": 1},
+                {"flight": other_flight.id, "row": 1, "seat": 1},
+            ]
+        )
+        self.queue([{"flight": other_flight.id, "row": 2, "seat": 1}])
+
+        self.process()
+
+        self.assertEqual(
+            BookingRequest.objects.filter(status=BookingRequest.Status.BOOKED).count(),
+            2,
+        )
+        other_flight.refresh_from_db()
+        self.assertEqual(other_flight.seats_taken, 2)
+
+    def test_worker_fails_closed_flight(self):
+        response = self.queue([{"flight": self.flight.id, "row": 1, "seat": 1}])
+        Flight.objects.filter(pk=self.flight.id).update(departure_time=timezone.now())
+
+        self.process()
+
+        booking_request = BookingRequest.objects.get(pk=response.data["id"])
+        self.assertEqual(booking_request.status, BookingRequest.Status.FAILED)
+        self.assertFalse(Order.objects.exists())
+
+    @override_settings(BOOKING_QUEUE_ATTEMPTS=3)
+    def test_request_losing_races_fails_after_attempts(self):
+        response = self.queue([{"flight": self.flight.id, "row": 1, "seat": 1}])
+
+        with mock.patch(
+            "flights.booking_queue.place_order", side_effect=BookingConflict
+        ):
+            counts = [process_queue(batch_size=10) for _ in range(3)]
+
+        booking_request = BookingRequest.objects.get(pk=response.data["id"])
+        self.assertEqual(counts, [0, 0, 1])
+        self.assertEqual(booking_request.attempts, 3)
+        self.assertEqual(booking_request.status, BookingRequest.Status.FAILED)
+        self.assertEqual(booking_request.errors, BookingConflict.default_detail)
+
+    def test_malformed_request_fails_alone(self):
+        malformed = BookingRequest.objects.create(
+            user=self.user, flight=self.flight, tickets=[{"row": 1, "seat": 1}]
+        )
+        response = self.queue([{"flight": self.flight.id, "row": 1, "seat": 1}])
+
+        with self.assertLogs("flights.booking_queue", "ERROR"):
+            self.process()
+
+        malformed.refresh_from_db()
+        self.assertEqual(malformed.status, BookingRequest.Status.FAILED)
+        self.assertIn("KeyError", malformed.errors["detail"])
+        booking_request = BookingRequest.objects.get(pk=response.data["id"])
+        self.assertEqual(booking_request.status, BookingRequest.Status.BOOKED)
+
+    def test_pending_flights_include_every_flight(self):
+        other_flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=2),
+            arrival_time=timezone.now() + timezone.timedelta(days=2, hours=2),
+        )
+        for seat in range(1, 5):
+            self.queue([{"flight": self.flight.id, "row": 1, "seat": seat}])
+        self.queue([{"flight": other_flight.id, "row": 1, "seat": 1}])
+
+        self.assertEqual(pending_flights(), [self.flight.id, other_flight.id])
+
+    def test_other_users_request_is_hidden(self):
+        response = self.queue([{"flight": self.flight.id, "row": 1, "seat": 1}])
+        other_user = get_user_model().objects.create_user(
+            "other@user.com", "testpassword"
+        )
+        self.client.force_authenticate(other_user)
+
+        response = self.client.get(detail_url(response.data["id"]))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
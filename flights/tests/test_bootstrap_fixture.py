@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from flights.management.commands import bootstrap_fixture
+from flights.models import Airport, Crew, DatasetLoad, Flight, Ticket
+
+FIXTURE = "airport_service_db_data.json"
+
+
+class BootstrapFixtureTests(TestCase):
+    def bootstrap(self, *args):
+        stdout = StringIO()
+        call_command("bootstrap_fixture", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_loads_fixture(self):
+        with open(FIXTURE, encoding="utf-8") as source:
+            objects = json.load(source)
+
+        output = self.bootstrap(FIXTURE)
+
+        self.assertIn(f"Loaded {len(objects)} objects", output)
+        self.assertEqual(
+            Airport.objects.count(),
+            sum(obj["model"] == "flights.airport" for obj in objects),
+        )
+        self.assertEqual(get_user_model().objects.count(), 3)
+        self.assertFalse(Airport.objects.filter(city_key="").exists())
+        for flight in Flight.objects.all():
+            self.assertEqual(flight.seats_taken, flight.tickets.count())
+        self.assertEqual(DatasetLoad.objects.get().name, FIXTURE)
+
+    def test_skips_loaded_fixture(self):
+        self.bootstrap(FIXTURE)
+        Crew.objects.all().delete()
+
+        with self.assertNumQueries(1):
+            output = self.bootstrap(FIXTURE)
+
+        self.assertIn("already loaded", output)
+        self.assertFalse(Crew.objects.exists())
+
+    def test_force_reloads_over_existing_rows(self):
+        self.bootstrap(FIXTURE)
+        Airport.objects.filter(pk=1).update(name="Renamed")
+        tickets = Ticket.objects.count()
+
+        self.bootstrap(FIXTURE, "--force")
+
+        self.assertNotEqual(Airport.objects.get(pk=1).name, "Renamed")
+        self.assertEqual(Ticket.objects.count(), tickets)
+
+    def test_streams_small_reads(self):
+        read_size = bootstrap_fixture.READ_SIZE
+        bootstrap_fixture.READ_SIZE = 7
+        self.addCleanup(setattr, bootstrap_fixture, "READ_SIZE", read_size)
+        with open(FIXTURE, encoding="utf-8") as source:
+            expected = json.load(source)
+
+        self.assertEqual(list(bootstrap_fixture.iter_fixture(FIXTURE)), expected)
+
+    def test_truncated_fixture(self):
+        handle, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(handle, "w", encoding="utf-8") as output:
+            output.write('[{"model": "flights.crew", "pk": 1, "fields": {')
+        self.addCleanup(os.remove, path)
+
+        with self.assertRaises(CommandError):
+            self.bootstrap(path)
+        self.assertFalse(DatasetLoad.objects.exists())
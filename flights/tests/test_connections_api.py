@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from flights.models import Airport, Route, Flight, AirplaneType, Airplane
+
+CONNECTIONS_URL = reverse("flights:connection-list")
+
+
+class UnauthenticatedConnectionApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        response = self.client.get(CONNECTIONS_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedConnectionApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@user.com", "testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        paris = Airport.objects.create(name="airport1", closest_big_city="Paris")
+        berlin = Airport.objects.create(name="airport2", closest_big_city="Berlin")
+        rome = Airport.objects.create(name="airport3", closest_big_city="Rome")
+        self.paris_berlin = Route.objects.create(
+            source=paris, destination=berlin, distance=1000
+        )
+        self.berlin_rome = Route.objects.create(
+            source=berlin, destination=rome, distance=1200
+        )
+        self.paris_rome = Route.objects.create(
+            source=paris, destination=rome, distance=1100
+        )
+        airplane_type = AirplaneType.objects.create(name="type")
+        self.airplane = Airplane.objects.create(
+            name="test", rows=10, seats_in_row=4, airplane_type=airplane_type
+        )
+        self.day = (timezone.now() + timezone.timedelta(days=2)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+    def sample_flight(self, route, departure_hours, arrival_hours):
+        return Flight.objects.create(
+            route=route,
+            airplane=self.airplane,
+            departure_time=self.day + timezone.timedelta(hours=departure_hours),
+            arrival_time=self.day + timezone.timedelta(hours=arrival_hours),
+        )
+
+    def test_connections_ranked_by_duration(self):
+        first_leg = self.sample_flight(self.paris_berlin, 8, 10)
+        self.sample_flight(self.berlin_rome, 10.25, 12)
+        second_leg = self.sample_flight(self.berlin_rome, 11, 13)
+        direct = self.sample_flight(self.paris_rome, 9, 15)
+
+        response = self.client.get(
+            CONNECTIONS_URL,
+            {"source": "Paris", "destination": "Rome", "date": self.day.date()},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+        connection, direct_itinerary = response.data
+        self.assertEqual(
+            [leg["flight"] for leg in connection["legs"]],
+            [first_leg.id, second_leg.id],
+        )
+        self.assertEqual(connection["stops"], 1)
+        self.assertEqual(connection["distance"], 2200)
+        self.assertEqual(direct_itinerary["legs"][0]["flight"], direct.id)
+        self.assertEqual(direct_itinerary["legs"][0]["route"], str(self.paris_rome))
+
+    def test_connections_without_stops(self):
+        self.sample_flight(self.paris_berlin, 8, 10)
+        self.sample_flight(self.berlin_rome, 11, 13)
+        direct = self.sample_flight(self.paris_rome, 9, 15)
+
+        response = self.client.get(
+            CONNECTIONS_URL,
+            {
+                "source": "Paris",
+                "destination": "Rome",
+                "date": self.day.date(),
+                "max_stops": 0,
+            },
+        )
+
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["legs"][0]["flight"], direct.id)
+
+    def test_connections_require_date(self):
+        response = self.client.get(
+            CONNECTIONS_URL, {"source": "Paris", "destination": "Rome"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
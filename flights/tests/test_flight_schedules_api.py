@@ -0,0 +1,251 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from io import StringIO
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from flights.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    FlightSchedule,
+    Route,
+)
+
+SCHEDULES_URL = reverse("flights:flightschedule-list")
+FLIGHTS_URL = reverse("flights:flight-list")
+CONNECTIONS_URL = reverse("flights:connection-list")
+MONDAY, WEDNESDAY, FRIDAY = 0b1, 0b100, 0b10000
+
+
+def next_weekday(weekday, weeks=1):
+    """The date of a weekday (0 is Monday) at least `weeks` weeks from now"""
+    today = timezone.now().date() + timedelta(weeks=weeks)
+    return today + timedelta(days=(weekday - today.weekday()) % 7)
+
+
+class FlightScheduleTestMixin:
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@user.com", "testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        paris = Airport.objects.create(name="Orly", closest_big_city="Paris")
+        berlin = Airport.objects.create(name="Tegel", closest_big_city="Berlin")
+        self.route = Route.objects.create(
+            source=paris, destination=berlin, distance=1000
+        )
+        airplane_type = AirplaneType.objects.create(name="type")
+        self.airplane = Airplane.objects.create(
+            name="plane", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        self.pilot = Crew.objects.create(first_name="Anna", last_name="Adler")
+
+    def sample_schedule(self, **params):
+        defaults = {
+            "route": self.route,
+            "airplane": self.airplane,
+            "days_of_week": MONDAY | WEDNESDAY | FRIDAY,
+            "departure_time": time(8, 30),
+            "duration": timedelta(hours=2),
+            "valid_from": timezone.now().date(),
+        }
+        defaults.update(params)
+        schedule = FlightSchedule.objects.create(**defaults)
+        schedule.crew.add(self.pilot)
+        return schedule
+
+
+class AuthenticatedFlightScheduleApiTests(FlightScheduleTestMixin, TestCase):
+    def test_list_schedules(self):
+        self.sample_schedule()
+
+        response = self.client.get(SCHEDULES_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["days_of_week"], [1, 3, 5])
+        self.assertEqual(response.data[0]["crew"], [self.pilot.id])
+
+    def test_create_schedule_forbidden(self):
+        response = self.client.post(SCHEDULES_URL, {})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_search_materializes_scheduled_flight(self):
+        schedule = self.sample_schedule()
+        day = next_weekday(2)
+
+        response = self.client.get(
+            FLIGHTS_URL, {"source": "Paris", "date": day.isoformat()}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        flight = Flight.objects.get()
+        self.assertEqual(flight.schedule, schedule)
+        self.assertEqual(
+            flight.departure_time,
+            datetime.combine(day, time(8, 30), tzinfo=dt_timezone.utc),
+        )
+        self.assertEqual(
+            flight.arrival_time - flight.departure_time, timedelta(hours=2)
+        )
+        self.assertEqual(list(flight.crew.all()), [self.pilot])
+        self.assertEqual(response.data["results"][0]["crew"], [str(self.pilot)])
+
+    def test_repeated_search_does_not_duplicate(self):
+        self.sample_schedule()
+        params = {"source": "Paris", "date": next_weekday(4).isoformat()}
+
+        self.client.get(FLIGHTS_URL, params)
+        Flight.objects.update(updated_at=timezone.now())
+        response = self.client.get(FLIGHTS_URL, params)
+
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(Flight.objects.count(), 1)
+
+    def test_search_outside_schedule(self):
+        self.sample_schedule(valid_until=next_weekday(0) + timedelta(days=3))
+
+        tuesday = self.client.get(
+            FLIGHTS_URL, {"source": "Paris", "date": next_weekday(1).isoformat()}
+        )
+        expired = self.client.get(
+            FLIGHTS_URL,
+            {"source": "Paris", "date": next_weekday(0, weeks=2).isoformat()},
+        )
+
+        self.assertEqual(tuesday.data["count"], 0)
+        self.assertEqual(expired.data["count"], 0)
+        self.assertFalse(Flight.objects.exists())
+
+    def test_search_range_materializes_each_day(self):
+        self.sample_schedule(days_of_week=0b1111111)
+        start = timezone.now().date() + timedelta(days=3)
+
+        response = self.client.get(
+            FLIGHTS_URL,
+            {
+                "source": "Paris",
+                "departure_from": start.isoformat(),
+                "departure_to": (start + timedelta(days=6)).isoformat(),
+            },
+        )
+
+        self.assertEqual(response.data["count"], 7)
+
+    def test_search_materializes_searched_cities_only(self):
+        self.sample_schedule()
+        day = next_weekday(2).isoformat()
+
+        unscoped = self.client.get(FLIGHTS_URL, {"date": day})
+        other_city = self.client.get(FLIGHTS_URL, {"source": "Berlin", "date": day})
+
+        self.assertEqual(unscoped.data["count"], 0)
+        self.assertEqual(other_city.data["count"], 0)
+        self.assertFalse(Flight.objects.exists())
+
+        response = self.client.get(FLIGHTS_URL, {"destination": "Berlin", "date": day})
+        self.assertEqual(response.data["count"], 1)
+
+    def test_local_departure_time(self):
+        self.sample_schedule(time_zone="Europe/Kyiv", days_of_week=0b1111111)
+        day = next_weekday(0)
+
+        self.client.get(FLIGHTS_URL, {"source": "Paris", "date": day.isoformat()})
+
+        departure = Flight.objects.get().departure_time
+        local = departure.astimezone(ZoneInfo("Europe/Kyiv"))
+        self.assertEqual((local.date(), local.hour, local.minute), (day, 8, 30))
+        self.assertNotEqual(departure.astimezone(dt_timezone.utc).hour, 8)
+
+    def test_connections_materialize_scheduled_flights(self):
+        self.sample_schedule()
+        day = next_weekday(0)
+
+        response = self.client.get(
+            CONNECTIONS_URL,
+            {"source": "Paris", "destination": "Berlin", "date": day.isoformat()},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+
+    def test_materialize_schedules_command(self):
+        self.sample_schedule(days_of_week=0b1111111)
+        stdout = StringIO()
+
+        call_command("materialize_schedules", "--days=7", stdout=stdout)
+        call_command("materialize_schedules", "--days=7", stdout=StringIO())
+
+        count = Flight.objects.count()
+        self.assertIn(count, (6, 7))
+        self.assertIn(f"Created {count} scheduled flights", stdout.getvalue())
+        self.assertEqual(Flight.objects.filter(crew=self.pilot).count(), count)
+
+
+class AdminFlightScheduleApiTests(FlightScheduleTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_staff = True
+        self.user.save()
+
+    def payload(self, **params):
+        payload = {
+            "route": self.route.id,
+            "airplane": self.airplane.id,
+            "crew": [self.pilot.id],
+            "days_of_week": [1, 7],
+            "departure_time": "08:30",
+            "duration": "02:00:00",
+            "time_zone": "Europe/Berlin",
+            "valid_from": timezone.now().date().isoformat(),
+        }
+        payload.update(params)
+        return payload
+
+    def test_create_schedule(self):
+        response = self.client.post(SCHEDULES_URL, self.payload(), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        schedule = FlightSchedule.objects.get()
+        self.assertEqual(schedule.days_of_week, 0b1000001)
+        self.assertEqual(schedule.weekdays, [1, 7])
+
+    def test_create_schedule_invalid(self):
+        for params in (
+            {"days_of_week": []},
+            {"days_of_week": [8]},
+            {"time_zone": "Mars/Olympus"},
+            {"duration": "00:00:00"},
+            {"valid_until": "2000-01-01"},
+        ):
+            with self.subTest(params):
+                response = self.client.post(
+                    SCHEDULES_URL, self.payload(**params), format="json"
+                )
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_schedule_change_materializes_again(self):
+        schedule = self.sample_schedule(days_of_week=MONDAY)
+        wednesday = next_weekday(2).isoformat()
+        self.client.get(FLIGHTS_URL, {"source": "Paris", "date": wednesday})
+
+        response = self.client.patch(
+            reverse("flights:flightschedule-detail", args=[schedule.id]),
+            {"days_of_week": [1, 3]},
+            format="json",
+        )
+        flights = self.client.get(FLIGHTS_URL, {"source": "Paris", "date": wednesday})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(flights.data["count"], 1)
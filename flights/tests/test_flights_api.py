@@ -1,13 +1,26 @@
+import base64
 from datetime import datetime
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from flights.models import Airport, Route, Flight, AirplaneType, Airplane, Crew
+from flights.models import (
+    Airport,
+    Route,
+    Flight,
+    AirplaneType,
+    Airplane,
+    Crew,
+    Order,
+    Ticket,
+)
+from flights import cache
 from flights.serializers import FlightListSerializer, FlightRetrieveSerializer
 
 FLIGHTS_URL = reverse("flights:flight-list")
@@ -17,6 +30,10 @@ def detail_url(flight_id):
     return reverse("flights:flight-detail", args=[flight_id])
 
 
+def seatmap_url(flight_id):
+    return reverse("flights:flight-seatmap", args=[flight_id])
+
+
 class UnauthenticatedFlightApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -128,6 +145,57 @@ class AuthenticatedFlightApiTest(TestCase):
         flight = response.data["results"][0]
         self.assertEqual(flight["route"], str(self.route))
 
+    def test_filter_flights_by_departure_range(self):
+        start = timezone.now() + timezone.timedelta(days=1)
+        for days in [0, 3, 6]:
+            Flight.objects.create(
+                route=self.route,
+                airplane=self.airplane,
+                departure_time=start + timezone.timedelta(days=days),
+                arrival_time=start + timezone.timedelta(days=days, hours=3),
+            )
+        response = self.client.get(
+            FLIGHTS_URL,
+            {
+                "departure_from": (start + timezone.timedelta(days=2)).isoformat(),
+                "departure_to": (start + timezone.timedelta(days=4)).date(),
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+
+    def test_filter_flights_by_invalid_date(self):
+        for date in ("2024-13-01", "2024-10-08T12:00"):
+            with self.subTest(date):
+                response = self.client.get(FLIGHTS_URL, {"date": date})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(response.data["date"], "Enter a valid date.")
+
+    def test_route_departure_window_uses_index(self):
+        start = timezone.now() + timezone.timedelta(days=1)
+        Flight.objects.bulk_create(
+            Flight(
+                route=route,
+                airplane=self.airplane,
+                departure_time=start + timezone.timedelta(hours=hours),
+                arrival_time=start + timezone.timedelta(hours=hours + 3),
+            )
+            for hours in range(500)
+            for route in (self.route, self.addition_route)
+        )
+        queryset = Flight.objects.filter(
+            route=self.route,
+            departure_time__gte=start + timezone.timedelta(days=2),
+            departure_time__lt=start + timezone.timedelta(days=3),
+        )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE flights_flight")
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+        self.assertIn("flight_route_departure_idx", queryset.explain())
+
     def test_retrieve_flight(self):
         flight = Flight.objects.create(
             route=self.route,
@@ -141,6 +209,163 @@ class AuthenticatedFlightApiTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
 
+    def test_list_flights_cursor_pagination(self):
+        departure_time = timezone.now() + timezone.timedelta(days=1)
+        for hours in [0, 0, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9]:
+            Flight.objects.create(
+                route=self.route,
+                airplane=self.airplane,
+                departure_time=departure_time + timezone.timedelta(hours=hours),
+                arrival_time=departure_time + timezone.timedelta(days=1),
+            )
+        expected_ids = list(
+            Flight.objects.order_by("-departure_time", "id").values_list(
+                "id", flat=True
+            )
+        )
+
+        first_page = self.client.get(FLIGHTS_URL, {"pagination": "cursor"})
+        second_page = self.client.get(first_page.data["next"])
+        previous_page = self.client.get(second_page.data["previous"])
+
+        self.assertEqual(first_page.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", first_page.data)
+        self.assertIsNone(first_page.data["previous"])
+        self.assertIsNone(second_page.data["next"])
+        self.assertEqual(
+            [flight["id"] for flight in first_page.data["results"]]
+            + [flight["id"] for flight in second_page.data["results"]],
+            expected_ids,
+        )
+        self.assertEqual(previous_page.data["results"], first_page.data["results"])
+
+    def test_list_flights_invalid_cursor(self):
+        response = self.client.get(FLIGHTS_URL, {"cursor": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_flight_seatmap(self):
+        flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=1),
+            arrival_time=timezone.now() + timezone.timedelta(days=2),
+        )
+        order = Order.objects.create(user=self.user)
+        for row, seat in [(1, 1), (1, 8), (2, 1)]:
+            Ticket.objects.create(flight=flight, row=row, seat=seat, order=order)
+
+        response = self.client.get(seatmap_url(flight.id))
+        bitmap = base64.b64decode(response.data["bitmap"])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rows"], 60)
+        self.assertEqual(response.data["seats_in_row"], 8)
+        self.assertEqual(len(bitmap), 60)
+        self.assertEqual(bitmap[:3], bytes([0x81, 0x80, 0x00]))
+
+    def test_flight_seatmap_not_found(self):
+        response = self.client.get(seatmap_url(0))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_flights_served_from_cache(self):
+        flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=1),
+            arrival_time=timezone.now() + timezone.timedelta(days=2),
+        )
+        self.client.get(FLIGHTS_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(FLIGHTS_URL)
+        self.assertEqual(response.data["results"][0]["id"], flight.id)
+
+    def test_ticket_invalidates_cached_flight(self):
+        flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=1),
+            arrival_time=timezone.now() + timezone.timedelta(days=2),
+        )
+        self.client.get(detail_url(flight.id))
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=flight, row=3, seat=3, order=order)
+
+        response = self.client.get(detail_url(flight.id))
+
+        self.assertEqual(len(response.data["taken_places"]), 1)
+
+    def test_retrieve_flight_not_modified_from_cache(self):
+        flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=1),
+            arrival_time=timezone.now() + timezone.timedelta(days=2),
+        )
+        etag = self.client.get(detail_url(flight.id))["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(detail_url(flight.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(FLIGHTS_CACHE_TIMEOUT=0)
+    def test_list_validator_covers_the_page(self):
+        for days in range(1, 4):
+            Flight.objects.create(
+                route=self.route,
+                airplane=self.airplane,
+                departure_time=timezone.now() + timezone.timedelta(days=days),
+                arrival_time=timezone.now() + timezone.timedelta(days=days + 1),
+            )
+        first = self.client.get(FLIGHTS_URL, {"page_size": 2})
+        on_page = [flight["id"] for flight in first.data["results"]]
+        off_page = Flight.objects.exclude(pk__in=on_page).get()
+
+        off_page.save()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                FLIGHTS_URL, {"page_size": 2}, HTTP_IF_NONE_MATCH=first["ETag"]
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        # The row count, the page's keys and the page's version stamps.
+        self.assertEqual(len(queries), 3)
+        self.assertNotIn("JOIN", queries[0]["sql"])
+
+        Flight.objects.get(pk=on_page[0]).save()
+        response = self.client.get(
+            FLIGHTS_URL, {"page_size": 2}, HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(FLIGHTS_CACHE_TIMEOUT=0)
+    def test_stale_entry_served_while_refreshing(self):
+        key = cache.make_key("test", [1], "stale")
+        cache.get_or_set(key, lambda: "stale")
+        cache.get_cache().add(f"{key}:lock", 1)
+
+        self.assertEqual(cache.get_or_set(key, lambda: "fresh"), "stale")
+        cache.get_cache().delete(f"{key}:lock")
+        self.assertEqual(cache.get_or_set(key, lambda: "fresh"), "fresh")
+
+    def test_previous_version_served_while_rebuilding(self):
+        key = cache.make_key("test", "versioned")
+        cache.get_or_set(key, lambda: "old", version=[1])
+        cache.get_cache().add(f"{key}:lock", 1)
+
+        self.assertEqual(cache.get_or_set(key, lambda: "new", version=[2]), "old")
+        cache.get_cache().delete(f"{key}:lock")
+        self.assertEqual(cache.get_or_set(key, lambda: "new", version=[2]), "new")
+        self.assertEqual(cache.get_or_set(key, lambda: "newer", version=[2]), "new")
+
+    def test_miss_keeps_recompute_lock(self):
+        key = cache.make_key("test", [1], "missing")
+        cache.get_cache().add(f"{key}:lock", 1)
+
+        self.assertEqual(cache.get_or_set(key, lambda: "value"), "value")
+
+        self.assertIsNotNone(cache.get_cache().get(f"{key}:lock"))
+
     def test_create_flight_forbidden(self):
         payload = {
             "route": self.route.id,
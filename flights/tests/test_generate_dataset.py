@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from flights.management.commands.benchmark_api import BENCHMARK_ADMIN_EMAIL
+from flights.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+TINY = [
+    "--airports=20",
+    "--routes=40",
+    "--airplane-types=2",
+    "--airplanes=5",
+    "--crew=10",
+    "--users=5",
+    "--flights=30",
+    "--tickets=200",
+]
+
+
+class GenerateDatasetTests(TestCase):
+    def generate(self, *args):
+        call_command("generate_dataset", *TINY, *args, stdout=StringIO())
+
+    def test_generates_requested_counts(self):
+        self.generate("--seed=1")
+
+        self.assertEqual(Airport.objects.count(), 20)
+        self.assertEqual(Route.objects.count(), 40)
+        self.assertEqual(Flight.objects.count(), 30)
+        self.assertTrue(Order.objects.exists())
+        self.assertFalse(Airport.objects.filter(city_key="").exists())
+        for flight in Flight.objects.all():
+            self.assertEqual(flight.seats_taken, flight.tickets.count())
+
+    def test_seed_is_reproducible(self):
+        self.generate("--seed=7")
+        first = list(Ticket.objects.order_by("pk").values_list("row", "seat"))
+        names = list(Airport.objects.order_by("pk").values_list("name", flat=True))
+        for model in (Order, Flight, Route, Airport, Airplane, AirplaneType, Crew):
+            model.objects.all().delete()
+        get_user_model().objects.all().delete()
+
+        self.generate("--seed=7")
+
+        self.assertEqual(
+            list(Ticket.objects.order_by("pk").values_list("row", "seat")), first
+        )
+        self.assertEqual(
+            list(Airport.objects.order_by("pk").values_list("name", flat=True)), names
+        )
+
+    def test_second_run_adds_rows(self):
+        self.generate()
+        self.generate()
+
+        self.assertEqual(Airport.objects.count(), 40)
+        self.assertEqual(AirplaneType.objects.count(), 4)
+        self.assertEqual(Flight.objects.count(), 60)
+
+    def test_benchmark_api_reports_every_scenario(self):
+        self.generate("--seed=1")
+        orders = Order.objects.count()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "run.json")
+
+            call_command(
+                "benchmark_api",
+                "--repeat=1",
+                "--warmup=0",
+                f"--output={output}",
+                stdout=StringIO(),
+            )
+
+            with open(output, encoding="utf-8") as source:
+                results = json.load(source)["results"]
+        self.assertIn("orders.create", {row["name"] for row in results})
+        for row in results:
+            self.assertIn(row["status"], ("200", "201"), row["name"])
+        self.assertEqual(Order.objects.count(), orders)
+        self.assertFalse(
+            get_user_model().objects.filter(email=BENCHMARK_ADMIN_EMAIL).exists()
+        )
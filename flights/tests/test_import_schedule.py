@@ -0,0 +1,126 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from flights.models import Airport, Route, Flight, AirplaneType, Airplane, Crew
+
+
+class ImportScheduleTests(TestCase):
+    def setUp(self):
+        paris = Airport.objects.create(name="Orly", closest_big_city="Paris")
+        berlin = Airport.objects.create(name="Tegel", closest_big_city="Berlin")
+        self.route = Route.objects.create(
+            source=paris, destination=berlin, distance=1000
+        )
+        airplane_type = AirplaneType.objects.create(name="type")
+        self.airplane = Airplane.objects.create(
+            name="A320", rows=10, seats_in_row=4, airplane_type=airplane_type
+        )
+        self.pilot = Crew.objects.create(first_name="Jane", last_name="Doe")
+        self.steward = Crew.objects.create(first_name="John", last_name="Roe")
+        self.departure = timezone.now() + timezone.timedelta(days=10)
+
+    def write(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w", encoding="utf-8") as output:
+            output.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def import_schedule(self, path, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_schedule", path, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def times(self, hours=0):
+        departure = self.departure + timezone.timedelta(hours=hours)
+        arrival = departure + timezone.timedelta(hours=2)
+        return departure.isoformat(), arrival.isoformat()
+
+    def test_import_csv(self):
+        rows = ["source,destination,airplane,departure_time,arrival_time,crew"]
+        for hours in range(5):
+            departure, arrival = self.times(hours)
+            rows.append(
+                f"Orly,Tegel,A320,{departure},{arrival},Jane Doe;{self.steward.id}"
+            )
+        path = self.write(".csv", "\n".join(rows) + "\n")
+
+        stdout, stderr = self.import_schedule(path, "--chunk-size", "2")
+
+        self.assertIn("Imported 5 of 5 rows, rejected 0", stdout)
+        self.assertEqual(Flight.objects.filter(route=self.route).count(), 5)
+        flight = Flight.objects.first()
+        self.assertEqual(
+            set(flight.crew.values_list("id", flat=True)),
+            {self.pilot.id, self.steward.id},
+        )
+
+    def test_import_ndjson_reports_rejected_rows(self):
+        departure, arrival = self.times()
+        rows = [
+            {
+                "route": self.route.id,
+                "airplane": self.airplane.id,
+                "departure_time": departure,
+                "arrival_time": arrival,
+                "crew": [self.pilot.id],
+            },
+            {
+                "route": self.route.id,
+                "airplane": "Unknown",
+                "departure_time": departure,
+                "arrival_time": arrival,
+            },
+            {
+                "route": self.route.id,
+                "airplane": self.airplane.id,
+                "departure_time": arrival,
+                "arrival_time": departure,
+            },
+        ]
+        path = self.write(
+            ".ndjson", "\n".join(json.dumps(row) for row in rows) + "\n{broken\n"
+        )
+        rejects = self.write(".ndjson", "")
+
+        stdout, stderr = self.import_schedule(path, "--rejects", rejects)
+
+        self.assertIn("Imported 1 of 4 rows, rejected 3", stdout)
+        self.assertIn("line 2: Unknown or ambiguous airplane 'Unknown'", stderr)
+        with open(rejects, encoding="utf-8") as source:
+            lines = [json.loads(line)["line"] for line in source]
+        self.assertEqual(lines, [2, 3, 4])
+        self.assertEqual(Flight.objects.get().crew.get(), self.pilot)
+
+    def test_import_rejects_flights_departing_soon(self):
+        departure = timezone.now() + timezone.timedelta(hours=1)
+        arrival = departure + timezone.timedelta(hours=2)
+        path = self.write(
+            ".csv",
+            "route,airplane,departure_time,arrival_time\n"
+            f"{self.route.id},A320,{departure.isoformat()},{arrival.isoformat()}\n",
+        )
+
+        stdout, stderr = self.import_schedule(path)
+
+        self.assertIn("rejected 1", stdout)
+        self.assertFalse(Flight.objects.exists())
+
+    def test_dry_run(self):
+        departure, arrival = self.times()
+        path = self.write(
+            ".csv",
+            "route,airplane,departure_time,arrival_time\n"
+            f"{self.route.id},A320,{departure},{arrival}\n",
+        )
+
+        stdout, stderr = self.import_schedule(path, "--dry-run")
+
+        self.assertIn("Validated 1 of 1 rows", stdout)
+        self.assertFalse(Flight.objects.exists())
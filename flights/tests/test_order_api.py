@@ -1,12 +1,17 @@
 import time
+from unittest import mock
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from flights.booking import book_tickets, optimistic
 from flights.models import Airport, Route, Flight, AirplaneType, Airplane, Order, Ticket
 
 ORDER_URL = reverse("flights:order-list")
@@ -107,3 +112,169 @@ class AuthenticatedOrderApiTest(TestCase):
             flight["available_places"],
             self.airplane.capacity - 1,
         )
+
+    def test_create_order_updates_seats_taken(self):
+        flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=1),
+            arrival_time=timezone.now() + timezone.timedelta(days=2),
+        )
+        payload = {
+            "tickets": [
+                {"flight": flight.id, "row": 1, "seat": 1},
+                {"flight": flight.id, "row": 1, "seat": 2},
+            ]
+        }
+        response = self.client.post(ORDER_URL, payload, format="json")
+        flight.refresh_from_db()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(flight.seats_taken, 2)
+        self.assertEqual(flight.seats_available, self.airplane.capacity - 2)
+
+    def test_create_order_inserts_tickets_in_bulk(self):
+        flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=1),
+            arrival_time=timezone.now() + timezone.timedelta(days=2),
+        )
+        payload = {
+            "tickets": [
+                {"flight": flight.id, "row": 5, "seat": seat} for seat in range(1, 9)
+            ]
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(ORDER_URL, payload, format="json")
+        ticket_inserts = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('INSERT INTO "flights_ticket"')
+        ]
+        flight_selects = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT")
+            and 'FROM "flights_flight"' in query["sql"]
+        ]
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(ticket_inserts), 1)
+        self.assertEqual(len(flight_selects), 1)
+        self.assertEqual(Ticket.objects.filter(flight=flight).count(), 8)
+
+    def test_create_order_for_taken_seat(self):
+        flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=1),
+            arrival_time=timezone.now() + timezone.timedelta(days=2),
+        )
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=flight, row=2, seat=8, order=order)
+        payload = {"tickets": [{"flight": flight.id, "row": 2, "seat": 8}]}
+
+        response = self.client.post(ORDER_URL, payload, format="json")
+        flight.refresh_from_db()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["tickets"],
+            [
+                {
+                    "non_field_errors": [
+                        "The fields flight, row, seat must make a unique set."
+                    ]
+                }
+            ],
+        )
+        self.assertEqual(flight.seats_taken, 1)
+
+    def test_create_order_errors_per_ticket(self):
+        self.flight.departure_time = timezone.now() + timezone.timedelta(days=1)
+        self.flight.save()
+        payload = {
+            "tickets": [
+                {"flight": self.flight.id + 100, "row": 1, "seat": 1},
+                {"flight": self.flight.id, "row": 100, "seat": 1},
+            ]
+        }
+
+        response = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data["tickets"][0]), ["flight"])
+        self.assertEqual(response.data["tickets"][1], {})
+
+        payload["tickets"].pop(0)
+        response = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data["tickets"][0]), ["row"])
+
+    def test_delete_ticket_releases_seat(self):
+        order = Order.objects.create(user=self.user)
+        ticket = Ticket.objects.create(flight=self.flight, row=2, seat=8, order=order)
+        ticket.delete()
+        self.flight.refresh_from_db()
+
+        self.assertEqual(self.flight.seats_taken, 0)
+
+    def test_saving_stale_flight_keeps_seat_counts(self):
+        stale = Flight.objects.get(pk=self.flight.pk)
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=self.flight, row=2, seat=8, order=order)
+
+        stale.arrival_time += timezone.timedelta(hours=1)
+        stale.save()
+        self.flight.refresh_from_db()
+
+        self.assertEqual(self.flight.arrival_time, stale.arrival_time)
+        self.assertEqual(self.flight.seats_taken, 1)
+        self.assertEqual(self.flight.version, 1)
+
+    def test_booking_retries_after_concurrent_change(self):
+        flight = Flight.objects.select_related("airplane").get(
+            pk=Flight.objects.create(
+                route=self.route,
+                airplane=self.airplane,
+                departure_time=timezone.now() + timezone.timedelta(days=1),
+                arrival_time=timezone.now() + timezone.timedelta(days=2),
+            ).pk
+        )
+        # Another booking moves the row version after the flight was loaded.
+        Flight.adjust_seats(flight.pk, taken=1)
+
+        @optimistic
+        def place_order():
+            order = Order.objects.create(user=self.user)
+            book_tickets(order, [{"flight": flight, "row": 1, "seat": 1}])
+            return order
+
+        order = place_order()
+        flight.refresh_from_db()
+
+        self.assertEqual(order.tickets.count(), 1)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(flight.seats_taken, 2)
+        self.assertEqual(flight.version, 2)
+
+    def test_create_order_conflict_after_retries(self):
+        flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=1),
+            arrival_time=timezone.now() + timezone.timedelta(days=2),
+        )
+        payload = {"tickets": [{"flight": flight.id, "row": 1, "seat": 1}]}
+
+        with mock.patch.object(
+            Flight, "adjust_seats", return_value=False
+        ) as adjust_seats:
+            response = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(adjust_seats.call_count, settings.BOOKING_RETRIES + 1)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Ticket.objects.exists())
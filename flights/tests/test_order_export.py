@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from flights.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+EXPORT_URL = reverse("flights:order-export")
+
+
+class UnauthenticatedOrderExportTests(TestCase):
+    def test_auth_required(self):
+        response = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@user.com", "testpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        paris = Airport.objects.create(name="Orly", closest_big_city="Paris")
+        berlin = Airport.objects.create(name="Tegel", closest_big_city="Berlin")
+        route = Route.objects.create(source=paris, destination=berlin, distance=1000)
+        airplane = Airplane.objects.create(
+            name="plane",
+            rows=10,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="type"),
+        )
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=2),
+            arrival_time=timezone.now() + timezone.timedelta(days=2, hours=2),
+        )
+
+        self.older = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=self.older, flight=self.flight, row=1, seat=1)
+        self.newer = Order.objects.create(user=self.user)
+        Order.objects.filter(pk=self.newer.pk).update(
+            created_at=self.older.created_at + timezone.timedelta(hours=1)
+        )
+        Ticket.objects.create(order=self.newer, flight=self.flight, row=2, seat=1)
+        Ticket.objects.create(order=self.newer, flight=self.flight, row=2, seat=2)
+
+        other = get_user_model().objects.create_user("other@user.com", "password")
+        Ticket.objects.create(
+            order=Order.objects.create(user=other), flight=self.flight, row=3, seat=1
+        )
+
+    def export(self, params=None, **headers):
+        response = self.client.get(EXPORT_URL, params, **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        response, content = self.export()
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="orders.ndjson"'
+        )
+        orders = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [order["id"] for order in orders], [self.newer.id, self.older.id]
+        )
+        self.assertEqual(
+            [(ticket["row"], ticket["seat"]) for ticket in orders[0]["tickets"]],
+            [(2, 1), (2, 2)],
+        )
+        self.assertEqual(orders[1]["tickets"][0]["route"], "Orly-Tegel")
+        self.assertEqual(orders[1]["tickets"][0]["flight"], self.flight.id)
+
+    def test_export_csv(self):
+        for params, headers in (
+            ({"format": "csv"}, {}),
+            (None, {"HTTP_ACCEPT": "text/csv"}),
+        ):
+            with self.subTest(params or headers):
+                response, content = self.export(params, **headers)
+
+                self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+                rows = list(csv.DictReader(io.StringIO(content)))
+                self.assertEqual(len(rows), 3)
+                self.assertEqual(
+                    [(row["order"], row["row"], row["seat"]) for row in rows],
+                    [
+                        (str(self.newer.id), "2", "1"),
+                        (str(self.newer.id), "2", "2"),
+                        (str(self.older.id), "1", "1"),
+                    ],
+                )
+
+    def test_export_empty_csv_has_header(self):
+        Order.objects.filter(user=self.user).delete()
+
+        _, content = self.export({"format": "csv"})
+
+        self.assertEqual(
+            content.strip(),
+            "order,created_at,ticket,flight,route,departure_time,row,seat",
+        )
+
+    @override_settings(ORDER_EXPORT_CHUNK_SIZE=1)
+    def test_export_in_small_chunks(self):
+        _, content = self.export()
+
+        self.assertEqual(len(content.splitlines()), 2)
+
+    def test_unsupported_format(self):
+        response = self.client.get(EXPORT_URL, HTTP_ACCEPT="application/xml")
+
+        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
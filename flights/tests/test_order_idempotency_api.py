@@ -0,0 +1,178 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from flights.models import (
+    Airport,
+    Route,
+    Flight,
+    AirplaneType,
+    Airplane,
+    Order,
+    Ticket,
+    IdempotencyKey,
+    BookingRequest,
+)
+
+ORDER_URL = reverse("flights:order-list")
+
+
+class OrderIdempotencyApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@user.com", "testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        airport1 = Airport.objects.create(name="airport1", closest_big_city="Paris")
+        airport2 = Airport.objects.create(name="airport2", closest_big_city="Berlin")
+        route = Route.objects.create(
+            source=airport1, destination=airport2, distance=5000
+        )
+        airplane_type = AirplaneType.objects.create(name="type")
+        airplane = Airplane.objects.create(
+            name="test", rows=10, seats_in_row=4, airplane_type=airplane_type
+        )
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=1),
+            arrival_time=timezone.now() + timezone.timedelta(days=1, hours=2),
+        )
+        self.payload = {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 1}]}
+
+    def post(self, payload, key="key-1"):
+        return self.client.post(
+            ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_repeated_key_replays_response(self):
+        first = self.post(self.payload)
+        second = self.post(self.payload)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 1)
+        record = IdempotencyKey.objects.get()
+        self.assertEqual(record.order_id, first.data["id"])
+
+    def test_queued_response_replays_location(self):
+        first = self.client.post(
+            ORDER_URL,
+            self.payload,
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="key-1",
+            HTTP_PREFER="respond-async",
+        )
+        second = self.client.post(
+            ORDER_URL,
+            self.payload,
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="key-1",
+            HTTP_PREFER="respond-async",
+        )
+
+        self.assertEqual(second.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["Location"], first["Location"])
+        self.assertEqual(second["Preference-Applied"], "respond-async")
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(BookingRequest.objects.count(), 1)
+
+    def test_replay_does_not_touch_tickets(self):
+        self.post(self.payload)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(self.payload)
+        booking_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if '"flights_ticket"' in query["sql"] or '"flights_order"' in query["sql"]
+        ]
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(booking_queries, [])
+
+    def test_different_keys_create_orders(self):
+        self.post(self.payload, key="key-1")
+        payload = {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 2}]}
+        response = self.post(payload, key="key-2")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_key_reused_with_other_request(self):
+        self.post(self.payload)
+        payload = {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 2}]}
+
+        response = self.post(payload)
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_validation_error_is_replayed(self):
+        payload = {"tickets": [{"flight": self.flight.id, "row": 100, "seat": 1}]}
+
+        first = self.post(payload)
+        second = self.post(payload)
+
+        self.assertEqual(first.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(second.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+
+    def test_conflict_is_not_stored(self):
+        other_user = get_user_model().objects.create_user(
+            "other@user.com", "testpassword"
+        )
+        self.client.force_authenticate(other_user)
+        self.client.post(
+            reverse("flights:seathold-list"),
+            {"flight": self.flight.id, "seats": [{"row": 1, "seat": 1}]},
+            format="json",
+        )
+        self.client.force_authenticate(self.user)
+
+        response = self.post(self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_expired_key_books_again(self):
+        self.post(self.payload)
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        payload = {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 2}]}
+
+        response = self.post(payload)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_too_long_key(self):
+        response = self.post(self.payload, key="k" * 256)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_purge_idempotency_keys_command(self):
+        self.post(self.payload, key="key-1")
+        payload = {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 2}]}
+        self.post(payload, key="key-2")
+        IdempotencyKey.objects.filter(key="key-1").update(expires_at=timezone.now())
+
+        call_command("purge_idempotency_keys", stdout=StringIO())
+
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)), ["key-2"]
+        )
+        self.assertEqual(Order.objects.count(), 2)
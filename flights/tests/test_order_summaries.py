@@ -0,0 +1,187 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from flights.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Flight,
+    Order,
+    OrderSummary,
+    Route,
+    Ticket,
+)
+
+ORDER_URL = reverse("flights:order-list")
+
+
+class OrderSummaryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@user.com", "testpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.paris = Airport.objects.create(name="Orly", closest_big_city="Paris")
+        berlin = Airport.objects.create(name="Tegel", closest_big_city="Berlin")
+        self.route = Route.objects.create(
+            source=self.paris, destination=berlin, distance=1000
+        )
+        self.airplane = Airplane.objects.create(
+            name="plane",
+            rows=10,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="type"),
+        )
+        self.flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=2),
+            arrival_time=timezone.now() + timezone.timedelta(days=2, hours=2),
+        )
+
+    def book(self, *seats):
+        response = self.client.post(
+            ORDER_URL,
+            {
+                "tickets": [
+                    {"flight": self.flight.id, "row": row, "seat": seat}
+                    for row, seat in seats
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Order.objects.get(pk=response.data["id"])
+
+    def summary_tickets(self, order):
+        return OrderSummary.objects.get(order=order).tickets
+
+    def test_booking_writes_summary(self):
+        order = self.book((2, 2), (1, 3))
+
+        summary = OrderSummary.objects.get(order=order)
+        self.assertEqual(summary.user, self.user)
+        self.assertEqual(summary.created_at, order.created_at)
+        self.assertEqual(
+            [(ticket["row"], ticket["seat"]) for ticket in summary.tickets],
+            [(1, 3), (2, 2)],
+        )
+        self.assertEqual(summary.tickets[0]["route"], "Orly-Tegel")
+        self.assertEqual(summary.tickets[0]["flight"], self.flight.id)
+
+    def test_list_served_from_summaries(self):
+        for row in range(1, 4):
+            self.book((row, 1), (row, 2))
+
+        with self.assertNumQueries(2):
+            response = self.client.get(ORDER_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        order = response.data["results"][0]
+        self.assertEqual(set(order), {"id", "tickets", "user", "created_at"})
+        self.assertEqual(
+            order["tickets"][0]["departure_time"],
+            self.client.get(
+                reverse("flights:flight-detail", args=[self.flight.id])
+            ).data["departure_time"],
+        )
+
+    def test_deleted_ticket_leaves_summary(self):
+        order = self.book((1, 1), (1, 2))
+
+        Ticket.objects.get(order=order, seat=1).delete()
+
+        self.assertEqual(
+            [ticket["seat"] for ticket in self.summary_tickets(order)], [2]
+        )
+
+    def test_changes_of_flight_and_route_update_summaries(self):
+        order = self.book((1, 1))
+        departure = self.flight.departure_time + timezone.timedelta(hours=1)
+
+        self.flight.departure_time = departure
+        self.flight.save()
+        self.paris.name = "Charles de Gaulle"
+        self.paris.save()
+
+        ticket = self.summary_tickets(order)[0]
+        self.assertEqual(ticket["route"], "Charles de Gaulle-Tegel")
+        self.assertEqual(
+            ticket["departure_time"],
+            departure.isoformat().replace("+00:00", "Z"),
+        )
+
+    def test_saves_keeping_summary_fields_skip_summaries(self):
+        order = self.book((1, 1))
+        Ticket.objects.bulk_create(
+            [Ticket(order=order, flight=self.flight, row=1, seat=2)]
+        )
+
+        self.paris.closest_big_city = "Paris Sud"
+        self.paris.save()
+        self.route.distance = 1100
+        self.route.save()
+        self.flight.arrival_time += timezone.timedelta(hours=1)
+        self.flight.save()
+
+        self.assertEqual(len(self.summary_tickets(order)), 1)
+
+    @override_settings(ORDER_SUMMARY_SYNC_LIMIT=1)
+    def test_large_renames_leave_summaries_to_the_command(self):
+        orders = [self.book((row, 1)) for row in (1, 2)]
+
+        self.paris.name = "Charles de Gaulle"
+        self.paris.save()
+
+        summaries = OrderSummary.objects.filter(order__in=orders)
+        self.assertTrue(all(summary.stale for summary in summaries))
+        self.assertEqual(summaries[0].tickets[0]["route"], "Orly-Tegel")
+
+        call_command("summarize_orders", "--stale", stdout=StringIO())
+
+        for summary in OrderSummary.objects.filter(order__in=orders):
+            self.assertFalse(summary.stale)
+            self.assertEqual(summary.tickets[0]["route"], "Charles de Gaulle-Tegel")
+
+    @override_settings(ORDER_SUMMARY_SYNC_LIMIT=1)
+    def test_large_flight_changes_leave_summaries_to_the_command(self):
+        orders = [self.book((row, 1)) for row in (1, 2)]
+
+        self.flight.departure_time += timezone.timedelta(hours=1)
+        self.flight.save()
+
+        summaries = OrderSummary.objects.filter(order__in=orders)
+        self.assertTrue(all(summary.stale for summary in summaries))
+
+    def test_deleting_orders_deletes_summaries(self):
+        order = self.book((1, 1))
+        self.book((2, 1))
+
+        order.delete()
+        self.assertEqual(OrderSummary.objects.count(), 1)
+
+        self.user.delete()
+        self.assertFalse(OrderSummary.objects.exists())
+
+    def test_command_rebuilds_summaries(self):
+        order = self.book((1, 1))
+        Ticket.objects.bulk_create(
+            [Ticket(order=order, flight=self.flight, row=1, seat=2)]
+        )
+        OrderSummary.objects.all().delete()
+
+        out = StringIO()
+        call_command("summarize_orders", stdout=out)
+
+        self.assertIn("Summarized 1 orders", out.getvalue())
+        self.assertEqual(len(self.summary_tickets(order)), 2)
@@ -0,0 +1,307 @@
+from datetime import time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from flights import cache
+from flights.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    BookingRequest,
+    Crew,
+    Flight,
+    FlightSchedule,
+    HeldSeat,
+    Order,
+    Route,
+    SeatHold,
+    Ticket,
+)
+from flights.schedules import SCHEDULE_VERSION
+from flights.summaries import summarize_orders
+from flights.urls import router
+from flights.views import (
+    AirplaneTypeViewSet,
+    AirplaneViewSet,
+    AirportViewSet,
+    BookingRequestViewSet,
+    ConnectionViewSet,
+    CrewViewSet,
+    FlightScheduleViewSet,
+    FlightViewSet,
+    OrderViewSet,
+    RouteViewSet,
+    SeatHoldViewSet,
+)
+
+PAGE_SIZES = (1, 100)
+
+
+def populate(size):
+    """size rows of every model, all reachable from one user's requests"""
+    user = get_user_model().objects.create_user("budget@user.com", "password")
+    now = timezone.now()
+    airports = Airport.objects.bulk_create(
+        Airport(name=f"airport{i}", closest_big_city=f"City{i}", city_key=f"city{i}")
+        for i in range(size + 1)
+    )
+    routes = Route.objects.bulk_create(
+        Route(source=airports[0], destination=airports[i + 1], distance=100)
+        for i in range(size)
+    )
+    airplane_types = AirplaneType.objects.bulk_create(
+        AirplaneType(name=f"type{i}") for i in range(size)
+    )
+    airplanes = Airplane.objects.bulk_create(
+        Airplane(name=f"plane{i}", rows=10, seats_in_row=10, airplane_type=kind)
+        for i, kind in enumerate(airplane_types)
+    )
+    crew = Crew.objects.bulk_create(
+        Crew(first_name=f"first{i}", last_name=f"last{i}") for i in range(size)
+    )
+    flights = Flight.objects.bulk_create(
+        Flight(
+            route=route,
+            airplane=airplane,
+            departure_time=now + timezone.timedelta(days=2, minutes=i),
+            arrival_time=now + timezone.timedelta(days=2, hours=3, minutes=i),
+        )
+        for i, (route, airplane) in enumerate(zip(routes, airplanes))
+    )
+    Flight.crew.through.objects.bulk_create(
+        Flight.crew.through(flight=flight, crew=member)
+        for flight in flights
+        for member in crew
+    )
+    orders = Order.objects.bulk_create(Order(user=user) for _ in range(size))
+    Ticket.objects.bulk_create(
+        Ticket(order=order, flight=flights[0], row=i // 10 + 1, seat=i % 10 + 1)
+        for i, order in enumerate(orders)
+    )
+    summarize_orders(Order.objects.all())
+    hold = SeatHold.objects.create(
+        flight=flights[-1], user=user, expires_at=now + timezone.timedelta(minutes=10)
+    )
+    HeldSeat.objects.bulk_create(
+        HeldSeat(hold=hold, flight=flights[-1], row=i // 10 + 1, seat=i % 10 + 1)
+        for i in range(size)
+    )
+    booking = BookingRequest.objects.create(
+        user=user,
+        flight=flights[0],
+        tickets=[{"flight": flights[0].pk, "row": 1, "seat": 1}] * size,
+    )
+    schedules = FlightSchedule.objects.bulk_create(
+        FlightSchedule(
+            route=route,
+            airplane=airplanes[0],
+            departure_time=time(8),
+            duration=timedelta(hours=2),
+            # Expired, searches only look them up: creating their flights
+            # costs queries per insert batch.
+            valid_from=now.date() - timedelta(days=30),
+            valid_until=now.date() - timedelta(days=1),
+        )
+        for route in routes
+    )
+    FlightSchedule.crew.through.objects.bulk_create(
+        FlightSchedule.crew.through(flightschedule=schedules[0], crew=member)
+        for member in crew
+    )
+    # bulk_create sends no signals, so move the cache versions by hand
+    cache.invalidate(
+        cache.REFERENCE_VERSION, cache.FLIGHT_LIST_VERSION, SCHEDULE_VERSION
+    )
+    return {
+        "user": user,
+        "airport": airports[0],
+        "route": routes[0],
+        "crew": crew[0],
+        "flight": flights[0],
+        "schedule": schedules[0],
+        "hold": hold,
+        "booking": booking,
+        "date": flights[0].departure_time.date().isoformat(),
+    }
+
+
+def scenarios(data, size):
+    """(name, viewset, action, url, params) of every budgeted read action"""
+    page = {"page_size": size}
+    flight = data["flight"]
+    return [
+        ("airports", AirportViewSet, "list", reverse("flights:airport-list"), {}),
+        (
+            "airport",
+            AirportViewSet,
+            "retrieve",
+            reverse("flights:airport-detail", args=[data["airport"].pk]),
+            {},
+        ),
+        ("crews", CrewViewSet, "list", reverse("flights:crew-list"), {}),
+        (
+            "crew",
+            CrewViewSet,
+            "retrieve",
+            reverse("flights:crew-detail", args=[data["crew"].pk]),
+            {},
+        ),
+        (
+            "airplane types",
+            AirplaneTypeViewSet,
+            "list",
+            reverse("flights:airplanetype-list"),
+            {},
+        ),
+        ("routes", RouteViewSet, "list", reverse("flights:route-list"), {}),
+        (
+            "route",
+            RouteViewSet,
+            "retrieve",
+            reverse("flights:route-detail", args=[data["route"].pk]),
+            {},
+        ),
+        ("airplanes", AirplaneViewSet, "list", reverse("flights:airplane-list"), {}),
+        ("flights", FlightViewSet, "list", reverse("flights:flight-list"), page),
+        (
+            "flight search",
+            FlightViewSet,
+            "list",
+            reverse("flights:flight-list"),
+            {"source": "City0", "destination": "City1", "date": data["date"], **page},
+        ),
+        (
+            "flights by cursor",
+            FlightViewSet,
+            "list",
+            reverse("flights:flight-list"),
+            {"pagination": "cursor", **page},
+        ),
+        (
+            "flight",
+            FlightViewSet,
+            "retrieve",
+            reverse("flights:flight-detail", args=[flight.pk]),
+            {},
+        ),
+        (
+            "seat map",
+            FlightViewSet,
+            "seatmap",
+            reverse("flights:flight-seatmap", args=[flight.pk]),
+            {},
+        ),
+        (
+            "connections",
+            ConnectionViewSet,
+            "list",
+            reverse("flights:connection-list"),
+            {"source": "City0", "destination": "City1", "date": data["date"]},
+        ),
+        (
+            "schedules",
+            FlightScheduleViewSet,
+            "list",
+            reverse("flights:flightschedule-list"),
+            {},
+        ),
+        (
+            "schedule",
+            FlightScheduleViewSet,
+            "retrieve",
+            reverse("flights:flightschedule-detail", args=[data["schedule"].pk]),
+            {},
+        ),
+        ("orders", OrderViewSet, "list", reverse("flights:order-list"), page),
+        (
+            "orders by cursor",
+            OrderViewSet,
+            "list",
+            reverse("flights:order-list"),
+            {"pagination": "cursor", **page},
+        ),
+        (
+            "orders export",
+            OrderViewSet,
+            "export",
+            reverse("flights:order-export"),
+            {},
+        ),
+        (
+            "orders export csv",
+            OrderViewSet,
+            "export",
+            reverse("flights:order-export"),
+            {"format": "csv"},
+        ),
+        (
+            "hold",
+            SeatHoldViewSet,
+            "retrieve",
+            reverse("flights:seathold-detail", args=[data["hold"].pk]),
+            {},
+        ),
+        (
+            "booking request",
+            BookingRequestViewSet,
+            "retrieve",
+            reverse("flights:bookingrequest-detail", args=[data["booking"].pk]),
+            {},
+        ),
+    ]
+
+
+@override_settings(FLIGHTS_CACHE_TIMEOUT=0)
+@mock.patch.object(APIView, "throttle_classes", ())
+class QueryBudgetTests(TestCase):
+    def count_queries(self, size):
+        """Query counts of every scenario against size rows of each model"""
+        counts = {}
+        with transaction.atomic():
+            data = populate(size)
+            client = APIClient()
+            client.force_authenticate(data["user"])
+            data["user"].is_staff = True
+
+            for name, viewset, action, url, params in scenarios(data, size):
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url, params)
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                self.assertEqual(response.status_code, status.HTTP_200_OK, name)
+                counts[name] = (viewset, action, len(queries))
+            transaction.set_rollback(True)
+        return counts
+
+    def test_query_counts_within_budget(self):
+        small, large = (self.count_queries(size) for size in PAGE_SIZES)
+
+        for name, (viewset, action, count) in small.items():
+            with self.subTest(name):
+                budget = viewset.get_query_budget(action)
+                self.assertIsNotNone(budget, f"{viewset.__name__}.{action}")
+                self.assertEqual(large[name][2], count, "grows with page size")
+                self.assertLessEqual(count, budget)
+
+    @override_settings(FAST_LIST_SERIALIZATION=True)
+    def test_values_list_counts_within_budget(self):
+        self.test_query_counts_within_budget()
+
+    def test_every_read_action_has_budget(self):
+        for prefix, viewset, basename in router.registry:
+            for route in router.get_routes(viewset):
+                # route.mapping.get is the @action decorator of extra actions
+                action = dict(route.mapping).get("get")
+                if action is None or not hasattr(viewset, action):
+                    continue
+                with self.subTest(f"{prefix} {action}"):
+                    self.assertIsNotNone(viewset.get_query_budget(action))
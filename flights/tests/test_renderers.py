@@ -0,0 +1,145 @@
+import datetime
+import decimal
+import json
+import uuid
+
+import msgpack
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from flights.models import Airplane, AirplaneType, Airport, Flight, Route
+from flights.renderers import (
+    CSVRenderer,
+    MessagePackRenderer,
+    NDJSONRenderer,
+    ORJSONRenderer,
+)
+
+AIRPORTS_URL = reverse("flights:airport-list")
+FLIGHTS_URL = reverse("flights:flight-list")
+MSGPACK = "application/msgpack"
+
+
+class RendererTests(TestCase):
+    def setUp(self):
+        self.data = {
+            "departure": datetime.datetime(
+                2024, 10, 8, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc
+            ),
+            "naive": datetime.datetime(2024, 10, 8, 12, 30),
+            "date": datetime.date(2024, 10, 8),
+            "time": datetime.time(8, 30, 0, 500000),
+            "duration": datetime.timedelta(hours=2, minutes=5),
+            "price": decimal.Decimal("19.90"),
+            "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "name": "Zürich\u2028Kyiv\u2029",
+            "seats": [{"row": 1, "seat": 2}, {"row": 1, "seat": 3}],
+            1: None,
+        }
+
+    def test_orjson_matches_json_renderer(self):
+        self.assertEqual(
+            ORJSONRenderer().render(self.data), JSONRenderer().render(self.data)
+        )
+
+    def test_orjson_indent(self):
+        media_type = "application/json; indent=2"
+
+        self.assertEqual(
+            ORJSONRenderer().render(self.data, media_type),
+            JSONRenderer().render(self.data, media_type),
+        )
+
+    def test_msgpack_values_encoded_like_json(self):
+        self.assertEqual(
+            msgpack.unpackb(
+                MessagePackRenderer().render(self.data), strict_map_key=False
+            ),
+            {
+                (int(key) if key.isdigit() else key): value
+                for key, value in json.loads(JSONRenderer().render(self.data)).items()
+            },
+        )
+
+    def test_streaming_renderers(self):
+        items = [{"id": i, "seats": [i, i + 1]} for i in range(5)]
+        renderer = NDJSONRenderer()
+        renderer.batch_size = 2
+
+        chunks = list(renderer.render_stream(iter(items)))
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(
+            [json.loads(line) for line in b"".join(chunks).splitlines()], items
+        )
+        self.assertEqual(
+            CSVRenderer().render(items[:2]),
+            b'id,seats\r\n0,"[0,1]"\r\n1,"[1,2]"\r\n',
+        )
+
+
+@override_settings(FLIGHTS_CACHE_TIMEOUT=0)
+class ContentNegotiationApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@user.com", "testpassword", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        paris = Airport.objects.create(name="Orly", closest_big_city="Paris")
+        berlin = Airport.objects.create(name="Tegel", closest_big_city="Berlin")
+        route = Route.objects.create(source=paris, destination=berlin, distance=1000)
+        airplane = Airplane.objects.create(
+            name="plane",
+            rows=10,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="type"),
+        )
+        Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=2),
+            arrival_time=timezone.now() + timezone.timedelta(days=2, hours=2),
+        )
+
+    def test_msgpack_response(self):
+        as_json = self.client.get(FLIGHTS_URL)
+        as_msgpack = self.client.get(FLIGHTS_URL, HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual(as_msgpack.status_code, status.HTTP_200_OK)
+        self.assertEqual(as_msgpack["Content-Type"], MSGPACK)
+        self.assertEqual(
+            msgpack.unpackb(as_msgpack.content), json.loads(as_json.content)
+        )
+        self.assertNotEqual(as_msgpack["ETag"], as_json["ETag"])
+
+    def test_msgpack_format_param(self):
+        response = self.client.get(FLIGHTS_URL, {"format": "msgpack"})
+
+        self.assertEqual(response["Content-Type"], MSGPACK)
+
+    def test_msgpack_request_body(self):
+        response = self.client.post(
+            AIRPORTS_URL,
+            msgpack.packb({"name": "Tegel 2", "closest_big_city": "Berlin"}),
+            content_type=MSGPACK,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Airport.objects.filter(name="Tegel 2").exists())
+
+    def test_malformed_bodies(self):
+        for body, content_type in (
+            (b"\xc1", MSGPACK),
+            (b'{"name": ', "application/json"),
+        ):
+            with self.subTest(content_type):
+                response = self.client.post(
+                    AIRPORTS_URL, body, content_type=content_type
+                )
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
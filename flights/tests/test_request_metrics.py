@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from flights.models import Airport
+
+AIRPORTS_URL = reverse("flights:airport-list")
+METRICS_URL = reverse("metrics")
+METRICS_MIDDLEWARE = "flights.middleware.RequestMetricsMiddleware"
+
+
+@override_settings(REQUEST_METRICS=True, METRICS_TOKEN=None)
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@user.com", "testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        Airport.objects.create(name="Orly", closest_big_city="Paris")
+
+    def test_server_timing_for_staff(self):
+        self.user.is_staff = True
+
+        response = self.client.get(AIRPORTS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = response["Server-Timing"]
+        self.assertIn("total;dur=", timing)
+        self.assertIn("db;dur=", timing)
+        self.assertIn('desc="2 queries"', timing)
+        self.assertIn("serializer;dur=", timing)
+
+    def test_no_server_timing_for_customers(self):
+        response = self.client.get(AIRPORTS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Server-Timing", response)
+
+    def test_metrics_aggregated_per_view_and_action(self):
+        self.client.get(AIRPORTS_URL)
+        self.client.get(AIRPORTS_URL)
+
+        response = self.client.get(METRICS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        labels = 'view="flights:airport-list",action="list",method="GET"'
+        self.assertIn(f'http_requests_total{{{labels},status="200"}}', body)
+        self.assertIn(f"http_request_duration_seconds_bucket{{{labels},le=", body)
+        self.assertIn(f'http_request_db_queries_bucket{{{labels},le="2"}}', body)
+        self.assertIn(f"http_request_serializer_duration_seconds_sum{{{labels}}}", body)
+        self.assertIn(f"http_response_size_bytes_count{{{labels}}}", body)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        self.assertEqual(
+            self.client.get(METRICS_URL).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        response = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(REQUEST_METRICS=False)
+class DisabledRequestMetricsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@user.com", "testpassword", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_middleware_not_used(self):
+        self.assertIn(METRICS_MIDDLEWARE, settings.MIDDLEWARE)
+
+        response = self.client.get(AIRPORTS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(
+            self.client.get(METRICS_URL).status_code, status.HTTP_404_NOT_FOUND
+        )
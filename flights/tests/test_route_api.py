@@ -103,6 +103,21 @@ class AuthenticatedRouteApiTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
 
+    def test_retrieve_route_etag_follows_airports(self):
+        route = Route.objects.create(
+            source=self.airport1, destination=self.airport2, distance=30
+        )
+        etag = self.client.get(detail_url(route.id))["ETag"]
+
+        not_modified = self.client.get(detail_url(route.id), HTTP_IF_NONE_MATCH=etag)
+        self.airport2.closest_big_city = "Munich"
+        self.airport2.save()
+        modified = self.client.get(detail_url(route.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(modified.status_code, status.HTTP_200_OK)
+        self.assertEqual(modified.data["destination"]["closest_big_city"], "Munich")
+
 
 class AdminRouteApiTest(TestCase):
     def setUp(self):
@@ -0,0 +1,232 @@
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from flights.models import (
+    Airport,
+    Route,
+    Flight,
+    AirplaneType,
+    Airplane,
+    Order,
+    Ticket,
+    SeatHold,
+    HeldSeat,
+)
+
+HOLD_URL = reverse("flights:seathold-list")
+ORDER_URL = reverse("flights:order-list")
+FLIGHTS_URL = reverse("flights:flight-list")
+
+
+def detail_url(hold_id):
+    return reverse("flights:seathold-detail", args=[hold_id])
+
+
+def confirm_url(hold_id):
+    return reverse("flights:seathold-confirm", args=[hold_id])
+
+
+def seatmap_url(flight_id):
+    return reverse("flights:flight-seatmap", args=[flight_id])
+
+
+class UnauthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        response = self.client.post(HOLD_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@user.com", "testpassword"
+        )
+        self.other_user = get_user_model().objects.create_user(
+            "other@user.com", "testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        airport1 = Airport.objects.create(name="airport1", closest_big_city="Paris")
+        airport2 = Airport.objects.create(name="airport2", closest_big_city="Berlin")
+        route = Route.objects.create(
+            source=airport1, destination=airport2, distance=5000
+        )
+        airplane_type = AirplaneType.objects.create(name="type")
+        airplane = Airplane.objects.create(
+            name="test", rows=2, seats_in_row=4, airplane_type=airplane_type
+        )
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=1),
+            arrival_time=timezone.now() + timezone.timedelta(days=1, hours=2),
+        )
+
+    def hold(self, seats, user=None, minutes=None):
+        self.client.force_authenticate(user or self.user)
+        payload = {"flight": self.flight.id, "seats": seats}
+        if minutes is not None:
+            payload["minutes"] = minutes
+        response = self.client.post(HOLD_URL, payload, format="json")
+        self.client.force_authenticate(self.user)
+        return response
+
+    def test_hold_seats(self):
+        response = self.hold([{"row": 1, "seat": 1}, {"row": 2, "seat": 4}])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["seats"]), 2)
+        hold = SeatHold.objects.get(pk=response.data["id"])
+        self.assertEqual(hold.user, self.user)
+        self.assertEqual(hold.seats.count(), 2)
+
+    def test_hold_reduces_available_places(self):
+        self.hold([{"row": 1, "seat": 1}, {"row": 1, "seat": 2}])
+
+        response = self.client.get(FLIGHTS_URL)
+
+        self.assertEqual(response.data["results"][0]["available_places"], 6)
+
+    def available_places_later(self, minutes, **headers):
+        """The flight list as it is answered some minutes from now."""
+        later = timezone.now() + timezone.timedelta(minutes=minutes)
+        with mock.patch("django.utils.timezone.now", return_value=later), mock.patch(
+            "time.time", return_value=later.timestamp()
+        ):
+            return self.client.get(FLIGHTS_URL, **headers)
+
+    def test_cached_list_frees_seats_when_hold_expires(self):
+        self.hold([{"row": 1, "seat": 1}], minutes=1)
+        self.assertEqual(
+            self.client.get(FLIGHTS_URL).data["results"][0]["available_places"], 7
+        )
+
+        response = self.available_places_later(2)
+
+        self.assertEqual(response.data["results"][0]["available_places"], 8)
+
+    @override_settings(FLIGHTS_CACHE_TIMEOUT=0)
+    def test_list_etag_changes_when_hold_expires(self):
+        self.hold([{"row": 1, "seat": 1}], minutes=1)
+        etag = self.client.get(FLIGHTS_URL)["ETag"]
+
+        response = self.available_places_later(2, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["available_places"], 8)
+
+    def test_seatmap_shows_held_seats(self):
+        self.hold([{"row": 1, "seat": 1}])
+
+        response = self.client.get(seatmap_url(self.flight.id))
+
+        self.assertEqual(response.data["bitmap"], "AA==")
+        self.assertEqual(response.data["held"], "gA==")
+
+    def test_held_seat_conflict(self):
+        self.hold([{"row": 1, "seat": 1}], user=self.other_user)
+
+        response = self.hold([{"row": 1, "seat": 2}, {"row": 1, "seat": 1}])
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(SeatHold.objects.count(), 1)
+
+    def test_sold_seat_conflict(self):
+        order = Order.objects.create(user=self.other_user)
+        Ticket.objects.create(flight=self.flight, row=1, seat=1, order=order)
+
+        response = self.hold([{"row": 1, "seat": 1}])
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_hold_seat_out_of_range(self):
+        response = self.hold([{"row": 3, "seat": 1}])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hold_duration_is_limited(self):
+        response = self.hold([{"row": 1, "seat": 1}], minutes=10_000)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_hold_frees_seats(self):
+        response = self.hold([{"row": 1, "seat": 1}], user=self.other_user)
+        SeatHold.objects.filter(pk=response.data["id"]).update(
+            expires_at=timezone.now()
+        )
+
+        response = self.hold([{"row": 1, "seat": 1}])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.count(), 1)
+
+    def test_order_rejects_seat_held_by_other_user(self):
+        self.hold([{"row": 1, "seat": 1}], user=self.other_user)
+
+        response = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 1}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_confirm_hold(self):
+        response = self.hold([{"row": 1, "seat": 1}, {"row": 1, "seat": 2}])
+
+        response = self.client.post(confirm_url(response.data["id"]))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(pk=response.data["id"])
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(order.tickets.count(), 2)
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertFalse(HeldSeat.objects.exists())
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_taken, 2)
+
+    def test_confirm_expired_hold(self):
+        response = self.hold([{"row": 1, "seat": 1}])
+        SeatHold.objects.update(expires_at=timezone.now())
+
+        response = self.client.post(confirm_url(response.data["id"]))
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_release_hold(self):
+        response = self.hold([{"row": 1, "seat": 1}])
+
+        response = self.client.delete(detail_url(response.data["id"]))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(HeldSeat.objects.exists())
+
+    def test_other_users_hold_is_hidden(self):
+        response = self.hold([{"row": 1, "seat": 1}], user=self.other_user)
+
+        response = self.client.post(confirm_url(response.data["id"]))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_release_seat_holds_command(self):
+        self.hold([{"row": 1, "seat": 1}])
+        self.hold([{"row": 1, "seat": 2}])
+        SeatHold.objects.filter(seats__seat=1).update(expires_at=timezone.now())
+
+        call_command("release_seat_holds", stdout=StringIO())
+
+        self.assertEqual(list(HeldSeat.objects.values_list("seat", flat=True)), [2])
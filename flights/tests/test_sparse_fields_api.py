@@ -0,0 +1,174 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from flights.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+FLIGHTS_URL = reverse("flights:flight-list")
+ROUTES_URL = reverse("flights:route-list")
+ORDERS_URL = reverse("flights:order-list")
+
+
+def flight_detail_url(flight_id):
+    return reverse("flights:flight-detail", args=[flight_id])
+
+
+@override_settings(FLIGHTS_CACHE_TIMEOUT=0)
+class SparseFieldsApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@user.com", "testpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.paris = Airport.objects.create(name="Orly", closest_big_city="Paris")
+        berlin = Airport.objects.create(name="Tegel", closest_big_city="Berlin")
+        route = Route.objects.create(
+            source=self.paris, destination=berlin, distance=1000
+        )
+        airplane_type = AirplaneType.objects.create(name="Boeing")
+        airplane = Airplane.objects.create(
+            name="plane", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        self.pilot = Crew.objects.create(first_name="Anna", last_name="Adler")
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=2),
+            arrival_time=timezone.now() + timezone.timedelta(days=2, hours=2),
+        )
+        self.flight.crew.add(self.pilot)
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=self.flight, row=1, seat=1)
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, [query["sql"] for query in queries]
+
+    def assertNotSelected(self, column, queries):
+        self.assertFalse(any(column in sql for sql in queries), column)
+
+    def test_flight_list_fields(self):
+        full, full_queries = self.get(FLIGHTS_URL)
+        sparse, sparse_queries = self.get(
+            FLIGHTS_URL, {"fields": "id,departure_time,available_places"}
+        )
+
+        self.assertEqual(
+            list(sparse.data["results"][0]),
+            ["id", "departure_time", "available_places"],
+        )
+        self.assertEqual(sparse.data["results"][0]["available_places"], 59)
+        self.assertLess(len(sparse_queries), len(full_queries))
+        self.assertNotSelected('"flights_route"."distance"', sparse_queries)
+        self.assertNotSelected('"flights_crew"', sparse_queries)
+
+    def test_flight_list_without_available_places(self):
+        _, queries = self.get(FLIGHTS_URL, {"fields": "id,departure_time"})
+
+        self.assertNotSelected('"flights_heldseat"', queries)
+        self.assertNotSelected('"flights_airplane"."rows"', queries)
+
+    def test_flight_list_expand(self):
+        response, _ = self.get(FLIGHTS_URL, {"expand": "route,airplane,crew"})
+
+        flight = response.data["results"][0]
+        self.assertEqual(
+            flight["route"],
+            {
+                "id": self.flight.route_id,
+                "source": "Paris",
+                "destination": "Berlin",
+                "distance": 1000,
+            },
+        )
+        self.assertEqual(flight["airplane"]["airplane_type"]["name"], "Boeing")
+        self.assertEqual(
+            flight["crew"],
+            [{"id": self.pilot.id, "first_name": "Anna", "last_name": "Adler"}],
+        )
+        self.assertEqual(flight["available_places"], 59)
+
+    def test_flight_list_expand_keeps_query_count(self):
+        Flight.objects.create(
+            route=self.flight.route,
+            airplane=self.flight.airplane,
+            departure_time=timezone.now() + timezone.timedelta(days=3),
+            arrival_time=timezone.now() + timezone.timedelta(days=3, hours=2),
+        )
+        _, one_page = self.get(FLIGHTS_URL, {"expand": "route,airplane,crew"})
+        _, default = self.get(FLIGHTS_URL)
+
+        self.assertEqual(len(one_page), len(default))
+
+    def test_flight_retrieve_fields(self):
+        full, full_queries = self.get(flight_detail_url(self.flight.id))
+        sparse, sparse_queries = self.get(
+            flight_detail_url(self.flight.id), {"fields": "id,taken_places"}
+        )
+
+        self.assertEqual(
+            sparse.data, {"id": self.flight.id, "taken_places": [{"row": 1, "seat": 1}]}
+        )
+        self.assertLess(len(sparse_queries), len(full_queries))
+        self.assertNotSelected('"flights_airplanetype"."name"', sparse_queries)
+        self.assertNotSelected('"flights_crew"', sparse_queries)
+
+    def test_route_list_fields_and_expand(self):
+        sparse, queries = self.get(ROUTES_URL, {"fields": "id,distance"})
+        expanded, _ = self.get(ROUTES_URL, {"expand": "source"})
+
+        self.assertEqual(list(sparse.data[0]), ["id", "distance"])
+        self.assertNotSelected('"flights_airport"."closest_big_city"', queries)
+        self.assertEqual(
+            expanded.data[0]["source"],
+            {"id": self.paris.id, "name": "Orly", "closest_big_city": "Paris"},
+        )
+        self.assertEqual(expanded.data[0]["destination"], "Berlin")
+
+    def test_order_list_fields(self):
+        response, queries = self.get(ORDERS_URL, {"fields": "id,created_at"})
+
+        self.assertEqual(list(response.data["results"][0]), ["id", "created_at"])
+        self.assertNotSelected('"flights_ticket"', queries)
+
+    def test_unknown_fields(self):
+        for params in (
+            {"fields": "id,price"},
+            {"expand": "departure_time"},
+            {"expand": "taken_places"},
+        ):
+            with self.subTest(params):
+                response = self.client.get(FLIGHTS_URL, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(FAST_LIST_SERIALIZATION=True)
+    def test_fast_list_serialization_falls_back(self):
+        response, _ = self.get(FLIGHTS_URL, {"fields": "id", "expand": "route"})
+
+        self.assertEqual(list(response.data["results"][0]), ["id"])
+
+    @override_settings(FLIGHTS_CACHE_TIMEOUT=300)
+    def test_cached_responses_per_fields(self):
+        full, _ = self.get(FLIGHTS_URL)
+        sparse, _ = self.get(FLIGHTS_URL, {"fields": "id"})
+
+        self.assertIn("crew", full.data["results"][0])
+        self.assertEqual(list(sparse.data["results"][0]), ["id"])
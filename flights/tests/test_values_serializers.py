@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from flights.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    HeldSeat,
+    Order,
+    Route,
+    SeatHold,
+    Ticket,
+)
+
+FLIGHTS_URL = reverse("flights:flight-list")
+ROUTES_URL = reverse("flights:route-list")
+AIRPLANES_URL = reverse("flights:airplane-list")
+
+
+@override_settings(FLIGHTS_CACHE_TIMEOUT=0)
+class ValuesListSerializationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@user.com", "testpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        paris = Airport.objects.create(name="Orly", closest_big_city="Paris")
+        berlin = Airport.objects.create(name="Tegel", closest_big_city="Berlin")
+        rome = Airport.objects.create(name="Fiumicino", closest_big_city="Rome")
+        routes = [
+            Route.objects.create(source=paris, destination=berlin, distance=1000),
+            Route.objects.create(source=berlin, destination=rome, distance=1200),
+        ]
+        airplane_types = [
+            AirplaneType.objects.create(name="Airbus"),
+            AirplaneType.objects.create(name="Boeing"),
+        ]
+        airplanes = [
+            Airplane.objects.create(
+                name=f"plane{i}", rows=10 + i, seats_in_row=6, airplane_type=kind
+            )
+            for i, kind in enumerate(airplane_types)
+        ]
+        crew = [
+            Crew.objects.create(first_name="Zoe", last_name="Adler"),
+            Crew.objects.create(first_name="Anna", last_name="Brown"),
+            Crew.objects.create(first_name="Anna", last_name="Adler"),
+        ]
+        now = timezone.now()
+        flights = []
+        for i in range(15):
+            flight = Flight.objects.create(
+                route=routes[i % 2],
+                airplane=airplanes[i % 2],
+                departure_time=now + timezone.timedelta(days=2, hours=i, seconds=i),
+                arrival_time=now + timezone.timedelta(days=2, hours=i + 3),
+            )
+            flight.crew.set(crew[: i % 4])
+            flights.append(flight)
+
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=flights[0], row=1, seat=1)
+        Ticket.objects.create(order=order, flight=flights[0], row=1, seat=2)
+        hold = SeatHold.objects.create(
+            flight=flights[1],
+            user=self.user,
+            expires_at=now + timezone.timedelta(minutes=10),
+        )
+        HeldSeat.objects.create(hold=hold, flight=flights[1], row=2, seat=1)
+
+    def assert_same_body(self, url, params=None):
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            regular = self.client.get(url, params)
+        with override_settings(FAST_LIST_SERIALIZATION=True):
+            fast = self.client.get(url, params)
+
+        self.assertEqual(regular.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, regular.content)
+        return fast
+
+    def test_flight_list(self):
+        response = self.assert_same_body(FLIGHTS_URL, {"page_size": 100})
+
+        self.assertEqual(response.data["count"], 15)
+        self.assertEqual(
+            {flight["available_places"] for flight in response.data["results"]},
+            {60, 66, 58, 65},
+        )
+
+    def test_flight_list_pages(self):
+        self.assert_same_body(FLIGHTS_URL, {"page": 2})
+        self.assert_same_body(FLIGHTS_URL, {"page_size": 100, "source": "Paris"})
+
+    def test_flight_list_cursor(self):
+        first = self.assert_same_body(FLIGHTS_URL, {"pagination": "cursor"})
+        self.assert_same_body(first.data["next"])
+
+    def test_route_list(self):
+        self.assert_same_body(ROUTES_URL)
+        self.assert_same_body(ROUTES_URL, {"destination": "Rome"})
+
+    def test_airplane_list(self):
+        self.assert_same_body(AIRPLANES_URL)
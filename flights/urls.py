@@ -1,6 +1,12 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from flights.async_views import (
+    AsyncAirportListView,
+    AsyncFlightDetailView,
+    AsyncFlightListView,
+    AsyncRouteListView,
+)
 from flights.views import (
     AirportViewSet,
     CrewViewSet,
@@ -8,7 +14,11 @@ from flights.views import (
     RouteViewSet,
     AirplaneViewSet,
     FlightViewSet,
+    FlightScheduleViewSet,
     OrderViewSet,
+    ConnectionViewSet,
+    SeatHoldViewSet,
+    BookingRequestViewSet,
 )
 
 
@@ -19,8 +29,26 @@ router.register("airplane_types", AirplaneTypeViewSet)
 router.register("routes", RouteViewSet)
 router.register("airplanes", AirplaneViewSet)
 router.register("flights", FlightViewSet)
+router.register("schedules", FlightScheduleViewSet)
 router.register("orders", OrderViewSet)
+router.register("connections", ConnectionViewSet, basename="connection")
+router.register("holds", SeatHoldViewSet)
+router.register("booking_requests", BookingRequestViewSet)
+
+async_urlpatterns = [
+    path("flights/", AsyncFlightListView.as_view(), name="async-flight-list"),
+    path(
+        "flights/<int:pk>/",
+        AsyncFlightDetailView.as_view(),
+        name="async-flight-detail",
+    ),
+    path("routes/", AsyncRouteListView.as_view(), name="async-route-list"),
+    path("airports/", AsyncAirportListView.as_view(), name="async-airport-list"),
+]
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("", include(router.urls)),
+    path("async/", include(async_urlpatterns)),
+]
 
 app_name = "flights"
@@ -0,0 +1,151 @@
+"""
+List serializers that build their output from ``values()`` rows.
+
+Each one reproduces a regular list serializer field for field, in the
+same order and with the same representation, without instantiating
+model objects or running field lookups per row. The plan of lookups and
+converters is compiled once from the regular serializer's fields.
+"""
+from collections import defaultdict
+
+from rest_framework import serializers
+
+from flights.models import Flight
+from flights.serializers import (
+    AirplaneListSerializer,
+    FlightListSerializer,
+    RouteListSerializer,
+)
+
+# Fields whose to_representation returns database values unchanged.
+PASSTHROUGH_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+
+
+class ValuesListSerializer:
+    """
+    Output fields are taken from the ``lookups`` column of the row and
+    converted like the regular field would, or computed by a
+    ``represent_<field>(row)`` method reading ``extra_lookups`` columns.
+    ``prepare`` loads data shared by a page of rows, such as many-to-many
+    relations, in one query.
+    """
+
+    serializer_class = None
+    lookups = {}
+    extra_lookups = ()
+
+    def __init__(self):
+        plan, self.columns = self.compile()
+        self.plan = [
+            (name, lookup, getattr(self, method) if method else convert)
+            for name, lookup, convert, method in plan
+        ]
+
+    @classmethod
+    def compile(cls):
+        """The field plan and values() columns, built once per class."""
+        if "_compiled" not in cls.__dict__:
+            plan = []
+            for name, field in cls.serializer_class().fields.items():
+                if field.write_only:
+                    continue
+                method = f"represent_{name}"
+                if hasattr(cls, method):
+                    plan.append((name, None, None, method))
+                    continue
+                convert = (
+                    None
+                    if type(field) in PASSTHROUGH_FIELDS
+                    else field.to_representation
+                )
+                plan.append((name, cls.lookups.get(name, name), convert, None))
+
+            columns = [lookup for _, lookup, _, _ in plan if lookup is not None]
+            cls._compiled = plan, list(dict.fromkeys([*columns, *cls.extra_lookups]))
+        return cls._compiled
+
+    def get_queryset(self, queryset):
+        return (
+            queryset.select_related(None).prefetch_related(None).values(*self.columns)
+        )
+
+    def prepare(self, rows):
+        pass
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        self.prepare(rows)
+        plan = self.plan
+        data = []
+        for row in rows:
+            item = {}
+            for name, lookup, convert in plan:
+                if lookup is None:
+                    item[name] = convert(row)
+                    continue
+                value = row[lookup]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+            data.append(item)
+        return data
+
+
+class RouteValuesSerializer(ValuesListSerializer):
+    serializer_class = RouteListSerializer
+    lookups = {
+        "source": "source__closest_big_city",
+        "destination": "destination__closest_big_city",
+    }
+
+
+class AirplaneValuesSerializer(ValuesListSerializer):
+    serializer_class = AirplaneListSerializer
+    extra_lookups = ("airplane_type_id", "airplane_type__name")
+
+    def represent_capacity(self, row):
+        return row["rows"] * row["seats_in_row"]
+
+    def represent_airplane_type(self, row):
+        return {"id": row["airplane_type_id"], "name": row["airplane_type__name"]}
+
+
+class FlightValuesSerializer(ValuesListSerializer):
+    """Needs the seats_held annotation of the flight list queryset."""
+
+    serializer_class = FlightListSerializer
+    lookups = {"airplane": "airplane__name"}
+    extra_lookups = (
+        "route__source__name",
+        "route__destination__name",
+        "airplane__rows",
+        "airplane__seats_in_row",
+        "seats_taken",
+        "seats_held",
+    )
+
+    def prepare(self, rows):
+        # Same order as the crew prefetch, which follows Crew.Meta.ordering.
+        self.crew = defaultdict(list)
+        for flight_id, first_name, last_name in (
+            Flight.crew.through.objects.filter(
+                flight_id__in=[row["id"] for row in rows]
+            )
+            .order_by("crew__first_name", "crew__last_name")
+            .values_list("flight_id", "crew__first_name", "crew__last_name")
+        ):
+            self.crew[flight_id].append(f"{first_name} {last_name}")
+
+    def represent_route(self, row):
+        return f"{row['route__source__name']}-{row['route__destination__name']}"
+
+    def represent_crew(self, row):
+        return self.crew.get(row["id"], [])
+
+    def represent_available_places(self, row):
+        capacity = row["airplane__rows"] * row["airplane__seats_in_row"]
+        return capacity - row["seats_taken"] - row["seats_held"]
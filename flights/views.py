@@ -1,12 +1,63 @@
+from datetime import timedelta
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
-from rest_framework import mixins, viewsets
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.viewsets import GenericViewSet
 
-from flights.paginators import OrderFlightPagination
+from flights import cache
+from flights.booking import confirm_hold
+from flights.connections import find_connections
+from flights.exports import CSV_FIELDS, order_history, ticket_rows
+from flights.mixins import (
+    CachedResponseMixin,
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+    IdempotentCreateMixin,
+    QueryBudgetMixin,
+    QueuedCreateMixin,
+    SerializerTimingMixin,
+    SparseFieldsMixin,
+    ValuesListMixin,
+)
+from flights.paginators import (
+    CursorPaginationMixin,
+    FlightCursorPagination,
+    OrderCursorPagination,
+    OrderFlightPagination,
+)
 from flights.permissions import IsAdminOrIfAuthenticatedReadOnly
-from flights.models import Airport, Crew, AirplaneType, Route, Airplane, Flight, Order
+from flights.renderers import CSVRenderer, NDJSONRenderer
+from flights.schedules import materialize_days, materialize_searched
+from flights.models import (
+    Airport,
+    Crew,
+    AirplaneType,
+    Route,
+    Airplane,
+    Flight,
+    FlightSchedule,
+    Ticket,
+    Order,
+    OrderSummary,
+    SeatHold,
+    HeldSeat,
+    BookingRequest,
+)
+from flights.search import airport_ids_for_city, filter_departure, normalize_city
+from flights.seatmap import pack_seatmap
+from flights.values_serializers import (
+    AirplaneValuesSerializer,
+    FlightValuesSerializer,
+    RouteValuesSerializer,
+)
 from flights.serializers import (
     AirportSerializer,
     CrewSerializer,
@@ -19,12 +70,38 @@ from flights.serializers import (
     FlightSerializer,
     FlightListSerializer,
     FlightRetrieveSerializer,
+    FlightSeatMapSerializer,
+    FlightScheduleSerializer,
+    ConnectionSearchSerializer,
+    ConnectionSerializer,
     OrderSerializer,
-    OrderListSerializer,
+    OrderSummarySerializer,
+    SeatHoldSerializer,
+    BookingRequestSerializer,
 )
 
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        description="Return only these fields (ex. ?fields=id,departure_time)",
+        required=False,
+        type=str,
+    ),
+    OpenApiParameter(
+        "expand",
+        description="Nest these related objects (ex. ?expand=route,crew)",
+        required=False,
+        type=str,
+    ),
+]
+
 
 class AirportViewSet(
+    QueryBudgetMixin,
+    SerializerTimingMixin,
+    SparseFieldsMixin,
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -33,20 +110,21 @@ class AirportViewSet(
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    query_budget = {"list": 2, "retrieve": 2}
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = super().get_queryset()
         city = self.request.query_params.get("city")
 
         if city:
-            queryset = queryset.filter(closest_big_city__icontains=city)
+            queryset = queryset.filter(city_key__startswith=normalize_city(city))
         return queryset
 
     @extend_schema(
         parameters=[
             OpenApiParameter(
                 "city",
-                description="Filter by closest_big_city (ex. ?city=Paris)",
+                description="Filter by closest_big_city prefix (ex. ?city=Par)",
                 required=False,
                 type=str,
             ),
@@ -56,43 +134,68 @@ class AirportViewSet(
         return super().list(request, *args, **kwargs)
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(
+    QueryBudgetMixin, SerializerTimingMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
     permission_classes = (IsAdminUser,)
+    query_budget = {"list": 1, "retrieve": 1}
 
 
 class AirplaneTypeViewSet(
-    mixins.CreateModelMixin, mixins.ListModelMixin, GenericViewSet
+    QueryBudgetMixin,
+    SerializerTimingMixin,
+    SparseFieldsMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
 ):
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
     permission_classes = (IsAdminUser,)
+    query_budget = {"list": 1}
 
 
 class RouteViewSet(
+    QueryBudgetMixin,
+    SerializerTimingMixin,
+    SparseFieldsMixin,
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
     mixins.CreateModelMixin,
+    ValuesListMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet,
 ):
-    queryset = Route.objects.select_related("source", "destination")
+    queryset = Route.objects.all()
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    query_budget = {"list": 2, "retrieve": 2}
+    values_serializer_class = RouteValuesSerializer
+    version_fields = ("updated_at", "source__updated_at", "destination__updated_at")
 
     def get_queryset(self):
+        # Conditional lists read the queryset before the response does,
+        # the city lookups run once per request.
+        if not hasattr(self, "_queryset"):
+            self._queryset = self._search_queryset()
+        return self._queryset
+
+    def _search_queryset(self):
         queryset = self.queryset
         source = self.request.query_params.get("source")
         destination = self.request.query_params.get("destination")
 
         if source:
-            queryset = queryset.filter(source__closest_big_city__icontains=source)
+            queryset = queryset.filter(source_id__in=airport_ids_for_city(source))
 
         if destination:
             queryset = queryset.filter(
-                destination__closest_big_city__icontains=destination
+                destination_id__in=airport_ids_for_city(destination)
             )
 
-        return queryset.select_related("source", "destination")
+        return self.select_sparse_related(queryset)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -115,16 +218,32 @@ class RouteViewSet(
                 required=False,
                 type=str,
             ),
+            *SPARSE_FIELDS_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
 
-class AirplaneViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, GenericViewSet):
-    queryset = Airplane.objects.select_related("airplane_type")
+class AirplaneViewSet(
+    QueryBudgetMixin,
+    SerializerTimingMixin,
+    SparseFieldsMixin,
+    ConditionalListMixin,
+    mixins.CreateModelMixin,
+    ValuesListMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
+):
+    queryset = Airplane.objects.all()
     serializer_class = AirplaneListSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    query_budget = {"list": 2}
+    values_serializer_class = AirplaneValuesSerializer
+    version_fields = ("updated_at", "airplane_type__updated_at")
+
+    def get_queryset(self):
+        return self.select_sparse_related(self.queryset)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -133,46 +252,120 @@ class AirplaneViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, GenericVie
 
 
 class FlightViewSet(
+    QueryBudgetMixin,
+    SerializerTimingMixin,
+    SparseFieldsMixin,
+    CursorPaginationMixin,
+    CachedResponseMixin,
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
     mixins.CreateModelMixin,
+    ValuesListMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     GenericViewSet,
 ):
-    queryset = Flight.objects.prefetch_related("crew", "tickets")
+    queryset = Flight.objects.all()
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    query_budget = {"list": 8, "retrieve": 4, "seatmap": 3}
     pagination_class = OrderFlightPagination
+    cursor_pagination_class = FlightCursorPagination
+    values_serializer_class = FlightValuesSerializer
+    version_annotations = ("seats_held",)
+    version_fields = (
+        "updated_at",
+        "route__updated_at",
+        "route__source__updated_at",
+        "route__destination__updated_at",
+        "airplane__updated_at",
+        "airplane__airplane_type__updated_at",
+    )
 
     def get_queryset(self):
+        # Conditional lists read the queryset before the response does,
+        # the city lookups and on-demand schedules run once per request.
+        if not hasattr(self, "_queryset"):
+            self._queryset = self._search_queryset()
+        return self._queryset
+
+    def _search_queryset(self):
         queryset = self.queryset
         source = self.request.query_params.get("source")
         destination = self.request.query_params.get("destination")
-        date = self.request.query_params.get("date")
+        source_ids = destination_ids = None
 
         if source:
-            queryset = queryset.filter(
-                route__source__closest_big_city__icontains=source
-            )
+            source_ids = airport_ids_for_city(source)
+            queryset = queryset.filter(route__source_id__in=source_ids)
 
         if destination:
-            queryset = queryset.filter(
-                route__destination__closest_big_city__icontains=destination
-            )
+            destination_ids = airport_ids_for_city(destination)
+            queryset = queryset.filter(route__destination_id__in=destination_ids)
+
+        queryset = filter_departure(queryset, self.request.query_params)
+
+        if self.action == "list":
+            materialize_searched(self.request.query_params, source_ids, destination_ids)
+            if self.is_field_requested("available_places"):
+                queryset = queryset.annotate(seats_held=HeldSeat.count_for_flight())
 
-        if date:
-            queryset = queryset.filter(departure_time__date=date)
+        return self.select_sparse_related(queryset)
 
-        return queryset.select_related(
-            "route", "airplane", "route__source", "route__destination"
+    @extend_schema(parameters=SPARSE_FIELDS_PARAMETERS)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def get_cache_versions(self):
+        if self.action == "retrieve":
+            return cache.REFERENCE_VERSION, cache.flight_version(self.kwargs["pk"])
+        return cache.REFERENCE_VERSION, cache.FLIGHT_LIST_VERSION
+
+    def get_cache_timeout(self):
+        """Keep lists with held seats fresh only until the next hold expires."""
+        timeout = super().get_cache_timeout()
+        if self.action != "list":
+            return timeout
+        now = timezone.now()
+        next_expiry = (
+            SeatHold.objects.filter(expires_at__gt=now)
+            .order_by("expires_at")
+            .values_list("expires_at", flat=True)
+            .first()
         )
+        if next_expiry is None:
+            return timeout
+        return min(timeout, int((next_expiry - now).total_seconds()))
 
     def get_serializer_class(self):
         if self.action == "list":
             return FlightListSerializer
         if self.action == "retrieve":
             return FlightRetrieveSerializer
+        if self.action == "seatmap":
+            return FlightSeatMapSerializer
         return FlightSerializer
 
+    @action(methods=["GET"], detail=True, url_path="seatmap")
+    def seatmap(self, request, pk=None):
+        """Sold and held seats of the flight as base64 packed bitmaps"""
+        rows, seats_in_row = get_object_or_404(
+            Flight.objects.values_list("airplane__rows", "airplane__seats_in_row"),
+            pk=pk,
+        )
+        taken_places = Ticket.objects.filter(flight_id=pk).values_list("row", "seat")
+        held_places = HeldSeat.active().filter(flight_id=pk).values_list("row", "seat")
+        serializer = self.get_serializer(
+            {
+                "rows": rows,
+                "seats_in_row": seats_in_row,
+                "encoding": "base64",
+                "bitmap": pack_seatmap(rows, seats_in_row, taken_places),
+                "held": pack_seatmap(rows, seats_in_row, held_places),
+            }
+        )
+        return Response(serializer.data)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -194,22 +387,240 @@ class FlightViewSet(
                 type=OpenApiTypes.DATE,
                 location=OpenApiParameter.QUERY,
             ),
+            OpenApiParameter(
+                "departure_from",
+                description="Departing at or after a date or datetime "
+                "(ex. ?departure_from=2024-10-08T12:00)",
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                "departure_to",
+                description="Departing before a datetime or by the end of a date "
+                "(ex. ?departure_to=2024-10-10)",
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                "pagination",
+                description="Use keyset pagination (ex. ?pagination=cursor)",
+                required=False,
+                type=str,
+                enum=["cursor"],
+            ),
+            *SPARSE_FIELDS_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
 
-class OrderViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, GenericViewSet):
-    queryset = Order.objects.select_related("user")
+class FlightScheduleViewSet(
+    QueryBudgetMixin, SerializerTimingMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
+    queryset = FlightSchedule.objects.all()
+    serializer_class = FlightScheduleSerializer
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    query_budget = {"list": 2, "retrieve": 2}
+
+    def get_queryset(self):
+        return self.select_sparse_related(self.queryset)
+
+
+class ConnectionViewSet(
+    QueryBudgetMixin, SerializerTimingMixin, SparseFieldsMixin, GenericViewSet
+):
+    serializer_class = ConnectionSerializer
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    query_budget = {"list": 5}
+
+    @extend_schema(parameters=[ConnectionSearchSerializer])
+    def list(self, request, *args, **kwargs):
+        """Direct and connecting itineraries between two cities on a date"""
+        search = ConnectionSearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+
+        materialize_days(params["date"], params["date"] + timedelta(days=1))
+        itineraries = find_connections(
+            airport_ids_for_city(params["source"]),
+            airport_ids_for_city(params["destination"]),
+            params["date"],
+            params["max_stops"],
+            timezone.timedelta(minutes=params["min_connection"]),
+        )
+        serializer = self.get_serializer(itineraries, many=True)
+        return Response(serializer.data)
+
+
+class OrderViewSet(
+    QueryBudgetMixin,
+    SerializerTimingMixin,
+    SparseFieldsMixin,
+    CursorPaginationMixin,
+    IdempotentCreateMixin,
+    QueuedCreateMixin,
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    GenericViewSet,
+):
+    queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = (IsAuthenticated,)
+    query_budget = {"list": 2, "export": 1}
     pagination_class = OrderFlightPagination
+    cursor_pagination_class = OrderCursorPagination
+    queue_serializer_class = BookingRequestSerializer
+    queue_setting = "BOOKING_QUEUE"
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        queryset = self.queryset
+        if self.action == "list":
+            queryset = OrderSummary.objects.all()
+        return self.select_sparse_related(queryset.filter(user=self.request.user))
 
     def get_serializer_class(self):
         if self.action == "list":
-            return OrderListSerializer
+            return OrderSummarySerializer
         return OrderSerializer
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def get_queued_url(self, instance):
+        return reverse(
+            "flights:bookingrequest-detail", args=[instance.pk], request=self.request
+        )
+
+    @extend_schema(
+        responses={201: OrderSerializer, 202: BookingRequestSerializer},
+        parameters=[
+            OpenApiParameter(
+                "Prefer",
+                description="Queue the booking and poll the returned booking "
+                "request (ex. Prefer: respond-async)",
+                required=False,
+                type=str,
+                location=OpenApiParameter.HEADER,
+            ),
+            OpenApiParameter(
+                "Idempotency-Key",
+                description="Replay the response of an earlier order request "
+                "sent with the same key instead of booking again",
+                required=False,
+                type=str,
+                location=OpenApiParameter.HEADER,
+            ),
+        ],
+    )
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "pagination",
+                description="Use keyset pagination (ex. ?pagination=cursor)",
+                required=False,
+                type=str,
+                enum=["cursor"],
+            ),
+            *SPARSE_FIELDS_PARAMETERS,
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        responses={
+            (200, NDJSONRenderer.media_type): OpenApiTypes.STR,
+            (200, CSVRenderer.media_type): OpenApiTypes.STR,
+        },
+        parameters=[
+            OpenApiParameter(
+                "format",
+                description="Export format, also negotiated from the Accept "
+                "header (ex. ?format=csv)",
+                required=False,
+                type=str,
+                enum=[NDJSONRenderer.format, CSVRenderer.format],
+            ),
+        ],
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        renderer_classes=(NDJSONRenderer, CSVRenderer),
+    )
+    def export(self, request):
+        """
+        The whole order history of the user, newest first: one order with
+        its tickets per NDJSON line, or one ticket per CSV row
+        """
+        renderer = request.accepted_renderer
+        orders = order_history(request.user)
+        if isinstance(renderer, CSVRenderer):
+            chunks = CSVRenderer(CSV_FIELDS).render_stream(ticket_rows(orders))
+        else:
+            chunks = renderer.render_stream(orders)
+
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="orders.{renderer.format}"'
+        return response
+
+
+class SeatHoldViewSet(
+    QueryBudgetMixin,
+    SerializerTimingMixin,
+    SparseFieldsMixin,
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet,
+):
+    queryset = SeatHold.objects.select_related("flight__airplane").prefetch_related(
+        "seats"
+    )
+    serializer_class = SeatHoldSerializer
+    permission_classes = (IsAuthenticated,)
+    query_budget = {"retrieve": 2}
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
+    def get_serializer_class(self):
+        if self.action == "confirm":
+            return OrderSerializer
+        return SeatHoldSerializer
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(methods=["POST"], detail=True, url_path="confirm")
+    def confirm(self, request, pk=None):
+        """Buy the held seats as a new order and release the hold"""
+        order = confirm_hold(self.get_object())
+        serializer = self.get_serializer(order)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class BookingRequestViewSet(
+    QueryBudgetMixin,
+    SerializerTimingMixin,
+    SparseFieldsMixin,
+    mixins.RetrieveModelMixin,
+    GenericViewSet,
+):
+    queryset = BookingRequest.objects.all()
+    serializer_class = BookingRequestSerializer
+    permission_classes = (IsAuthenticated,)
+    query_budget = {"retrieve": 1}
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)